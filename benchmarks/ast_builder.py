@@ -0,0 +1,94 @@
+"""Микробенчмарки построения абстрактного синтаксического дерева
+из словарей парсера (make_ast, make_expr).
+
+Запуск из корня репозитория (требуется собранный парсер, см. README.md):
+
+    python benchmarks/ast_builder.py [--scale N] [--depth N] [--repeat N]
+
+--scale - сколько раз повторяется корпус test/examples,
+--depth - глубина синтетического выражения 1 + (1 + (1 + ...)).
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from serpent.parser_adapter import parse
+from serpent.tree import make_ast
+from serpent.tree.expr import make_expr
+
+
+PARSER_PATH = Path("build") / "eiffelp"
+EXAMPLES_DIR = Path("test") / "examples"
+
+
+def load_corpus() -> list[dict]:
+    trees = []
+    for path in sorted(EXAMPLES_DIR.glob("*.e")):
+        stdout, stderr = parse(path.read_text(), PARSER_PATH)
+        if not stderr:
+            trees.append(json.loads(stdout))
+    return trees
+
+
+def deep_expr(depth: int) -> dict:
+    location = {
+        "first_line": 1,
+        "first_column": 1,
+        "last_line": 1,
+        "last_column": 1,
+        "filename": None,
+    }
+    expr = {"type": "int_const", "location": location, "value": 1}
+    for _ in range(depth):
+        expr = {
+            "type": "binop",
+            "location": location,
+            "binop_type": "add_op",
+            "left": {"type": "int_const", "location": location, "value": 1},
+            "right": expr,
+        }
+    return expr
+
+
+def best_time(function, repeat: int) -> float:
+    # Как и timeit, отключаем сборщик мусора на время замера
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.process_time()
+            function()
+            best = min(best, time.process_time() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--scale", type=int, default=200)
+    args_parser.add_argument("--depth", type=int, default=100_000)
+    args_parser.add_argument("--repeat", type=int, default=5)
+    args = args_parser.parse_args()
+
+    corpus = load_corpus() * args.scale
+    classes_count = sum(len(tree["classes"]) for tree in corpus)
+    elapsed = best_time(lambda: [make_ast(tree) for tree in corpus], args.repeat)
+    print(f"make_ast: {len(corpus)} files, {classes_count} classes, "
+          f"{elapsed * 1000:.1f} ms")
+
+    expr = deep_expr(args.depth)
+    try:
+        elapsed = best_time(lambda: make_expr(expr), args.repeat)
+        print(f"make_expr: depth {args.depth}, {elapsed * 1000:.1f} ms")
+    except RecursionError:
+        print(f"make_expr: depth {args.depth}, RecursionError")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Измеряет память, занимаемую абстрактным синтаксическим деревом.
+
+Запуск из корня репозитория (требуется собранный парсер, см. README.md):
+
+    python benchmarks/ast_memory.py [файл.e ...]
+
+По умолчанию используются примеры из test/examples.
+"""
+import dataclasses
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from serpent.parser_adapter import parse
+from serpent.tree import make_ast
+from serpent.tree.abstract_node import Node, Location
+
+
+PARSER_PATH = Path("build") / "eiffelp"
+EXAMPLES_DIR = Path("test") / "examples"
+
+
+def count_nodes(root) -> tuple[int, int]:
+    """Возвращает количество узлов дерева и уникальных объектов Location"""
+    nodes = 0
+    locations = set()
+
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, list):
+            stack.extend(obj)
+        elif dataclasses.is_dataclass(obj) and not isinstance(obj, Location):
+            if isinstance(obj, Node):
+                nodes += 1
+                if obj.location is not None:
+                    locations.add(id(obj.location))
+            stack.extend(
+                getattr(obj, field.name) for field in dataclasses.fields(obj))
+
+    return nodes, len(locations)
+
+
+def main(paths: list[Path]) -> None:
+    trees = []
+    for path in paths:
+        stdout, stderr = parse(path.read_text(), PARSER_PATH)
+        if stderr:
+            print(f"skipping {path}: {stderr.strip()}", file=sys.stderr)
+            continue
+        trees.append(json.loads(stdout))
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    classes = [make_ast(tree) for tree in trees]
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes, locations = count_nodes(classes)
+    size = after - before
+    print(f"files:          {len(trees)}")
+    print(f"nodes:          {nodes}")
+    print(f"locations:      {locations}")
+    print(f"AST size:       {size} bytes")
+    print(f"bytes per node: {size / max(nodes, 1):.1f}")
+
+
+if __name__ == "__main__":
+    main([Path(arg) for arg in sys.argv[1:]] or sorted(EXAMPLES_DIR.glob("*.e")))
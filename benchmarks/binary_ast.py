@@ -0,0 +1,106 @@
+"""Сравнивает построение дерева из JSON (eiffelp) и из компактного
+двоичного формата (eiffelp -b) на синтетической программе
+(см. benchmarks/generator.py).
+
+Оба пути строят узлы за один проход (make_ast_from_json
+и make_ast_from_binary) и одинаково отключают сборщик мусора на время
+построения, поэтому разница во времени определяется только форматом.
+Отдельно замеряется декодирование без построения узлов: json.loads
+против decode_binary_ast. Двоичный формат декодируется и на Python
+(decode_binary_ast), и в C - разделяемой библиотекой парсера
+(SharedParser.decode_binary), если она собрана.
+
+Запуск из корня репозитория (требуется собранный парсер, см. README.md):
+
+    python benchmarks/binary_ast.py [--repeat N] [--classes N] [--body N] ...
+"""
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import fields
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generator import GeneratorConfig, add_config_arguments, write_program
+from serpent.parser_adapter import load_shared_parser
+from serpent.tree import decode_binary_ast, make_ast_from_binary, make_ast_from_json
+
+
+PARSER_PATH = Path("build") / "eiffelp"
+LIBRARY_PATH = Path("build") / "libeiffelp.so"
+
+
+def measure(function, outputs: list, repeat: int) -> float:
+    """Возвращает минимальное время по часам; сборщик мусора отключен
+    для всех функций одинаково
+    """
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for output in outputs:
+                function(output)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def run_parser(path: Path, *flags: str) -> bytes:
+    return subprocess.run(
+        [PARSER_PATH, *flags, path], capture_output=True, check=True).stdout
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--repeat", type=int, default=5)
+    add_config_arguments(args_parser)
+    args_parser.set_defaults(classes=40, body=50)
+    args = args_parser.parse_args()
+    config = GeneratorConfig(**{
+        config_field.name: getattr(args, config_field.name)
+        for config_field in fields(GeneratorConfig)})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_program(config, Path(temp_dir))
+        json_outputs = [run_parser(path).decode() for path in paths]
+        binary_outputs = [run_parser(path, "-b") for path in paths]
+
+    expected = [make_ast_from_json(output) for output in json_outputs]
+    assert expected == [make_ast_from_binary(output) for output in binary_outputs]
+
+    benchmarks = [
+        ("json.loads", json.loads, json_outputs),
+        ("decode_binary_ast", decode_binary_ast, binary_outputs),
+        ("make_ast_from_json", make_ast_from_json, json_outputs),
+        ("make_ast_from_binary", make_ast_from_binary, binary_outputs)]
+
+    shared_parser = load_shared_parser(LIBRARY_PATH)
+    if shared_parser is not None:
+        decode = shared_parser.decode_binary
+        assert expected == [
+            make_ast_from_binary(output, decode) for output in binary_outputs]
+        benchmarks[2:2] = [("decode_binary (C)", decode, binary_outputs)]
+        benchmarks.append((
+            "make_ast_from_binary (C)",
+            lambda output: make_ast_from_binary(output, decode),
+            binary_outputs))
+    else:
+        print(f"{LIBRARY_PATH} is not built, skipping the C decoder")
+
+    print(f"{len(paths)} files, "
+          f"{sum(len(output) for output in json_outputs) / 2**20:.1f} MB of JSON, "
+          f"{sum(len(output) for output in binary_outputs) / 2**20:.1f} MB of binary")
+    for name, function, outputs in benchmarks:
+        elapsed = measure(function, outputs, args.repeat)
+        print(f"{name:<26} {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
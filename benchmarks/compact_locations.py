@@ -0,0 +1,92 @@
+"""Сравнивает обычный JSON-вывод парсера и вывод с компактными позициями
+(eiffelp -c): размер вывода и время декодирования на корпусе test/examples.
+
+Запуск из корня репозитория (требуется собранный парсер, см. README.md):
+
+    python benchmarks/compact_locations.py [--scale N] [--repeat N]
+
+--scale - сколько раз повторяется корпус test/examples.
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from serpent.parser_adapter import parse
+from serpent.tree import decode_json_ast, make_ast, make_ast_from_json
+from serpent.tree.features import Method
+
+
+PARSER_PATH = Path("build") / "eiffelp"
+EXAMPLES_DIR = Path("test") / "examples"
+
+
+def load_corpus(compact_locations: bool) -> list[str]:
+    outputs = []
+    for path in sorted(EXAMPLES_DIR.glob("*.e")):
+        stdout, stderr = parse(
+            path.read_text(), PARSER_PATH, compact_locations=compact_locations)
+        if not stderr:
+            outputs.append(stdout)
+    return outputs
+
+
+def build_bodies(classes: list) -> list:
+    for class_decl in classes:
+        for feature in class_decl.features:
+            if isinstance(feature, Method):
+                feature.do
+    return classes
+
+
+def best_time(function, repeat: int) -> float:
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.process_time()
+            function()
+            best = min(best, time.process_time() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--scale", type=int, default=200)
+    args_parser.add_argument("--repeat", type=int, default=5)
+    args = args_parser.parse_args()
+
+    plain = load_corpus(False) * args.scale
+    compact = load_corpus(True) * args.scale
+    plain_size = sum(len(output) for output in plain)
+    compact_size = sum(len(output) for output in compact)
+    print(f"{len(plain)} files, output {plain_size / 2**20:.2f} MB -> "
+          f"{compact_size / 2**20:.2f} MB ({compact_size / plain_size:.0%})")
+
+    stages = {
+        "decode": (json.loads, decode_json_ast),
+        "decode + make_ast": (
+            lambda output: make_ast(json.loads(output)),
+            lambda output: make_ast(decode_json_ast(output))),
+        "... + all bodies": (
+            lambda output: build_bodies(make_ast(json.loads(output))),
+            lambda output: build_bodies(make_ast(decode_json_ast(output)))),
+        "make_ast_from_json": (make_ast_from_json, make_ast_from_json),
+    }
+    print(f"{'':<20} {'plain, ms':>10} {'compact, ms':>12}")
+    for name, (plain_function, compact_function) in stages.items():
+        plain_time = best_time(
+            lambda: [plain_function(output) for output in plain], args.repeat)
+        compact_time = best_time(
+            lambda: [compact_function(output) for output in compact], args.repeat)
+        print(f"{name:<20} {plain_time * 1000:>10.1f} {compact_time * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
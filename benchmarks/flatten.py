@@ -0,0 +1,148 @@
+"""Микробенчмарк построения таблиц фич (analyze_inheritance) на
+синтетических классах с большим количеством фич и длинными
+секциями rename/undefine/redefine/select/create.
+
+Запуск из корня репозитория:
+
+    python benchmarks/flatten.py [--features N] [--copies N] [--repeat N]
+
+--features - количество фич в базовом классе,
+--copies - сколько независимых копий системы классов анализируется.
+"""
+import argparse
+import gc
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from serpent.errors import ErrorCollector
+from serpent.semantic_checker.analyze_inheritance import analyze_inheritance
+from serpent.tree import (
+    Alias,
+    ClassDecl,
+    ClassType,
+    Method,
+    Parent,
+    SelectedFeatures,
+)
+
+
+def make_method(name: str) -> Method:
+    return Method(
+        location=None,
+        name=name,
+        clients=["ANY"],
+        is_deferred=False,
+        return_type=ClassType(location=None, name="<VOID>"))
+
+
+def make_parent(name: str, selected: list[str] = (), **clauses) -> Parent:
+    return Parent(
+        location=None,
+        class_name=name,
+        select=SelectedFeatures(class_name=name, selected_features=list(selected)),
+        **clauses)
+
+
+def make_classes(features_count: int, suffix: str = "") -> list[ClassDecl]:
+    """Строит систему классов в топологическом порядке:
+    - BASE объявляет features_count фич;
+    - CHILD наследует BASE, переименовывая, переопределяя и делая
+      отложенными по четверти его фич, и объявляет четверть
+      собственных фич конструкторами;
+    - LEFT и RIGHT объявляют фичи с одинаковыми именами,
+      а BOTTOM наследует оба класса, выбирая все фичи LEFT.
+    К именам классов добавляется suffix.
+    """
+    quarter = features_count // 4
+    base_names = [f"f{i}" for i in range(features_count)]
+    renamed = base_names[:quarter]
+    redefined = base_names[quarter:2 * quarter]
+    undefined = base_names[2 * quarter:3 * quarter]
+    own_names = [f"own{i}" for i in range(features_count)]
+    shared_names = [f"shared{i}" for i in range(features_count)]
+
+    base = ClassDecl(
+        location=None,
+        class_name=f"BASE{suffix}",
+        is_deferred=False,
+        features=[make_method(name) for name in base_names])
+
+    child = ClassDecl(
+        location=None,
+        class_name=f"CHILD{suffix}",
+        is_deferred=True,
+        inherit=[make_parent(
+            f"BASE{suffix}",
+            rename=[
+                Alias(location=None, original_name=name, alias_name=f"renamed_{name}")
+                for name in renamed],
+            redefine=redefined,
+            undefine=undefined)],
+        create=own_names[:quarter],
+        features=[make_method(name) for name in redefined + own_names])
+
+    left = ClassDecl(
+        location=None,
+        class_name=f"LEFT{suffix}",
+        is_deferred=False,
+        features=[make_method(name) for name in shared_names])
+    right = ClassDecl(
+        location=None,
+        class_name=f"RIGHT{suffix}",
+        is_deferred=False,
+        features=[make_method(name) for name in shared_names])
+    bottom = ClassDecl(
+        location=None,
+        class_name=f"BOTTOM{suffix}",
+        is_deferred=False,
+        inherit=[
+            make_parent(f"LEFT{suffix}", shared_names),
+            make_parent(f"RIGHT{suffix}")])
+
+    return [base, child, left, right, bottom]
+
+
+def best_time(function, repeat: int) -> float:
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.process_time()
+            function()
+            best = min(best, time.process_time() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--features", type=int, default=1000)
+    args_parser.add_argument("--copies", type=int, default=1)
+    args_parser.add_argument("--repeat", type=int, default=5)
+    args = args_parser.parse_args()
+
+    # Классы копий чередуются, чтобы порядок оставался топологическим,
+    # но классы одного уровня разных копий стояли рядом
+    copies = [make_classes(args.features, f"_{i}") for i in range(args.copies)]
+    classes = [decl for level in zip(*copies) for decl in level]
+
+    error_collector = ErrorCollector()
+    analyze_inheritance(classes, error_collector)
+    if not error_collector.ok():
+        for error in error_collector.errors:
+            print(error, file=sys.stderr)
+        sys.exit(1)
+
+    elapsed = best_time(
+        lambda: analyze_inheritance(classes, ErrorCollector()), args.repeat)
+    print(f"analyze_inheritance: {len(classes)} classes, "
+          f"{args.features} features per class, "
+          f"{elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Измеряет память, занимаемую таблицами фич (analyze_inheritance),
+на глубокой иерархии классов.
+
+Запуск из корня репозитория:
+
+    python benchmarks/flatten_memory.py [--depth N] [--features N] [--step N]
+
+Иерархия - цепочка из depth классов. Корень объявляет features фич,
+каждый следующий класс переименовывает, делает отложенными и
+переопределяет по step фич предка и объявляет step собственных фич.
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from serpent.errors import ErrorCollector
+from serpent.semantic_checker.analyze_inheritance import (
+    RECORD_LISTS,
+    analyze_inheritance,
+)
+from serpent.tree import Alias, ClassDecl, ClassType, Method, Parent, SelectedFeatures
+
+
+def make_method(name: str) -> Method:
+    return Method(
+        location=None,
+        name=name,
+        clients=["ANY"],
+        is_deferred=False,
+        return_type=ClassType(location=None, name="<VOID>"))
+
+
+def make_chain(depth: int, features_count: int, step: int) -> list[ClassDecl]:
+    if 3 * step * depth > features_count:
+        raise ValueError("features must be at least 3 * step * depth")
+
+    names = [f"f{i}" for i in range(features_count)]
+    classes = [ClassDecl(
+        location=None,
+        class_name="LEVEL0",
+        features=[make_method(name) for name in names])]
+
+    for level in range(1, depth + 1):
+        # Каждый уровень работает со своими фичами корня
+        start = 3 * step * (level - 1)
+        renamed = names[start:start + step]
+        undefined = names[start + step:start + 2 * step]
+        redefined = names[start + 2 * step:start + 3 * step]
+        parent_name = f"LEVEL{level - 1}"
+
+        classes.append(ClassDecl(
+            location=None,
+            class_name=f"LEVEL{level}",
+            inherit=[Parent(
+                location=None,
+                class_name=parent_name,
+                select=SelectedFeatures(class_name=parent_name, selected_features=[]),
+                rename=[
+                    Alias(location=None, original_name=name, alias_name=f"{name}_{level}")
+                    for name in renamed],
+                undefine=undefined,
+                redefine=redefined)],
+            features=[
+                make_method(name)
+                for name in redefined + [f"own{level}_{i}" for i in range(step)]]))
+
+    return classes
+
+
+def count_objects(tables) -> tuple[int, int]:
+    """Возвращает количество различных записей о фичах
+    и узлов фич в таблицах
+    """
+    records = {}
+    for table in tables:
+        for list_name in RECORD_LISTS:
+            for record in getattr(table, list_name):
+                records[id(record)] = record
+    nodes = {id(record.node) for record in records.values()}
+    return len(records), len(nodes)
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--depth", type=int, default=20)
+    args_parser.add_argument("--features", type=int, default=1200)
+    args_parser.add_argument("--step", type=int, default=20)
+    args = args_parser.parse_args()
+
+    classes = make_chain(args.depth, args.features, args.step)
+
+    gc.collect()
+    tracemalloc.start()
+    before_size, _ = tracemalloc.get_traced_memory()
+    before_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.reset_peak()
+
+    error_collector = ErrorCollector()
+    tables = analyze_inheritance(classes, error_collector)
+
+    gc.collect()
+    after_size, peak = tracemalloc.get_traced_memory()
+    after_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+
+    if not error_collector.ok():
+        for error in error_collector.errors:
+            print(error, file=sys.stderr)
+        sys.exit(1)
+
+    records, nodes = count_objects(tables)
+    print(f"classes:        {len(classes)}")
+    print(f"records:        {records}")
+    print(f"feature nodes:  {nodes}")
+    print(f"tables size:    {after_size - before_size} bytes")
+    print(f"memory blocks:  {after_blocks - before_blocks}")
+    print(f"peak:           {peak - before_size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Генератор синтетических программ на Eiffel для бенчмарков.
+
+Классы программы распределяются по depth уровням. Класс уровня 0
+наследует только ANY, класс следующего уровня - случайный класс
+предыдущего уровня, а с вероятностью diamonds - еще несколько (до width
+родителей). Класс с несколькими родителями образует ромб: у его
+родителей всегда есть общий предок ANY, а начиная с третьего уровня -
+как правило, и общие предки из самой программы.
+
+Каждый класс объявляет features фич: атрибуты и методы, тело которых
+состоит из body инструкций (присваивания, ветвления, циклы, вызовы),
+а выражения в инструкциях имеют глубину вложенности nesting.
+
+Запуск из корня репозитория:
+
+    python benchmarks/generator.py OUTPUT_DIR [--classes N] [--depth N] ...
+"""
+import argparse
+import random
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class GeneratorConfig:
+    classes: int = 100
+    depth: int = 5
+    # Максимальное количество родителей класса
+    width: int = 3
+    # Вероятность того, что у класса больше одного родителя
+    diamonds: float = 0.3
+    features: int = 10
+    # Количество инструкций в теле метода
+    body: int = 5
+    # Глубина вложенности выражений
+    nesting: int = 3
+    seed: int = 0
+
+
+def feature_names(class_name: str, config: GeneratorConfig) -> tuple[list[str], list[str]]:
+    """Возвращает имена атрибутов и методов класса"""
+    prefix = class_name.lower()
+    attributes = [f"{prefix}_a{i}" for i in range(config.features // 2)]
+    methods = [f"{prefix}_m{i}" for i in range(config.features - len(attributes))]
+    return attributes, methods
+
+
+class _Writer:
+    def __init__(self, rng: random.Random, config: GeneratorConfig) -> None:
+        self.rng = rng
+        self.config = config
+        self.lines: list[str] = []
+
+    def line(self, indent: int, text: str) -> None:
+        self.lines.append("    " * indent + text)
+
+    def expr(self, depth: int, names: list[str]) -> str:
+        if depth == 0:
+            if self.rng.random() < 0.5:
+                return str(self.rng.randint(0, 100))
+            return self.rng.choice(names)
+
+        kind = self.rng.randrange(3)
+        if kind == 0:
+            # Скобки нужны, чтобы два минуса подряд не начали комментарий
+            return f"-({self.expr(depth - 1, names)})"
+        operator = self.rng.choice(["+", "-", "*", "//", "\\\\"])
+        left = self.expr(depth - 1, names)
+        right = self.expr(self.rng.randrange(depth), names)
+        return f"({left} {operator} {right})"
+
+    def statement(self, index: int, indent: int, names: list[str], calls: list[str]) -> None:
+        nesting = self.config.nesting
+        kind = index % 4
+        if kind == 0 or not calls and kind == 3:
+            self.line(indent, f"Result := {self.expr(nesting, names)}")
+        elif kind == 1:
+            self.line(indent, f"if {self.expr(nesting, names)} > 0 then")
+            self.line(indent + 1, f"Result := {self.expr(nesting, names)}")
+            self.line(indent, f"elseif {self.expr(nesting, names)} < 0 then")
+            self.line(indent + 1, "Result := -Result")
+            self.line(indent, "else")
+            self.line(indent + 1, f"Result := {self.expr(nesting, names)}")
+            self.line(indent, "end")
+        elif kind == 2:
+            self.line(indent, "from")
+            self.line(indent + 1, "i := 0")
+            self.line(indent, "until")
+            self.line(indent + 1, f"i > {self.expr(nesting, names)}")
+            self.line(indent, "loop")
+            self.line(indent + 1, f"Result := Result + {self.expr(nesting, names)}")
+            self.line(indent + 1, "i := i + 1")
+            self.line(indent, "end")
+        else:
+            call = self.rng.choice(calls)
+            self.line(indent, f"Result := Result + {call} ({self.expr(nesting, names)})")
+
+    def class_decl(self, name: str, parents: list[str], parent_methods: list[str]) -> str:
+        self.line(0, "class")
+        self.line(1, name)
+        if parents:
+            self.line(0, "inherit")
+            for parent in parents:
+                self.line(1, parent)
+        self.line(0, "")
+        self.line(0, "feature")
+
+        attributes, methods = feature_names(name, self.config)
+
+        for attribute in attributes:
+            self.line(1, f"{attribute}: INTEGER")
+        for i, method in enumerate(methods):
+            self.line(0, "")
+            self.line(1, f"{method} (x: INTEGER): INTEGER")
+            self.line(2, "local")
+            self.line(3, "i: INTEGER")
+            self.line(2, "do")
+            names = ["x", "i", "Result"] + attributes
+            # Метод вызывает методы предков и предыдущие методы класса
+            calls = parent_methods + methods[:i]
+            for index in range(self.config.body):
+                self.statement(index, 3, names, calls)
+            self.line(2, "end")
+
+        self.line(0, "")
+        self.line(0, "end")
+        return "\n".join(self.lines) + "\n"
+
+
+def generate(config: GeneratorConfig) -> dict[str, str]:
+    """Возвращает исходный код программы: словарь из имени файла
+    (по одному классу в файле) в его содержимое
+    """
+    rng = random.Random(config.seed)
+    depth = max(1, min(config.depth, config.classes))
+    levels: list[list[str]] = [[] for _ in range(depth)]
+    for i in range(config.classes):
+        levels[i * depth // config.classes].append(f"C{i}")
+
+    methods: dict[str, list[str]] = {}
+    sources = {}
+    for level, names in enumerate(levels):
+        for name in names:
+            parents = []
+            if level > 0:
+                candidates = levels[level - 1]
+                count = 1
+                if rng.random() < config.diamonds:
+                    count = rng.randint(2, max(2, config.width))
+                parents = rng.sample(candidates, min(count, len(candidates)))
+
+            parent_methods = [method for parent in parents for method in methods[parent]]
+            writer = _Writer(rng, config)
+            sources[f"{name.lower()}.e"] = writer.class_decl(name, parents, parent_methods)
+            methods[name] = feature_names(name, config)[1]
+    return sources
+
+
+def write_program(config: GeneratorConfig, output_dir: Path) -> list[Path]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for file_name, source in generate(config).items():
+        path = output_dir / file_name
+        path.write_text(source)
+        paths.append(path)
+    return paths
+
+
+def add_config_arguments(args_parser: argparse.ArgumentParser) -> None:
+    for config_field in fields(GeneratorConfig):
+        args_parser.add_argument(
+            f"--{config_field.name}",
+            type=config_field.type,
+            default=config_field.default)
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("output", type=Path)
+    add_config_arguments(args_parser)
+    args = args_parser.parse_args()
+
+    config = GeneratorConfig(**{
+        config_field.name: getattr(args, config_field.name)
+        for config_field in fields(GeneratorConfig)})
+    paths = write_program(config, args.output)
+    print(f"{args.output}: {len(paths)} files")
+
+
+if __name__ == "__main__":
+    main()
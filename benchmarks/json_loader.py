@@ -0,0 +1,106 @@
+"""Сравнивает построение дерева из JSON за два прохода (json.loads,
+затем make_ast) и за один (make_ast_from_json) на синтетической
+программе (см. benchmarks/generator.py).
+
+make_ast строит тела методов при первом обращении, поэтому для
+двухпроходного пути замеряется и время с построением всех тел - столько
+же работы однопроходный загрузчик выполняет сразу.
+
+Запуск из корня репозитория (требуется собранный парсер, см. README.md):
+
+    python benchmarks/json_loader.py [--repeat N] [--classes N] [--body N] ...
+"""
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import fields
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generator import GeneratorConfig, add_config_arguments, write_program
+from serpent.tree import make_ast, make_ast_from_json
+from serpent.tree.features import Method
+
+
+PARSER_PATH = Path("build") / "eiffelp"
+
+
+def build_bodies(classes: list) -> list:
+    for class_decl in classes:
+        for feature in class_decl.features:
+            if isinstance(feature, Method):
+                feature.do
+    return classes
+
+
+def two_pass(outputs: list[str]) -> list:
+    return [make_ast(json.loads(output)) for output in outputs]
+
+
+def two_pass_with_bodies(outputs: list[str]) -> list:
+    return [build_bodies(classes) for classes in two_pass(outputs)]
+
+
+def single_pass(outputs: list[str]) -> list:
+    return [make_ast_from_json(output) for output in outputs]
+
+
+def measure(function, outputs: list[str], repeat: int) -> tuple[float, int, int]:
+    """Возвращает минимальное время по часам, пиковую память
+    и память, занятую результатом
+    """
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(outputs)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    result = function(outputs)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak, retained
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument("--repeat", type=int, default=5)
+    add_config_arguments(args_parser)
+    args_parser.set_defaults(classes=40, body=50)
+    args = args_parser.parse_args()
+    config = GeneratorConfig(**{
+        config_field.name: getattr(args, config_field.name)
+        for config_field in fields(GeneratorConfig)})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = write_program(config, Path(temp_dir))
+        outputs = [
+            subprocess.run(
+                [PARSER_PATH, path], capture_output=True, text=True, check=True).stdout
+            for path in paths]
+
+    print(f"{len(outputs)} files, "
+          f"{sum(len(output) for output in outputs) / 2**20:.1f} MB of JSON")
+    for name, function in [
+            ("two-pass", two_pass),
+            ("two-pass, all bodies", two_pass_with_bodies),
+            ("single-pass", single_pass)]:
+        elapsed, peak, retained = measure(function, outputs, args.repeat)
+        print(f"{name:<22} {elapsed * 1000:8.1f} ms  peak {peak / 2**20:6.1f} MB  "
+              f"retained {retained / 2**20:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
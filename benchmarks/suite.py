@@ -0,0 +1,200 @@
+"""Набор бенчмарков компилятора на синтетических программах
+(см. benchmarks/generator.py).
+
+Для каждого сценария программа генерируется заново с фиксированным
+seed и компилируется (serpent.driver.compile_program) repeat раз.
+По стадиям компиляции (разбор, json.loads, make_ast, examine_system,
+analyze_inheritance) записывается минимальное время по часам и
+процессорное время, а также, по отдельному запуску с tracemalloc,
+пиковая память. Стандартная библиотека состоит из одного класса ANY,
+чтобы результаты не зависели от ее изменений.
+
+Запуск из корня репозитория (требуется собранный парсер, см. README.md):
+
+    python benchmarks/suite.py [-o FILE] [--scenario NAME]... [--jobs N]
+                               [--repeat N] [--compare BASE_FILE]
+
+Результаты сохраняются в JSON с упорядоченными ключами, поэтому файлы
+разных коммитов удобно сравнивать как целиком (--compare), так и diff-ом.
+"""
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generator import GeneratorConfig, write_program
+from serpent.driver import LIBRARY_PATH, PARSER_PATH, compile_program
+from serpent.errors import ErrorCollector
+from serpent.profiling import Profiler
+from serpent.stdlib import STDLIB_DIR, build_snapshot
+
+
+SCENARIOS = {
+    "baseline": GeneratorConfig(),
+    "many_classes": GeneratorConfig(classes=1000, depth=5, features=6, body=2, nesting=2),
+    "deep": GeneratorConfig(classes=200, depth=100, diamonds=0.1),
+    "diamonds": GeneratorConfig(classes=300, depth=6, width=4, diamonds=1.0),
+    "many_features": GeneratorConfig(classes=40, depth=4, features=200, body=1, nesting=1),
+    "large_bodies": GeneratorConfig(classes=40, features=10, body=50),
+    "nested_expressions": GeneratorConfig(classes=40, features=6, body=4, nesting=10),
+}
+
+# Точность сохраняемых значений времени (в секундах)
+TIME_DIGITS = 6
+
+
+def git_commit() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    return output.stdout.strip() or None
+
+
+def compile_once(
+        program_dir: Path,
+        stdlib_dir: Path,
+        snapshot_path: Path,
+        jobs: int,
+        trace_memory: bool) -> Profiler:
+    profiler = Profiler(trace_memory=trace_memory)
+    error_collector = ErrorCollector()
+    try:
+        compile_program(
+            [program_dir],
+            error_collector,
+            PARSER_PATH,
+            jobs,
+            snapshot_path=snapshot_path,
+            stdlib_dir=stdlib_dir,
+            library_path=LIBRARY_PATH,
+            profiler=profiler)
+    finally:
+        profiler.close()
+
+    if not error_collector.ok():
+        raise RuntimeError(
+            f"Generated program {program_dir} doesn't compile:\n"
+            + "\n".join(str(error) for error in error_collector.errors[:10]))
+    return profiler
+
+
+def run_scenario(
+        config: GeneratorConfig,
+        work_dir: Path,
+        stdlib_dir: Path,
+        snapshot_path: Path,
+        jobs: int,
+        repeat: int) -> dict:
+    program_dir = work_dir / "program"
+    shutil.rmtree(program_dir, ignore_errors=True)
+    paths = write_program(config, program_dir)
+
+    stages = {}
+    for _ in range(repeat):
+        profiler = compile_once(program_dir, stdlib_dir, snapshot_path, jobs, False)
+        for record in profiler.records:
+            stage = stages.setdefault(record.name, {
+                "wall_time": float("inf"),
+                "cpu_time": float("inf"),
+                "counters": dict(record.counters),
+            })
+            stage["wall_time"] = min(stage["wall_time"], record.wall_time)
+            stage["cpu_time"] = min(stage["cpu_time"], record.cpu_time)
+
+    profiler = compile_once(program_dir, stdlib_dir, snapshot_path, jobs, True)
+    for record in profiler.records:
+        stages[record.name]["peak_memory"] = record.peak_memory
+
+    for stage in stages.values():
+        stage["wall_time"] = round(stage["wall_time"], TIME_DIGITS)
+        stage["cpu_time"] = round(stage["cpu_time"], TIME_DIGITS)
+
+    return {
+        "config": asdict(config),
+        "files": len(paths),
+        "bytes": sum(path.stat().st_size for path in paths),
+        "stages": stages,
+        "wall_time": round(sum(stage["wall_time"] for stage in stages.values()), TIME_DIGITS),
+    }
+
+
+def compare(base: dict, current: dict) -> None:
+    """Печатает отношение времени стадий текущего запуска к базовому"""
+    print(f"{'scenario':<20} {'stage':<20} {'base, ms':>10} {'now, ms':>10} {'ratio':>7}")
+    for name, scenario in current["scenarios"].items():
+        base_scenario = base["scenarios"].get(name)
+        if base_scenario is None or base_scenario["config"] != scenario["config"]:
+            print(f"{name:<20} (no comparable base result)")
+            continue
+
+        rows = [(stage_name, stage["wall_time"], base_scenario["stages"].get(stage_name))
+                for stage_name, stage in scenario["stages"].items()]
+        rows.append(("total", scenario["wall_time"], {"wall_time": base_scenario["wall_time"]}))
+        for stage_name, wall_time, base_stage in rows:
+            if base_stage is None:
+                continue
+            base_time = base_stage["wall_time"]
+            ratio = wall_time / base_time if base_time else float("inf")
+            print(f"{name:<20} {stage_name:<20} {base_time * 1000:>10.2f} "
+                  f"{wall_time * 1000:>10.2f} {ratio:>7.2f}")
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser()
+    args_parser.add_argument(
+        "-o", "--output", type=Path, default=Path("build") / "benchmarks.json")
+    args_parser.add_argument(
+        "--scenario", action="append", choices=list(SCENARIOS),
+        help="run only the given scenarios (can be repeated)")
+    args_parser.add_argument("--jobs", type=int, default=1)
+    args_parser.add_argument("--repeat", type=int, default=3)
+    args_parser.add_argument("--compare", type=Path, help="results file to compare with")
+    args = args_parser.parse_args()
+
+    results = {
+        "environment": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "settings": {"jobs": args.jobs, "repeat": args.repeat},
+        "scenarios": {},
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        stdlib_dir = work_dir / "stdlib"
+        stdlib_dir.mkdir()
+        shutil.copy(STDLIB_DIR / "any.e", stdlib_dir)
+        snapshot_path = work_dir / "stdlib.snapshot"
+        build_snapshot(PARSER_PATH, snapshot_path, stdlib_dir, LIBRARY_PATH)
+
+        for name in args.scenario or SCENARIOS:
+            result = run_scenario(
+                SCENARIOS[name], work_dir, stdlib_dir, snapshot_path,
+                args.jobs, args.repeat)
+            results["scenarios"][name] = result
+            print(f"{name}: {result['files']} files, {result['bytes']} bytes, "
+                  f"{result['wall_time'] * 1000:.1f} ms", file=sys.stderr)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            compare(json.load(file), results)
+
+
+if __name__ == "__main__":
+    main()
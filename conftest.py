@@ -0,0 +1,2 @@
+# Корневой conftest.py нужен, чтобы pytest добавлял корень репозитория
+# в sys.path и тесты могли импортировать пакет serpent
@@ -0,0 +1,4 @@
+from .driver import main
+
+
+main()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from .tree import ClassDecl
+from .semantic_checker.analyze_inheritance import (
+    RECORD_LISTS,
+    FeatureRecord,
+    FlattenClass,
+)
+
+
+class CompilationCache:
+    """Дисковый кэш результатов компиляции для инкрементальной пересборки.
+
+    Для каждого исходного файла хранится хеш его содержимого и список
+    построенных по нему классов, поэтому повторно разбирается только
+    изменившийся файл. Для каждого класса хранится его таблица фич
+    (FlattenClass) вместе с хешами файлов самого класса и всех его предков:
+    таблица считается действительной, только если ни один из этих файлов
+    не изменился. Так после изменения класса заново строятся таблицы
+    только для него и его потомков.
+
+    Таблица хранится без объявлений классов и фич: каждая запись о фиче
+    ссылается на объявление по имени класса и номеру фичи в нем
+    (см. store_flatten). Иначе в таблицу каждого класса попадали бы
+    объявления всех его предков, и размер кэша рос бы квадратично
+    от глубины иерархии.
+    """
+
+    # Версия формата кэша. Должна увеличиваться при изменении
+    # классов дерева или FlattenClass, иначе старый кэш не прочитается,
+    # а также правил построения таблиц фич, иначе из кэша будут взяты
+    # устаревшие таблицы
+    VERSION = 6
+
+    def __init__(self, cache_dir: Path | str) -> None:
+        """
+        :param cache_dir: Каталог кэша (создается при необходимости)
+        """
+        self.cache_dir = Path(cache_dir)
+        self._files_dir = self.cache_dir / "files"
+        self._classes_dir = self.cache_dir / "classes"
+
+        # Хеш файла, в котором объявлен класс, для всех классов,
+        # прошедших через load_classes/store_classes
+        self._class_hashes: dict[str, str] = {}
+        self._file_hashes: dict[Path, str] = {}
+
+    @staticmethod
+    def _hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _file_entry(self, path: Path) -> Path:
+        return self._files_dir / f"{self._hash(str(path.resolve()).encode())}.pickle"
+
+    def _class_entry(self, class_name: str) -> Path:
+        return self._classes_dir / f"{class_name}.pickle"
+
+    def _read(self, entry: Path):
+        try:
+            with open(entry, "rb") as file:
+                version, payload = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError,
+                ValueError, AttributeError, ImportError):
+            return None
+        return payload if version == self.VERSION else None
+
+    def _write(self, entry: Path, payload) -> None:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            data = pickle.dumps((self.VERSION, payload), pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            # Слишком глубокое дерево - просто не кэшируем
+            return
+
+        # Запись через временный файл, чтобы прерванная запись
+        # не оставила в кэше поврежденный файл
+        fd, temp_path = tempfile.mkstemp(dir=entry.parent)
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, entry)
+
+    def file_hash(self, path: Path) -> str:
+        """Возвращает хеш содержимого файла (вычисляется один раз за сборку)"""
+        file_hash = self._file_hashes.get(path)
+        if file_hash is None:
+            file_hash = self._file_hashes[path] = self._hash(path.read_bytes())
+        return file_hash
+
+    def class_hash(self, class_name: str) -> str | None:
+        """Возвращает хеш файла, в котором объявлен класс,
+        либо None, если класс не проходил через кэш
+        """
+        return self._class_hashes.get(class_name)
+
+    def register_classes(self, classes: list[ClassDecl], file_hash: str) -> None:
+        """Запоминает хеш исходного кода для классов, не проходящих через
+        load_classes/store_classes (например, классов стандартной
+        библиотеки из ее снимка), чтобы их изменение делало
+        недействительными таблицы фич их потомков
+        """
+        for class_decl in classes:
+            self._class_hashes[class_decl.class_name] = file_hash
+
+    def load_classes(self, path: Path) -> list[ClassDecl] | None:
+        """Возвращает классы файла из кэша, если файл не изменился
+        с момента сохранения, иначе - None
+        """
+        file_hash = self.file_hash(path)
+        payload = self._read(self._file_entry(path))
+        if payload is None:
+            return None
+
+        cached_hash, classes = payload
+        if cached_hash != file_hash:
+            return None
+
+        for class_decl in classes:
+            self._class_hashes[class_decl.class_name] = file_hash
+        return classes
+
+    def store_classes(self, path: Path, classes: list[ClassDecl]) -> None:
+        file_hash = self.file_hash(path)
+        for class_decl in classes:
+            self._class_hashes[class_decl.class_name] = file_hash
+        self._write(self._file_entry(path), (file_hash, classes))
+
+    def load_flatten(
+            self,
+            class_name: str,
+            ancestors_hashes: dict[str, str],
+            declarations: dict[str, ClassDecl]) -> FlattenClass | None:
+        """Возвращает таблицу фич класса из кэша, если с момента ее сохранения
+        не изменились ни файл класса, ни файлы его предков, иначе - None
+
+        :param class_name: Имя класса
+        :param ancestors_hashes: Текущие хеши файлов предков класса
+        :param declarations: Объявления класса и всех его предков по имени,
+        на которые ссылаются записи таблицы
+        """
+        class_hash = self.class_hash(class_name)
+        if class_hash is None:
+            return None
+
+        payload = self._read(self._class_entry(class_name))
+        if payload is None:
+            return None
+
+        cached_hash, cached_ancestors_hashes, records = payload
+        if cached_hash != class_hash or cached_ancestors_hashes != ancestors_hashes:
+            return None
+
+        # Файлы класса и предков не изменились, поэтому номера фич
+        # в их объявлениях те же, что и при сохранении
+        try:
+            table = FlattenClass(
+                class_decl=declarations[class_name],
+                **{
+                    record_list: [
+                        FeatureRecord(
+                            from_class,
+                            name,
+                            declarations[declared_in].features[index],
+                            undefined,
+                            selected_from)
+                        for from_class, name, (declared_in, index), undefined,
+                        selected_from in records[record_list]
+                    ]
+                    for record_list in RECORD_LISTS
+                })
+        except (KeyError, IndexError):
+            return None
+        table.update_index()
+        return table
+
+    def store_flatten(
+            self,
+            table: FlattenClass,
+            ancestors_hashes: dict[str, str],
+            declarations: dict[str, ClassDecl]) -> None:
+        """Сохраняет таблицу фич класса. Записи сохраняются со ссылками
+        на объявления фич: имя класса, в котором фича объявлена,
+        и ее номер в этом классе
+
+        :param ancestors_hashes: Текущие хеши файлов предков класса
+        :param declarations: Объявления класса и всех его предков по имени
+        """
+        class_hash = self.class_hash(table.class_name)
+        if class_hash is None:
+            return
+
+        references = {
+            id(feature): (class_name, index)
+            for class_name in [table.class_name, *ancestors_hashes]
+            for index, feature in enumerate(declarations[class_name].features)
+        }
+        try:
+            records = {
+                record_list: [
+                    (record.from_class,
+                     record.name,
+                     references[id(record.node)],
+                     record.undefined,
+                     record.selected_from)
+                    for record in getattr(table, record_list)
+                ]
+                for record_list in RECORD_LISTS
+            }
+        except KeyError:
+            # Запись ссылается на объявление вне класса и его предков
+            return
+        self._write(
+            self._class_entry(table.class_name),
+            (class_hash, ancestors_hashes, records))
@@ -0,0 +1,321 @@
+"""Пакетная компиляция программы из нескольких файлов:
+
+    python -m serpent [-j N] [--cache-dir DIR] [--diagnostics {text,json}]
+                      [--interface PATH]... PATH...
+
+PATH - файл с исходным кодом (*.e) или каталог, в котором рекурсивно
+ищутся файлы *.e. Классы стандартной библиотеки (stdlib/) добавляются
+к программе автоматически, из снимка (см. serpent/stdlib.py), если он
+актуален. Классы сторонних библиотек, от которых программа только
+наследуется или которые только вызывает, передаются опцией
+--interface PATH: из них строится только интерфейс (см. load_interfaces).
+Файлы разбираются параллельно в потоках разделяемой библиотекой парсера
+(см. SharedParser), а если она недоступна - процессами парсера
+(см. ParserPool), после чего все классы проходят examine_system
+и analyze_inheritance.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .cache import CompilationCache
+from .errors import (
+    CompilerError,
+    ErrorCollector,
+    JsonLinesSink,
+    TextSink,
+    TooManyErrors,
+)
+from .parser_adapter import ParserPool, load_shared_parser
+from .profiling import Profiler, count_nodes
+from .semantic_checker.analyze_inheritance import (
+    FlattenClass,
+    FlattenStats,
+    flatten_classes,
+)
+from .semantic_checker.examine_system import examine_system
+from .stdlib import SNAPSHOT_PATH, STDLIB_DIR, load_stdlib, source_hashes
+from .tree import ClassDecl, make_ast
+
+
+PARSER_PATH = Path("build") / "eiffelp"
+LIBRARY_PATH = Path("build") / "libeiffelp.so"
+
+
+@dataclass
+class Program:
+    # Классы программы и стандартной библиотеки в топологическом порядке
+    classes: list[ClassDecl] = field(default_factory=list)
+    # Таблицы фич классов, которые удалось построить
+    tables: dict[str, FlattenClass] = field(default_factory=dict)
+
+
+def collect_sources(paths: list[Path]) -> list[Path]:
+    """Возвращает файлы с исходным кодом: сами файлы из paths и файлы *.e
+    из каталогов paths (без повторов, в порядке следования paths)
+
+    :raises FileNotFoundError: если какого-то из путей не существует
+    """
+    sources = {}
+    for path in paths:
+        if path.is_dir():
+            for source in sorted(path.rglob("*.e")):
+                sources.setdefault(source.resolve(), source)
+        elif path.is_file():
+            sources.setdefault(path.resolve(), path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return list(sources.values())
+
+
+def parse_errors(stderr: str, path: Path) -> list[CompilerError]:
+    """Преобразует сообщения парсера об ошибках в CompilerError"""
+    return [
+        CompilerError(line.strip(), source=str(path))
+        for line in stderr.splitlines()
+        if line.strip() and not line.startswith("Failed to parse")
+    ]
+
+
+def parse_sources(
+        paths: list[Path],
+        error_collector: ErrorCollector,
+        parser_path: Path | str = PARSER_PATH,
+        jobs: int = 1,
+        cache: CompilationCache | None = None,
+        profiler: Profiler | None = None,
+        library_path: Path | str | None = None,
+        interface_only: bool = False) -> list[ClassDecl]:
+    """Разбирает файлы в jobs потоков разделяемой библиотекой парсера,
+    а если ее не удалось загрузить - распределяя их между jobs процессами
+    парсера. Файлы, которые есть в кэше и не изменились, не разбираются.
+
+    :param interface_only: Нужно ли строить только интерфейс классов,
+    без тел и контрактов методов (такие классы не кэшируются)
+    :return: классы всех успешно разобранных файлов в порядке следования файлов
+    """
+    if interface_only:
+        cache = None
+    profiler = profiler or Profiler(enabled=False)
+    file_classes: dict[Path, list[ClassDecl]] = {}
+    pending = []
+    for path in paths:
+        classes = cache.load_classes(path) if cache is not None else None
+        if classes is not None:
+            file_classes[path] = classes
+        else:
+            pending.append(path)
+
+    sources = [path.read_text() for path in pending]
+    # Часть файлов (например, в стандартной библиотеке) - пустые заготовки
+    to_parse = [
+        (path, source) for path, source in zip(pending, sources) if source.strip()]
+
+    if to_parse:
+        with error_collector.stage("parse"), profiler.stage("parse"):
+            sources = [source for _, source in to_parse]
+            file_names = [str(path) for path, _ in to_parse]
+            shared_parser = (
+                load_shared_parser(library_path) if library_path is not None else None)
+            if shared_parser is not None:
+                results = shared_parser.map(
+                    sources, file_names, min(jobs, len(to_parse)), interface_only)
+            else:
+                with ParserPool(
+                        parser_path, min(jobs, len(to_parse)), interface_only) as pool:
+                    results = pool.map(sources, file_names)
+            profiler.count("files", len(to_parse))
+            profiler.count("bytes", sum(len(source) for _, source in to_parse))
+
+            trees = {}
+            for (path, _), (stdout, stderr) in zip(to_parse, results):
+                if stderr:
+                    for error in parse_errors(stderr, path):
+                        error_collector.add_error(error)
+                else:
+                    trees[path] = stdout
+
+        with profiler.stage("json.loads"):
+            trees = {path: json.loads(stdout) for path, stdout in trees.items()}
+
+        with profiler.stage("make_ast") as record:
+            for path, tree in trees.items():
+                file_classes[path] = make_ast(tree)
+                profiler.count("classes", len(file_classes[path]))
+        if record is not None:
+            # Узлы считаются вне стадии, чтобы подсчет не влиял на ее время
+            record.counters["nodes"] = sum(
+                count_nodes(file_classes[path]) for path in trees)
+
+        if cache is not None:
+            for path in trees:
+                cache.store_classes(path, file_classes[path])
+
+    return [
+        class_decl
+        for path in paths
+        for class_decl in file_classes.get(path, [])
+    ]
+
+
+def load_interfaces(
+        paths: list[Path],
+        error_collector: ErrorCollector,
+        parser_path: Path | str = PARSER_PATH,
+        jobs: int = 1,
+        profiler: Profiler | None = None,
+        library_path: Path | str | None = None) -> list[ClassDecl]:
+    """Загружает классы зависимостей программы, от которых только
+    наследуются или которые только вызываются: парсер (eiffelp -i) выводит
+    лишь заголовки, наследование, конструкторы и сигнатуры фич, поэтому
+    методы этих классов не имеют тел и контрактов
+
+    :param paths: Файлы и каталоги зависимостей (см. collect_sources)
+    """
+    return parse_sources(
+        collect_sources(paths), error_collector, parser_path, jobs,
+        profiler=profiler, library_path=library_path, interface_only=True)
+
+
+def compile_program(
+        paths: list[Path],
+        error_collector: ErrorCollector,
+        parser_path: Path | str = PARSER_PATH,
+        jobs: int = 1,
+        cache_dir: Path | None = None,
+        snapshot_path: Path = SNAPSHOT_PATH,
+        stdlib_dir: Path = STDLIB_DIR,
+        library_path: Path | str | None = LIBRARY_PATH,
+        profiler: Profiler | None = None,
+        interface_paths: list[Path] = ()) -> Program:
+    """Разбирает и анализирует программу вместе со стандартной библиотекой
+
+    :param paths: Файлы и каталоги программы (см. collect_sources)
+    :param interface_paths: Файлы и каталоги зависимостей программы,
+    из которых нужен только интерфейс классов (см. load_interfaces)
+    :param jobs: Количество потоков (или процессов парсера) для разбора файлов
+    :param cache_dir: Каталог кэша компиляции (см. CompilationCache),
+    None - без кэша
+    :param profiler: Профилировщик стадий компиляции
+    """
+    profiler = profiler or Profiler(enabled=False)
+    cache = CompilationCache(cache_dir) if cache_dir is not None else None
+    with profiler.stage("load_stdlib"):
+        stdlib = load_stdlib(parser_path, snapshot_path, stdlib_dir, library_path)
+        profiler.count("classes", len(stdlib.classes))
+    if cache is not None:
+        stdlib_hash = hashlib.sha256(
+            json.dumps(source_hashes(stdlib_dir), sort_keys=True).encode()).hexdigest()
+        cache.register_classes(stdlib.classes, stdlib_hash)
+
+    classes = load_interfaces(
+        interface_paths, error_collector, parser_path, jobs, profiler, library_path)
+    classes += parse_sources(
+        collect_sources(paths), error_collector, parser_path, jobs, cache, profiler,
+        library_path)
+    if not error_collector.ok():
+        return Program()
+
+    with profiler.stage("examine_system"):
+        ordered = examine_system(stdlib.classes + classes, error_collector)
+        profiler.count("classes", len(ordered))
+    if not error_collector.ok():
+        return Program()
+
+    stats = FlattenStats() if profiler.enabled else None
+    with profiler.stage("analyze_inheritance"):
+        # Классы библиотеки с ошибками строятся заново вместе с программой,
+        # и повторно полученные ошибки ErrorCollector не покажет дважды
+        with error_collector.stage("analyze_inheritance"):
+            for error in stdlib.errors:
+                error_collector.add_error(error)
+        tables = flatten_classes(
+            ordered, error_collector, stats, cache, stdlib.tables)
+        if stats is not None:
+            profiler.count("classes_flattened", stats.computed)
+            profiler.count("classes_cached", stats.cached)
+            profiler.count("parent_tables_reused", stats.reused)
+            profiler.count("features_inherited", stats.inherited)
+    return Program(classes=ordered, tables=tables)
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser(
+        prog="serpent", description="Compile an Eiffel program")
+    args_parser.add_argument(
+        "paths", type=Path, nargs="+", help="source files and directories")
+    args_parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of parser threads (or processes, without the parser library)")
+    args_parser.add_argument(
+        "--interface", type=Path, action="append", default=[],
+        help="dependency file or directory to load without routine bodies "
+             "(can be repeated)")
+    args_parser.add_argument("--parser", type=Path, default=PARSER_PATH)
+    args_parser.add_argument("--library", type=Path, default=LIBRARY_PATH)
+    args_parser.add_argument("--snapshot", type=Path, default=SNAPSHOT_PATH)
+    args_parser.add_argument("--cache-dir", type=Path)
+    args_parser.add_argument(
+        "--diagnostics", choices=["text", "json"], default="text",
+        help="diagnostics format: colorless text on stderr "
+             "or JSON Lines on stdout")
+    args_parser.add_argument(
+        "--max-errors", type=int,
+        help="abort compilation after this many errors")
+    args_parser.add_argument(
+        "--profile", type=Path, default=os.environ.get("SERPENT_PROFILE"),
+        help="write per-stage time, memory and counters as JSON "
+             "(default: $SERPENT_PROFILE)")
+    args_parser.add_argument(
+        "--trace", type=Path, default=os.environ.get("SERPENT_TRACE"),
+        help="write per-stage timings as a Chrome trace-event file "
+             "(default: $SERPENT_TRACE)")
+    args = args_parser.parse_args()
+
+    if args.jobs < 1:
+        args_parser.error("--jobs must be positive")
+
+    if args.diagnostics == "json":
+        sink = JsonLinesSink()
+    else:
+        sink = TextSink(colored=sys.stderr.isatty())
+    error_collector = ErrorCollector(max_errors=args.max_errors, sinks=[sink])
+    profiler = Profiler(enabled=args.profile is not None or args.trace is not None)
+
+    try:
+        program = compile_program(
+            args.paths,
+            error_collector,
+            args.parser,
+            args.jobs,
+            args.cache_dir,
+            args.snapshot,
+            library_path=args.library,
+            profiler=profiler,
+            interface_paths=args.interface)
+    except TooManyErrors as err:
+        error_collector.close()
+        print(err, file=sys.stderr)
+        sys.exit(1)
+    except (FileNotFoundError, RuntimeError) as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        profiler.close()
+        if args.profile is not None:
+            profiler.dump_json(args.profile)
+        if args.trace is not None:
+            profiler.dump_chrome_trace(args.trace)
+
+    error_collector.close()
+    if not error_collector.ok():
+        sys.exit(1)
+
+    if args.diagnostics == "text":
+        print(f"{len(program.classes)} classes, "
+              f"{len(program.tables)} feature tables", file=sys.stderr)
@@ -1,4 +1,10 @@
+import json
+import sys
 from abc import ABC, abstractmethod, abstractproperty
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
 from .tree.abstract_node import Location
 
 
@@ -39,12 +45,17 @@ class CompilerDiagnostic(ABC, Exception):
         else:
             return ""
 
-    def __str__(self) -> str:
+    def format(self, colored: bool = True) -> str:
         source_str = self.format_source(self.location, self.source)
+        if not colored:
+            return f"{source_str}{self.severity}: {self.desc}"
         return (f"{self.BOLD_COLOR}{source_str}"
                 f"{self.color}{self.severity}: "
                 f"{self.RESET_COLOR}{self.desc}")
 
+    def __str__(self) -> str:
+        return self.format()
+
 
 class CompilerError(CompilerDiagnostic):
     @property
@@ -66,22 +77,201 @@ class CompilerWarning(CompilerDiagnostic):
         return "\x1B[33m"  # Желтый цвет для предупреждений
 
 
+class DiagnosticSink(ABC):
+    """Получатель диагностик, которому ErrorCollector передает каждую
+    новую (не повторную и не скрытую) диагностику сразу при ее добавлении.
+    Форматирование выполняется только в получателе, поэтому скрытые
+    и повторные диагностики не форматируются.
+    """
+
+    @abstractmethod
+    def emit(self, diagnostic: CompilerDiagnostic, stage: str | None) -> None:
+        """
+        :param diagnostic: Диагностика.
+        :param stage: Стадия компиляции, на которой она получена (см. ErrorCollector.stage).
+        """
+
+    def close(self, suppressed: int) -> None:
+        """Вызывается по окончании компиляции (см. ErrorCollector.close).
+
+        :param suppressed: Количество скрытых из-за ограничений диагностик.
+        """
+
+
+class TextSink(DiagnosticSink):
+    """Выводит диагностики в текстовом виде (по умолчанию - без цвета)"""
+
+    def __init__(self, stream: TextIO | None = None, colored: bool = False) -> None:
+        """
+        :param stream: Поток вывода, по умолчанию - sys.stderr.
+        """
+        self.stream = stream
+        self.colored = colored
+
+    def emit(self, diagnostic: CompilerDiagnostic, stage: str | None) -> None:
+        stream = self.stream or sys.stderr
+        print(diagnostic.format(self.colored), file=stream, flush=True)
+
+    def close(self, suppressed: int) -> None:
+        if suppressed:
+            print(f"{suppressed} more error(s) not shown",
+                  file=self.stream or sys.stderr, flush=True)
+
+
+class JsonLinesSink(DiagnosticSink):
+    """Выводит каждую диагностику отдельной строкой JSON (JSON Lines):
+
+        {"severity": "error", "message": "...", "stage": "analyze_inheritance",
+         "file": "a.e", "first_line": 1, "first_column": 1,
+         "last_line": 1, "last_column": 5, "source": null}
+
+    Если у диагностики нет позиции, поля позиции равны null. По окончании
+    компиляции выводится итоговая строка {"summary": {...}}.
+    """
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        """
+        :param stream: Поток вывода, по умолчанию - sys.stdout.
+        """
+        self.stream = stream
+        self.counts = Counter()
+
+    def emit(self, diagnostic: CompilerDiagnostic, stage: str | None) -> None:
+        location = diagnostic.location
+        record = {
+            "severity": diagnostic.severity,
+            "message": diagnostic.desc,
+            "stage": stage,
+            "file": location.filename if location is not None else None,
+            "first_line": location.first_line if location is not None else None,
+            "first_column": location.first_column if location is not None else None,
+            "last_line": location.last_line if location is not None else None,
+            "last_column": location.last_column if location is not None else None,
+            "source": diagnostic.source,
+        }
+        self.counts[diagnostic.severity] += 1
+        self._write(record)
+
+    def close(self, suppressed: int) -> None:
+        self._write({"summary": {**self.counts, "suppressed": suppressed}})
+
+    def _write(self, record: dict) -> None:
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        stream.flush()
+
+
+class TooManyErrors(Exception):
+    """Бросается ErrorCollector, когда количество ошибок достигло порога
+    досрочного прекращения компиляции (см. ErrorCollector.max_errors)
+    """
+
+    def __init__(self, count: int) -> None:
+        super().__init__(f"Too many errors ({count}), compilation aborted")
+        self.count = count
+
+
 class ErrorCollector:
     LINE_SEPARATOR = "\n\n"
 
-    def __init__(self) -> None:
+    def __init__(
+            self,
+            max_errors: int | None = None,
+            max_errors_per_stage: int | None = None,
+            max_errors_per_file: int | None = None,
+            sinks: list[DiagnosticSink] | None = None) -> None:
+        """
+        :param max_errors: Порог досрочного прекращения: при получении
+        такого количества различных ошибок (включая скрытые) бросается
+        TooManyErrors.
+        :param max_errors_per_stage: Сколько ошибок одной стадии
+        (см. stage) сохраняется, остальные скрываются.
+        :param max_errors_per_file: Сколько ошибок одного файла
+        сохраняется, остальные скрываются.
+        :param sinks: Получатели, которым передается каждая сохраненная ошибка.
+
+        Все ограничения считают только ошибки: предупреждения в них
+        не учитываются и никогда не скрываются.
+        """
         self.errors = []
+        self.max_errors = max_errors
+        self.max_errors_per_stage = max_errors_per_stage
+        self.max_errors_per_file = max_errors_per_file
+        self.sinks = sinks or []
+
+        # Количество скрытых из-за ограничений ошибок
+        self.suppressed = 0
+        self.current_stage: str | None = None
+
+        self._keys = set()
+        # Количество различных ошибок (без предупреждений), включая скрытые
+        self._error_count = 0
+        self._stage_counts = Counter()
+        self._file_counts = Counter()
+
+    @staticmethod
+    def key(error: CompilerDiagnostic) -> tuple:
+        """Возвращает ключ, по которому одинаковые ошибки
+        считаются повторами
+        """
+        return (error.severity, error.location, error.source, error.desc)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Относит ошибки, добавленные внутри блока with, к стадии name"""
+        previous_stage = self.current_stage
+        self.current_stage = name
+        try:
+            yield
+        finally:
+            self.current_stage = previous_stage
 
     def __contains__(self, error: CompilerError) -> bool:
-        msg = str(error)
-        return any(msg == str(error) for error in self.errors)
+        return self.key(error) in self._keys
 
     def add_error(self, error: CompilerError) -> None:
-        if error not in self:
-            self.errors.append(error)
+        key = self.key(error)
+        if key in self._keys:
+            return
+        self._keys.add(key)
+
+        if error.severity != "error":
+            self._emit(error)
+            return
+        self._error_count += 1
+
+        if error.location is not None:
+            file_name = error.location.filename
+        else:
+            file_name = error.source
+
+        if (self._over_limit(self._stage_counts, self.current_stage, self.max_errors_per_stage)
+                or self._over_limit(self._file_counts, file_name, self.max_errors_per_file)):
+            self.suppressed += 1
+        else:
+            self._stage_counts[self.current_stage] += 1
+            self._file_counts[file_name] += 1
+            self._emit(error)
+
+        if self.max_errors is not None and self._error_count >= self.max_errors:
+            raise TooManyErrors(self._error_count)
+
+    def _emit(self, error: CompilerDiagnostic) -> None:
+        self.errors.append(error)
+        for sink in self.sinks:
+            sink.emit(error, self.current_stage)
+
+    @staticmethod
+    def _over_limit(counts: Counter, key: str | None, limit: int | None) -> bool:
+        return limit is not None and counts[key] >= limit
 
     def ok(self) -> bool:
-        return len(self.errors) == 0
+        return len(self.errors) == 0 and self.suppressed == 0
+
+    def close(self) -> None:
+        """Сообщает получателям об окончании компиляции"""
+        for sink in self.sinks:
+            sink.close(self.suppressed)
 
     def show(self) -> None:
         if self.ok():
@@ -89,3 +279,6 @@ class ErrorCollector:
 
         for error in self.errors:
             print(error, end=self.LINE_SEPARATOR)
+
+        if self.suppressed:
+            print(f"{self.suppressed} more error(s) not shown", end=self.LINE_SEPARATOR)
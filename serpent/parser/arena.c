@@ -0,0 +1,100 @@
+#include <stdlib.h>
+#include <string.h>
+
+#include "./include/arena.h"
+
+/**
+ * Минимальная емкость блока. Узлы дерева разбора маленькие (десятки байт),
+ * поэтому на один блок приходятся тысячи выделений.
+ */
+static const size_t DEFAULT_CHUNK_CAPACITY = 64 * 1024;
+
+static const size_t ALIGNMENT = alignof(max_align_t);
+
+static inline size_t
+align_size(size_t size) {
+    return (size + ALIGNMENT - 1) & ~(ALIGNMENT - 1);
+}
+
+static ArenaChunk*
+_ArenaChunk_new(ArenaChunk *prev, size_t cap) {
+    ArenaChunk *chunk = (ArenaChunk*) malloc(sizeof(ArenaChunk) + cap);
+    if (chunk == NULL) return NULL;
+
+    chunk->prev = prev;
+    chunk->cap = cap;
+    chunk->size = 0;
+    return chunk;
+}
+
+Arena*
+Arena_new() {
+    Arena *arena = (Arena*) malloc(sizeof(Arena));
+    if (arena == NULL) return NULL;
+
+    arena->chunk = NULL;
+    return arena;
+}
+
+void*
+Arena_alloc(Arena *arena, size_t size) {
+    size = align_size(size);
+
+    ArenaChunk *chunk = arena->chunk;
+    if (chunk == NULL || chunk->size + size > chunk->cap) {
+        // Остаток текущего блока не используется: выделения маленькие,
+        // поэтому теряется не больше одного узла на блок
+        size_t cap = size > DEFAULT_CHUNK_CAPACITY ? size : DEFAULT_CHUNK_CAPACITY;
+        chunk = _ArenaChunk_new(chunk, cap);
+        if (chunk == NULL) return NULL;
+        arena->chunk = chunk;
+    }
+
+    void *memory = chunk->data + chunk->size;
+    chunk->size += size;
+    return memory;
+}
+
+char*
+Arena_strdup(Arena *arena, const char *str) {
+    size_t size = strlen(str) + 1;
+    char *copy = (char*) Arena_alloc(arena, size);
+    if (copy == NULL) return NULL;
+
+    memcpy(copy, str, size);
+    return copy;
+}
+
+ArenaMark
+Arena_mark(Arena *arena) {
+    ArenaMark mark = {
+        .chunk = arena->chunk,
+        .size = arena->chunk == NULL ? 0 : arena->chunk->size,
+    };
+    return mark;
+}
+
+void
+Arena_release(Arena *arena, ArenaMark mark) {
+    ArenaChunk *chunk = arena->chunk;
+    while (chunk != mark.chunk) {
+        ArenaChunk *prev = chunk->prev;
+        free(chunk);
+        chunk = prev;
+    }
+
+    arena->chunk = chunk;
+    if (chunk != NULL)
+        chunk->size = mark.size;
+}
+
+void
+Arena_delete(Arena *arena) {
+    ArenaChunk *chunk = arena->chunk;
+    while (chunk != NULL) {
+        ArenaChunk *prev = chunk->prev;
+        free(chunk);
+        chunk = prev;
+    }
+    free(arena);
+}
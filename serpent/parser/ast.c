@@ -2,22 +2,44 @@
 #include "./include/lex_utils.h"
 #include "./eiffel.tab.h"
 
-extern YYLTYPE current_node_loc;
-extern char *current_file_path; // В файле eiffel.y
+/**
+ * Создает JSON-объект или массив в арене текущего разбора
+ * (см. ParserContext в eiffel.y)
+ */
+static inline Json*
+mk_node() {
+    return Json_new(active_context->arena);
+}
 
 Json*
 mk_current_loc_info() {
-    Json *loc = Json_new();
-
-    Json_add_int_to_object(loc, "first_line", current_node_loc.first_line);
-    Json_add_int_to_object(loc, "first_column", current_node_loc.first_column);
-    Json_add_int_to_object(loc, "last_line", current_node_loc.last_line);
-    Json_add_int_to_object(loc, "last_column", current_node_loc.last_column);
-
-    if (current_file_path == NULL)
+    // Позиция строящегося узла хранится в контексте разбора текущего потока
+    // (см. ParserContext в eiffel.y)
+    YYLTYPE node_loc = active_context->node_loc;
+    char *file_path = active_context->file_path;
+
+    Json *loc = mk_node();
+
+    if (active_context->compact_locations) {
+        // Компактная позиция - массив из пяти чисел, последнее из которых -
+        // индекс имени файла в таблице имен (см. ParserContext_file_index)
+        Json_add_int_to_array(loc, node_loc.first_line);
+        Json_add_int_to_array(loc, node_loc.first_column);
+        Json_add_int_to_array(loc, node_loc.last_line);
+        Json_add_int_to_array(loc, node_loc.last_column);
+        Json_add_int_to_array(loc, ParserContext_file_index(active_context));
+        return loc;
+    }
+
+    Json_add_int_to_object(loc, "first_line", node_loc.first_line);
+    Json_add_int_to_object(loc, "first_column", node_loc.first_column);
+    Json_add_int_to_object(loc, "last_line", node_loc.last_line);
+    Json_add_int_to_object(loc, "last_column", node_loc.last_column);
+
+    if (file_path == NULL)
         Json_add_null_to_object(loc, "filename");
     else
-        Json_add_string_to_object(loc, "filename", escape(current_file_path));
+        Json_add_string_to_object(loc, "filename", file_path);
 
     return loc;
 }
@@ -25,12 +47,15 @@ mk_current_loc_info() {
 void
 add_type_to_node(Json *node, char *type_name) {
     Json_add_string_to_object(node, "type", type_name);
-    Json_add_object_to_object(node, "location", mk_current_loc_info());
+    if (active_context->compact_locations)
+        Json_add_array_to_object(node, "location", mk_current_loc_info());
+    else
+        Json_add_object_to_object(node, "location", mk_current_loc_info());
 }
 
 Json*
 mk_int_const(int val) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "int_const");
     Json_add_int_to_object(node, "value", val);
     return node;
@@ -38,7 +63,7 @@ mk_int_const(int val) {
 
 Json*
 mk_char_const(char *char_const) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "char_const");
     Json_add_string_to_object(node, "value", char_const);
     return node;
@@ -46,7 +71,7 @@ mk_char_const(char *char_const) {
 
 Json*
 mk_real_const(double val) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "real_const");
     Json_add_double_to_object(node, "value", val);
     return node;
@@ -54,7 +79,7 @@ mk_real_const(double val) {
 
 Json*
 mk_string_const(char *val) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "string_const");
     Json_add_string_to_object(node, "value", val);
     return node;
@@ -62,21 +87,21 @@ mk_string_const(char *val) {
 
 Json*
 mk_result_const() {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "result_const");
     return node;
 }
 
 Json*
 mk_current_const() {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "current_const");
     return node;
 }
 
 Json*
 mk_boolean_const(bool val) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "boolean_const");
     Json_add_bool_to_object(node, "value", val);
     return node;
@@ -84,14 +109,14 @@ mk_boolean_const(bool val) {
 
 Json*
 mk_void_const() {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "void_const");
     return node;
 }
 
 Json*
 mk_ident_lit(char *ident) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "ident_lit");
     Json_add_string_to_object(node, "value", ident);
     return node;
@@ -99,7 +124,7 @@ mk_ident_lit(char *ident) {
 
 Json*
 mk_bin_op(char *op_name, Json *left, Json *right) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "binop");
     Json_add_string_to_object(node, "binop_type", op_name);
     Json_add_object_to_object(node, "left", left);
@@ -109,7 +134,7 @@ mk_bin_op(char *op_name, Json *left, Json *right) {
 
 Json*
 mk_unary_op(char *op_name, Json *arg) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "unop");
     Json_add_string_to_object(node, "unop_type", op_name);
     Json_add_object_to_object(node, "arg", arg);\
@@ -118,7 +143,7 @@ mk_unary_op(char *op_name, Json *arg) {
 
 Json*
 mk_simple_call(char *feature_name, Json *args_list) {
-    Json *simple_call = Json_new();
+    Json *simple_call = mk_node();
     Json_add_string_to_object(simple_call, "name", feature_name);
     Json_add_array_to_object(simple_call, "args_list", args_list);
     return simple_call;
@@ -126,7 +151,7 @@ mk_simple_call(char *feature_name, Json *args_list) {
 
 Json*
 mk_list() {
-    return Json_new();
+    return mk_node();
 }
 
 Json*
@@ -148,7 +173,7 @@ mk_simple_call_no_args(char *feature_name) {
 
 Json*
 mk_precursor_args_call(char *parent_name, Json *args_list) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "precursor_call");
     if (parent_name == NULL)
         Json_add_null_to_object(node, "parent_name");
@@ -165,7 +190,7 @@ mk_precursor_no_args_call(char *parent_name) {
 
 Json*
 mk_feature_with_owner_call(Json *owner, Json *feature) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "feature_call");
     
     if (owner != NULL)
@@ -183,7 +208,7 @@ mk_feature_with_unknown_owner_call(Json *feature) {
 
 Json*
 mk_bracket_access(Json *source, Json *index) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "bracket_access");
     Json_add_object_to_object(node, "source", source);
     Json_add_object_to_object(node, "index", index);
@@ -192,7 +217,7 @@ mk_bracket_access(Json *source, Json *index) {
 
 Json*
 mk_if_expr(Json *cond, Json *then_expr, Json *alt_exprs, Json *else_expr) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "if_expr");
     Json_add_object_to_object(node, "cond", cond);
     Json_add_object_to_object(node, "then_expr", then_expr);
@@ -203,7 +228,7 @@ mk_if_expr(Json *cond, Json *then_expr, Json *alt_exprs, Json *else_expr) {
 
 Json*
 add_elseif_expr(Json *alts, Json *cond, Json *expr) {
-    Json *alt = Json_new();
+    Json *alt = mk_node();
     add_type_to_node(alt, "elseif_expr");
     Json_add_object_to_object(alt, "cond", cond);
     Json_add_object_to_object(alt, "expr", expr);
@@ -212,16 +237,20 @@ add_elseif_expr(Json *alts, Json *cond, Json *expr) {
 }
 
 Json*
-mk_program(Json *program) {
-    Json *node = Json_new();
+mk_program(Json *program, Json *files) {
+    // Корень строится уже после разбора, вне контекста (active_context),
+    // поэтому выделяется из арены списка классов
+    Json *node = Json_new(program->arena);
     //add_type_to_node(node, "root");
+    if (files != NULL)
+        Json_add_array_to_object(node, "files", files);
     Json_add_array_to_object(node, "classes", program);
     return node;
 }
 
 Json*
 mk_if_stmt(Json *cond, Json *then_stmt_list, Json *alt_stmts, Json *else_stmt_list) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "if_stmt");
     Json_add_object_to_object(node, "cond", cond);
     Json_add_array_to_object(node, "then_clause", then_stmt_list);
@@ -232,7 +261,7 @@ mk_if_stmt(Json *cond, Json *then_stmt_list, Json *alt_stmts, Json *else_stmt_li
 
 Json*
 add_elseif_stmt(Json *alts, Json *cond, Json *stmt_list) {
-    Json *alt = Json_new();
+    Json *alt = mk_node();
     add_type_to_node(alt, "elseif_clause");
     Json_add_object_to_object(alt, "cond", cond);
     Json_add_array_to_object(alt, "body", stmt_list);
@@ -242,7 +271,7 @@ add_elseif_stmt(Json *alts, Json *cond, Json *stmt_list) {
 
 Json*
 mk_assign_stmt(Json *left, Json *right) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "assign_stmt");
     Json_add_object_to_object(node, "left", left);
     Json_add_object_to_object(node, "right", right);
@@ -251,7 +280,7 @@ mk_assign_stmt(Json *left, Json *right) {
 
 Json*
 mk_loop_stmt(Json *init_stmt_list, Json *cond, Json *body_stmt_list) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "loop_stmt");
     Json_add_array_to_object(node, "init", init_stmt_list);
     Json_add_object_to_object(node, "cond", cond);
@@ -261,7 +290,7 @@ mk_loop_stmt(Json *init_stmt_list, Json *cond, Json *body_stmt_list) {
 
 Json*
 mk_inspect_stmt(Json *expr, Json *when_clauses, Json *else_stmt_list) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "inspect_stmt");
     Json_add_object_to_object(node, "expr", expr);
     Json_add_array_to_object(node, "when_clauses", when_clauses);
@@ -271,7 +300,7 @@ mk_inspect_stmt(Json *expr, Json *when_clauses, Json *else_stmt_list) {
 
 Json*
 add_alt_when_clause(Json *when_clauses, Json *choices, Json *body) {
-    Json *when_stmt = Json_new();
+    Json *when_stmt = mk_node();
     add_type_to_node(when_stmt, "when_clause");
     Json_add_array_to_object(when_stmt, "choices", choices);
     Json_add_array_to_object(when_stmt, "body", body);
@@ -281,7 +310,7 @@ add_alt_when_clause(Json *when_clauses, Json *choices, Json *body) {
 
 Json*
 mk_choice_interval(Json *start, Json *end) {
-    Json *node = Json_new();
+    Json *node = mk_node();
     add_type_to_node(node, "choice_interval");
     Json_add_object_to_object(node, "start", start);
     Json_add_object_to_object(node, "end", end);
@@ -290,7 +319,7 @@ mk_choice_interval(Json *start, Json *end) {
 
 Json*
 mk_type(char *type_name) {
-    Json *user_type = Json_new();
+    Json *user_type = mk_node();
     add_type_to_node(user_type, "type_spec");
     Json_add_string_to_object(user_type, "type_name", type_name);
     return user_type;
@@ -323,7 +352,7 @@ mk_boolean_type() {
 
 Json*
 mk_like_type(Json *like_what) {
-    Json *type_spec_like = Json_new();
+    Json *type_spec_like = mk_node();
     add_type_to_node(type_spec_like, "type_spec_like");
     Json_add_object_to_object(type_spec_like, "like_what", like_what);
     return type_spec_like;
@@ -341,7 +370,7 @@ mk_like_other_field_type(char *field_name) {
 
 Json*
 mk_generic_user_type(char *type_name, Json *type_list) {
-    Json *generic_type_spec = Json_new();
+    Json *generic_type_spec = mk_node();
     add_type_to_node(generic_type_spec, "generic_type_spec");
     Json_add_string_to_object(generic_type_spec, "type_name", type_name);
     Json_add_array_to_object(generic_type_spec, "type_list", type_list);
@@ -360,7 +389,7 @@ mk_generic_tuple_type(Json *type_list) {
 
 Json*
 mk_class_decl(Json *header, Json *inheritance, Json *creators, Json *features) {
-    Json *class_decl = Json_new();
+    Json *class_decl = mk_node();
 
     add_type_to_node(class_decl, "class_decl");
     Json_add_object_to_object(class_decl, "header", header);
@@ -373,7 +402,7 @@ mk_class_decl(Json *header, Json *inheritance, Json *creators, Json *features) {
 
 Json*
 mk_class_header(char *class_name, Json *generics_list, bool is_deferred) {
-    Json *class_header = Json_new();
+    Json *class_header = mk_node();
 
     Json_add_string_to_object(class_header, "name", class_name);
     Json_add_bool_to_object(class_header, "is_deferred", is_deferred);
@@ -384,7 +413,7 @@ mk_class_header(char *class_name, Json *generics_list, bool is_deferred) {
 
 Json*
 mk_parent_info(char *parent_class_name, Json *generics_list) {
-    Json *class_header = Json_new();
+    Json *class_header = mk_node();
 
     Json_add_string_to_object(class_header, "name", parent_class_name);
     Json_add_array_to_object(class_header, "generics", generics_list);
@@ -404,7 +433,7 @@ mk_deferred_class_header(char *class_name, Json *generics_list) {
 
 Json*
 mk_constrained_generic(Json *generic_type, Json *parent) {
-    Json *constrained_generic = Json_new();
+    Json *constrained_generic = mk_node();
 
     add_type_to_node(constrained_generic, "generic");
     Json_add_object_to_object(constrained_generic, "generic_type", generic_type);
@@ -424,7 +453,7 @@ mk_generic(Json *generic_type) {
 
 Json*
 mk_inherit_clause(Json *parent, Json *rename_clause, Json *undefine_clause, Json *redefine_clause, Json *select_clause) {
-    Json *inherit_clause = Json_new();
+    Json *inherit_clause = mk_node();
 
     add_type_to_node(inherit_clause, "parent");
     Json_add_object_to_object(inherit_clause, "parent_header", parent);
@@ -438,7 +467,7 @@ mk_inherit_clause(Json *parent, Json *rename_clause, Json *undefine_clause, Json
 
 Json*
 mk_alias(char *original_name, char *alias_name) {
-    Json *alias = Json_new();
+    Json *alias = mk_node();
 
     add_type_to_node(alias, "alias");
     Json_add_string_to_object(alias, "original_name", original_name);
@@ -449,7 +478,7 @@ mk_alias(char *original_name, char *alias_name) {
 
 Json*
 mk_feature_clause(Json *clients, Json *feature_list) {
-    Json *feature_clause = Json_new();
+    Json *feature_clause = mk_node();
 
     add_type_to_node(feature_clause, "feature_clause");
     Json_add_array_to_object(feature_clause, "clients", clients);
@@ -460,7 +489,7 @@ mk_feature_clause(Json *clients, Json *feature_list) {
 
 Json*
 mk_class_field(Json *name_and_type) {
-    Json *class_field = Json_new();
+    Json *class_field = mk_node();
 
     add_type_to_node(class_field, "class_field");
     Json_add_object_to_object(class_field, "name_and_type", name_and_type);
@@ -470,7 +499,7 @@ mk_class_field(Json *name_and_type) {
 
 Json*
 mk_class_constant(Json *name_and_type, Json *constant) {
-    Json *class_constant = Json_new();
+    Json *class_constant = mk_node();
 
     add_type_to_node(class_constant, "class_constant");
     Json_add_object_to_object(class_constant, "name_and_type", name_and_type);
@@ -481,7 +510,7 @@ mk_class_constant(Json *name_and_type, Json *constant) {
 
 Json*
 mk_name_and_type(Json *names, Json *type_spec) {
-    Json *name_and_type = Json_new();
+    Json *name_and_type = mk_node();
 
     Json_add_object_to_object(name_and_type, "field_type", type_spec);
     Json_add_array_to_object(name_and_type, "names", names);
@@ -491,7 +520,7 @@ mk_name_and_type(Json *names, Json *type_spec) {
 
 Json*
 mk_local_var_decl(Json *name_and_type) {
-    Json *var_decl = Json_new();
+    Json *var_decl = mk_node();
 
     add_type_to_node(var_decl, "var_decl");
     Json_add_object_to_object(var_decl, "name_and_type", name_and_type);
@@ -501,7 +530,7 @@ mk_local_var_decl(Json *name_and_type) {
 
 Json*
 mk_routine_with_args(Json *names, Json *params_list, Json *return_type, Json *routine_body) {
-    Json *routine = Json_new();
+    Json *routine = mk_node();
 
     add_type_to_node(routine, "class_routine");
     Json *name_and_type = mk_name_and_type(names, return_type);
@@ -524,7 +553,7 @@ mk_void_routine_with_no_args(Json *names, Json *routine_body) {
 
 Json*
 mk_routine_with_no_args(Json *name_and_type, Json *routine_body) {
-    Json *routine = Json_new();
+    Json *routine = mk_node();
 
     add_type_to_node(routine, "class_routine");
     Json_add_object_to_object(routine, "name_and_type", name_and_type);
@@ -534,9 +563,28 @@ mk_routine_with_no_args(Json *name_and_type, Json *routine_body) {
     return routine;
 }
 
+/**
+ * Создает узел интерфейса подпрограммы: тела без локальных переменных,
+ * инструкций и контрактов (см. ParserContext.interface_only)
+ */
+static Json*
+mk_routine_interface(bool is_deferred) {
+    Json *routine_interface = mk_node();
+
+    add_type_to_node(routine_interface, "routine_interface");
+    Json_add_bool_to_object(routine_interface, "is_deferred", is_deferred);
+
+    return routine_interface;
+}
+
 Json*
 mk_routine_body(bool is_deferred, Json *local, Json *require, Json *do_clause, Json *then, Json *ensure) {
-    Json *routine_body = Json_new();
+    // Дерево строится снизу вверх, поэтому узлы тела к этому моменту уже
+    // созданы; в режиме интерфейса они остаются в арене и не выводятся
+    if (active_context->interface_only)
+        return mk_routine_interface(is_deferred);
+
+    Json *routine_body = mk_node();
 
     add_type_to_node(routine_body, "routine_body");
     Json_add_bool_to_object(routine_body, "is_deferred", is_deferred);
@@ -564,7 +612,7 @@ mk_deferred_routine_body(Json *require, Json *ensure) {
 
 Json*
 mk_tagged_cond(char *tag, Json *cond) {
-    Json *tagged_cond = Json_new();
+    Json *tagged_cond = mk_node();
 
     add_type_to_node(tagged_cond, "tagged_cond");
 
@@ -580,7 +628,7 @@ mk_tagged_cond(char *tag, Json *cond) {
 
 Json*
 mk_manifest_array(Json *manifest_array_content) {
-    Json *manifest_array = Json_new();
+    Json *manifest_array = mk_node();
 
     add_type_to_node(manifest_array, "manifest_array");
     Json_add_array_to_object(manifest_array, "content", manifest_array_content);
@@ -590,7 +638,7 @@ mk_manifest_array(Json *manifest_array_content) {
 
 Json*
 mk_manifest_tuple(Json *manifest_tuple_content) {
-    Json *manifest_tuple = Json_new();
+    Json *manifest_tuple = mk_node();
 
     add_type_to_node(manifest_tuple, "manifest_tuple");
     Json_add_array_to_object(manifest_tuple, "content", manifest_tuple_content);
@@ -600,7 +648,7 @@ mk_manifest_tuple(Json *manifest_tuple_content) {
 
 Json*
 mk_create(char *type_name, Json *constructor_call) {
-    Json *create = Json_new();
+    Json *create = mk_node();
 
     add_type_to_node(create, "create_stmt");
     
@@ -616,7 +664,7 @@ mk_create(char *type_name, Json *constructor_call) {
 
 Json*
 mk_create_expr(char *type_name, Json *constructor_call) {
-    Json *create_expr = Json_new();
+    Json *create_expr = mk_node();
 
     add_type_to_node(create_expr, "create_expr");
     Json_add_string_to_object(create_expr, "type_name", type_name);
@@ -627,7 +675,7 @@ mk_create_expr(char *type_name, Json *constructor_call) {
 
 Json*
 mk_feature_parameter(Json *name_and_type) {
-    Json *parameter = Json_new();
+    Json *parameter = mk_node();
 
     add_type_to_node(parameter, "parameter");
     Json_add_object_to_object(parameter, "name_and_type", name_and_type);
@@ -637,20 +685,26 @@ mk_feature_parameter(Json *name_and_type) {
 
 Json*
 mk_external_routine_body(char *language_name, char *external_routine_name, Json *require, Json *ensure) {
-    Json *external_routine_body = Json_new();
+    Json *external_routine_body = mk_node();
 
     add_type_to_node(external_routine_body, "external_routine_body");
     Json_add_string_to_object(external_routine_body, "language", language_name);
     Json_add_string_to_object(external_routine_body, "alias", external_routine_name);
-    Json_add_array_to_object(external_routine_body, "require", require == NULL ? mk_list() : require);
-    Json_add_array_to_object(external_routine_body, "ensure", ensure == NULL ? mk_list() : ensure);
+
+    // В режиме интерфейса контракты не выводятся (см. mk_routine_body)
+    if (require == NULL || active_context->interface_only)
+        require = mk_list();
+    if (ensure == NULL || active_context->interface_only)
+        ensure = mk_list();
+    Json_add_array_to_object(external_routine_body, "require", require);
+    Json_add_array_to_object(external_routine_body, "ensure", ensure);
 
     return external_routine_body;
 }
 
 Json*
 mk_constructor_call(char *object_name, Json *call) {
-    Json *constructor = Json_new();
+    Json *constructor = mk_node();
 
     add_type_to_node(constructor, "constructor_call");
     Json_add_string_to_object(constructor, "object", object_name);
@@ -0,0 +1,288 @@
+#include <stdint.h>
+
+#include "./include/binary.h"
+
+enum {
+    TAG_NULL,
+    TAG_FALSE,
+    TAG_TRUE,
+    TAG_INT,
+    TAG_DOUBLE,
+    TAG_STRING,
+    TAG_ARRAY,
+    TAG_OBJECT,
+    TAG_NODE
+};
+
+/**
+ * Таблица строк: каждой уникальной строке сопоставляется ее индекс
+ * в порядке добавления. Для поиска используется хеш-таблица
+ * с открытой адресацией.
+ */
+typedef struct StringTable {
+    char **strings;
+    int count;
+    int cap;
+
+    /**
+     * Индекс строки + 1 (0 - пустая ячейка)
+     */
+    int *slots;
+    int slots_count;
+} StringTable;
+
+static uint32_t
+_hash(const char *str) {
+    // FNV-1a
+    uint32_t hash = 2166136261u;
+    for (; *str != '\0'; str++) {
+        hash ^= (unsigned char) *str;
+        hash *= 16777619u;
+    }
+    return hash;
+}
+
+static void
+_StringTable_init(StringTable *table) {
+    table->count = 0;
+    table->cap = 64;
+    table->strings = (char**) malloc(table->cap * sizeof(char*));
+    table->slots_count = 128;
+    table->slots = (int*) calloc(table->slots_count, sizeof(int));
+}
+
+static void
+_StringTable_free(StringTable *table) {
+    free(table->strings);
+    free(table->slots);
+}
+
+static int*
+_StringTable_slot(StringTable *table, const char *str) {
+    uint32_t mask = table->slots_count - 1;
+    uint32_t i = _hash(str) & mask;
+    while (table->slots[i] != 0 && strcmp(table->strings[table->slots[i] - 1], str) != 0)
+        i = (i + 1) & mask;
+    return &table->slots[i];
+}
+
+static void
+_StringTable_grow(StringTable *table) {
+    free(table->slots);
+    table->slots_count *= 2;
+    table->slots = (int*) calloc(table->slots_count, sizeof(int));
+    for (int i = 0; i < table->count; i++)
+        *_StringTable_slot(table, table->strings[i]) = i + 1;
+}
+
+/**
+ * Возвращает индекс строки в таблице, добавляя строку, если ее там еще нет
+ */
+static int
+_StringTable_intern(StringTable *table, char *str) {
+    int *slot = _StringTable_slot(table, str);
+    if (*slot != 0)
+        return *slot - 1;
+
+    if (table->count == table->cap) {
+        table->cap *= 2;
+        table->strings = (char**) realloc(table->strings, table->cap * sizeof(char*));
+    }
+    table->strings[table->count++] = str;
+    *slot = table->count;
+
+    if (table->count * 2 > table->slots_count)
+        _StringTable_grow(table);
+
+    return table->count - 1;
+}
+
+static void
+_intern_strings(StringTable *table, Json *json) {
+    for (Field *field = json->first; field != NULL; field = field->next_field) {
+        if (field->field_name != NULL)
+            _StringTable_intern(table, field->field_name);
+
+        switch (field->value_type) {
+            case JSON_STRING:
+                _StringTable_intern(table, field->str_value);
+                break;
+            case JSON_OBJECT:
+            case JSON_ARRAY:
+                _intern_strings(table, field->object_or_array);
+                break;
+            default:
+                break;
+        }
+    }
+}
+
+static void
+_write_varint(FILE *stream, uint64_t value) {
+    while (value >= 0x80) {
+        fputc((int) (value & 0x7F) | 0x80, stream);
+        value >>= 7;
+    }
+    fputc((int) value, stream);
+}
+
+static void
+_write_string_index(FILE *stream, StringTable *table, char *str) {
+    _write_varint(stream, _StringTable_intern(table, str));
+}
+
+static int
+_fields_count(Json *json) {
+    int count = 0;
+    for (Field *field = json->first; field != NULL; field = field->next_field)
+        count++;
+    return count;
+}
+
+static bool
+_has_name(Field *field, const char *name, JsonValueType value_type) {
+    return field != NULL
+        && field->field_name != NULL
+        && field->value_type == value_type
+        && strcmp(field->field_name, name) == 0;
+}
+
+/**
+ * Проверяет, что объект является узлом дерева: его первое поле - "type",
+ * второе - "location" с позицией узла (см. mk_current_loc_info в ast.c)
+ */
+static bool
+_is_node(Json *object) {
+    Field *type = object->first;
+    if (!_has_name(type, "type", JSON_STRING))
+        return false;
+
+    Field *location = type->next_field;
+    if (!_has_name(location, "location", JSON_OBJECT))
+        return false;
+
+    Field *field = location->object_or_array->first;
+    const char *int_fields[] = {"first_line", "first_column", "last_line", "last_column"};
+    for (int i = 0; i < 4; i++, field = field->next_field)
+        if (!_has_name(field, int_fields[i], JSON_INT))
+            return false;
+
+    return (_has_name(field, "filename", JSON_STRING) || _has_name(field, "filename", JSON_NULL))
+        && field->next_field == NULL;
+}
+
+static void _write_value(FILE *stream, StringTable *table, JsonValueType value_type, Field *field);
+
+static void
+_write_fields(FILE *stream, StringTable *table, Field *first) {
+    int count = 0;
+    for (Field *field = first; field != NULL; field = field->next_field)
+        count++;
+
+    _write_varint(stream, count);
+    for (Field *field = first; field != NULL; field = field->next_field) {
+        _write_string_index(stream, table, field->field_name);
+        _write_value(stream, table, field->value_type, field);
+    }
+}
+
+static void
+_write_node(FILE *stream, StringTable *table, Json *node) {
+    Field *type = node->first;
+    Field *location = type->next_field;
+
+    fputc(TAG_NODE, stream);
+    _write_string_index(stream, table, type->str_value);
+
+    Field *field = location->object_or_array->first;
+    for (int i = 0; i < 4; i++, field = field->next_field)
+        _write_varint(stream, field->int_value);
+
+    if (field->value_type == JSON_NULL)
+        _write_varint(stream, 0);
+    else
+        _write_varint(stream, _StringTable_intern(table, field->str_value) + 1);
+
+    _write_fields(stream, table, location->next_field);
+}
+
+static void
+_write_value(FILE *stream, StringTable *table, JsonValueType value_type, Field *field) {
+    switch (value_type) {
+        case JSON_NULL:
+            fputc(TAG_NULL, stream);
+            break;
+        case JSON_BOOL:
+            fputc(field->bool_value ? TAG_TRUE : TAG_FALSE, stream);
+            break;
+        case JSON_INT:
+            fputc(TAG_INT, stream);
+            // zigzag-кодирование, чтобы отрицательные числа занимали мало байт
+            int64_t value = field->int_value;
+            _write_varint(stream, (uint64_t) ((value << 1) ^ (value >> 63)));
+            break;
+        case JSON_DOUBLE:
+            fputc(TAG_DOUBLE, stream);
+            unsigned char bytes[sizeof(double)];
+            memcpy(bytes, &field->double_value, sizeof(double));
+            // Числа записываются в little-endian
+            #if __BYTE_ORDER__ == __ORDER_BIG_ENDIAN__
+                for (int i = sizeof(double) - 1; i >= 0; i--)
+                    fputc(bytes[i], stream);
+            #else
+                fwrite(bytes, 1, sizeof(double), stream);
+            #endif
+            break;
+        case JSON_STRING:
+            fputc(TAG_STRING, stream);
+            _write_string_index(stream, table, field->str_value);
+            break;
+        case JSON_ARRAY:
+            fputc(TAG_ARRAY, stream);
+            Json *array = field->object_or_array;
+            _write_varint(stream, _fields_count(array));
+            for (Field *element = array->first; element != NULL; element = element->next_field)
+                _write_value(stream, table, element->value_type, element);
+            break;
+        case JSON_OBJECT: {
+            Json *object = field->object_or_array;
+            if (_is_node(object)) {
+                _write_node(stream, table, object);
+            }
+            else {
+                fputc(TAG_OBJECT, stream);
+                _write_fields(stream, table, object->first);
+            }
+            break;
+        }
+    }
+}
+
+void
+Json_write_binary(FILE *stream, Json *json) {
+    StringTable table;
+    _StringTable_init(&table);
+    _intern_strings(&table, json);
+
+    fputs("EIFB", stream);
+    fputc(BINARY_AST_VERSION, stream);
+
+    size_t strings_size = 0;
+    for (int i = 0; i < table.count; i++)
+        strings_size += strlen(table.strings[i]) + 1;
+
+    _write_varint(stream, table.count);
+    _write_varint(stream, strings_size);
+    for (int i = 0; i < table.count; i++)
+        fwrite(table.strings[i], 1, strlen(table.strings[i]) + 1, stream);
+
+    Field root = {
+        .value_type = Json_is_array(json) ? JSON_ARRAY : JSON_OBJECT,
+        .field_name = NULL,
+        .object_or_array = json,
+        .next_field = NULL,
+    };
+    _write_value(stream, &table, root.value_type, &root);
+
+    _StringTable_free(&table);
+}
@@ -0,0 +1,542 @@
+/**
+ * Декодер компактного двоичного формата дерева разбора (см. include/binary.h)
+ * в объекты Python.
+ *
+ * Входит только в разделяемую библиотеку парсера (см. цель shared
+ * в Makefile) и вызывается из Python через ctypes.PyDLL, то есть
+ * с удерживаемым GIL (см. SharedParser.decode_binary
+ * в serpent/parser_adapter.py). Используется только стабильный ABI
+ * Python, поэтому библиотека не зависит от минорной версии интерпретатора.
+ */
+#define PY_SSIZE_T_CLEAN
+#define Py_LIMITED_API 0x030A0000
+#include <Python.h>
+
+#include <stdint.h>
+#include <string.h>
+
+#include "./include/binary.h"
+
+// Обычная раскладка позиции (см. Location в serpent/tree/abstract_node.py)
+#define LOCATION_COMPONENT_BITS 18
+#define LOCATION_COMPONENT_MASK ((1ULL << LOCATION_COMPONENT_BITS) - 1)
+#define LOCATION_FILE_BITS 16
+// first_line и first_column упаковываются отдельно от младших полей,
+// так как вместе все поля не помещаются в 64 бита
+#define LOCATION_LOW_BITS (2 * LOCATION_COMPONENT_BITS + LOCATION_FILE_BITS + 1)
+#define LOCATION_MAX_FIRST_LINE (1ULL << (63 - LOCATION_COMPONENT_BITS))
+
+// Номер файла позиции еще не известен или не помещается в обычную раскладку
+#define FILE_ID_UNKNOWN -2
+#define FILE_ID_WIDE -1
+
+enum {
+    TAG_NULL = 0,
+    TAG_FALSE = 1,
+    TAG_TRUE = 2,
+    TAG_INT = 3,
+    TAG_DOUBLE = 4,
+    TAG_STRING = 5,
+    TAG_ARRAY = 6,
+    TAG_OBJECT = 7,
+    TAG_NODE = 8,
+};
+
+typedef struct {
+    const unsigned char *pos;
+    const unsigned char *end;
+
+    // Строки таблицы строк, декодированные по одному разу
+    PyObject **strings;
+    size_t strings_count;
+
+    // Позиции, уже созданные при декодировании: ключ - байты позиции
+    // в двоичном формате, поэтому одинаковые позиции разделяют один объект
+    PyObject *locations;
+
+    PyObject *location_type;
+    // Позиции в обычной раскладке создаются без вызова конструктора:
+    // декодер сам упаковывает поля и записывает их в слот _packed
+    allocfunc location_alloc;
+    PyObject *packed_key;
+    // Номера файлов в таблице Location для индексов имен файлов
+    long long *file_ids;
+
+    PyObject *object_hook;
+    PyObject *error_type;
+
+    PyObject *type_key;
+    PyObject *location_key;
+} Decoder;
+
+static PyObject *
+decode_value(Decoder *decoder);
+
+static int
+fail(Decoder *decoder, const char *message) {
+    PyErr_SetString(decoder->error_type, message);
+    return 0;
+}
+
+static int
+read_varint(Decoder *decoder, uint64_t *result) {
+    uint64_t value = 0;
+    unsigned shift = 0;
+    while (decoder->pos < decoder->end) {
+        unsigned char byte = *decoder->pos++;
+        if (shift < 64)
+            value |= (uint64_t) (byte & 0x7F) << shift;
+        if (byte < 0x80) {
+            *result = value;
+            return 1;
+        }
+        shift += 7;
+    }
+    return fail(decoder, "Unexpected end of binary AST");
+}
+
+static PyObject *
+read_string(Decoder *decoder) {
+    uint64_t index;
+    if (!read_varint(decoder, &index))
+        return NULL;
+    if (index >= decoder->strings_count) {
+        fail(decoder, "String index is out of range");
+        return NULL;
+    }
+    PyObject *string = decoder->strings[index];
+    Py_INCREF(string);
+    return string;
+}
+
+static PyObject *
+read_string_table(Decoder *decoder, PyObject *unescape) {
+    uint64_t count, size;
+    if (!read_varint(decoder, &count) || !read_varint(decoder, &size))
+        return NULL;
+    if (size > (uint64_t) (decoder->end - decoder->pos) || count > size) {
+        fail(decoder, "Unexpected end of binary AST");
+        return NULL;
+    }
+
+    PyObject *strings = PyList_New((Py_ssize_t) count);
+    if (strings == NULL)
+        return NULL;
+
+    const char *blob = (const char *) decoder->pos;
+    const char *blob_end = blob + size;
+    for (uint64_t i = 0; i < count; i++) {
+        const char *terminator = memchr(blob, '\0', blob_end - blob);
+        if (terminator == NULL) {
+            fail(decoder, "Unterminated string in binary AST");
+            Py_DECREF(strings);
+            return NULL;
+        }
+
+        PyObject *string = PyUnicode_DecodeUTF8(blob, terminator - blob, NULL);
+        // Парсер хранит строки в том же экранированном виде,
+        // в котором они попадают в JSON
+        if (string != NULL && memchr(blob, '\\', terminator - blob) != NULL) {
+            PyObject *unescaped = PyObject_CallFunctionObjArgs(unescape, string, NULL);
+            Py_DECREF(string);
+            string = unescaped;
+        }
+        if (string == NULL) {
+            Py_DECREF(strings);
+            return NULL;
+        }
+        PyUnicode_InternInPlace(&string);
+        PyList_SetItem(strings, (Py_ssize_t) i, string);
+        blob = terminator + 1;
+    }
+
+    decoder->pos += size;
+    return strings;
+}
+
+static PyObject *
+filename_at(Decoder *decoder, uint64_t index) {
+    return index == 0 ? Py_None : decoder->strings[index - 1];
+}
+
+static long long
+file_id(Decoder *decoder, uint64_t index) {
+    if (decoder->file_ids[index] != FILE_ID_UNKNOWN)
+        return decoder->file_ids[index];
+
+    // Номер файла регистрирует сам Location: декодер узнает его
+    // из упакованной позиции с нулевыми остальными полями
+    PyObject *probe = PyObject_CallFunction(
+        decoder->location_type, "iiiiO", 0, 0, 0, 0, filename_at(decoder, index));
+    if (probe == NULL)
+        return FILE_ID_UNKNOWN;
+    PyObject *packed = PyObject_GetAttr(probe, decoder->packed_key);
+    Py_DECREF(probe);
+    if (packed == NULL)
+        return FILE_ID_UNKNOWN;
+
+    unsigned long long value = PyLong_AsUnsignedLongLong(packed);
+    Py_DECREF(packed);
+    if (PyErr_Occurred()) {
+        // Широкая раскладка отрицательным не бывает, но может
+        // не поместиться в 64 бита
+        if (!PyErr_ExceptionMatches(PyExc_OverflowError))
+            return FILE_ID_UNKNOWN;
+        PyErr_Clear();
+        value = 1;
+    }
+    decoder->file_ids[index] = value & 1 ? FILE_ID_WIDE : (long long) (value >> 1);
+    return decoder->file_ids[index];
+}
+
+static PyObject *
+pack_location(uint64_t first_line, uint64_t first_column, uint64_t line_count,
+              uint64_t last_column, long long file_id) {
+    uint64_t low = (((line_count << LOCATION_COMPONENT_BITS | last_column)
+                     << LOCATION_FILE_BITS | (uint64_t) file_id) << 1);
+    uint64_t high = first_line << LOCATION_COMPONENT_BITS | first_column;
+    if (high == 0)
+        return PyLong_FromUnsignedLongLong(low);
+
+    PyObject *result = NULL;
+    PyObject *high_number = PyLong_FromUnsignedLongLong(high);
+    PyObject *shift = PyLong_FromLong(LOCATION_LOW_BITS);
+    PyObject *low_number = PyLong_FromUnsignedLongLong(low);
+    if (high_number != NULL && shift != NULL && low_number != NULL) {
+        PyObject *shifted = PyNumber_Lshift(high_number, shift);
+        if (shifted != NULL) {
+            result = PyNumber_Or(shifted, low_number);
+            Py_DECREF(shifted);
+        }
+    }
+    Py_XDECREF(high_number);
+    Py_XDECREF(shift);
+    Py_XDECREF(low_number);
+    return result;
+}
+
+static PyObject *
+make_location(Decoder *decoder, const uint64_t fields[5]) {
+    uint64_t first_line = fields[0], first_column = fields[1];
+    uint64_t last_line = fields[2], last_column = fields[3];
+
+    if (decoder->location_alloc != NULL
+            && last_line >= first_line
+            && first_line < LOCATION_MAX_FIRST_LINE
+            && first_column <= LOCATION_COMPONENT_MASK
+            && last_line - first_line <= LOCATION_COMPONENT_MASK
+            && last_column <= LOCATION_COMPONENT_MASK) {
+        long long id = file_id(decoder, fields[4]);
+        if (id == FILE_ID_UNKNOWN)
+            return NULL;
+        if (id != FILE_ID_WIDE) {
+            PyObject *packed = pack_location(
+                first_line, first_column, last_line - first_line, last_column, id);
+            if (packed == NULL)
+                return NULL;
+            PyObject *location = decoder->location_alloc(
+                (PyTypeObject *) decoder->location_type, 0);
+            if (location == NULL
+                    || PyObject_SetAttr(location, decoder->packed_key, packed) < 0) {
+                Py_XDECREF(location);
+                location = NULL;
+            }
+            Py_DECREF(packed);
+            return location;
+        }
+    }
+
+    return PyObject_CallFunction(
+        decoder->location_type, "KKKKO",
+        (unsigned long long) first_line,
+        (unsigned long long) first_column,
+        (unsigned long long) last_line,
+        (unsigned long long) last_column,
+        filename_at(decoder, fields[4]));
+}
+
+static PyObject *
+decode_location(Decoder *decoder) {
+    const unsigned char *start = decoder->pos;
+    uint64_t fields[5];
+    for (int i = 0; i < 5; i++)
+        if (!read_varint(decoder, &fields[i]))
+            return NULL;
+    if (fields[4] > decoder->strings_count) {
+        fail(decoder, "String index is out of range");
+        return NULL;
+    }
+
+    PyObject *key = PyBytes_FromStringAndSize(
+        (const char *) start, decoder->pos - start);
+    if (key == NULL)
+        return NULL;
+
+    PyObject *location = PyDict_GetItemWithError(decoder->locations, key);
+    if (location != NULL) {
+        Py_DECREF(key);
+        Py_INCREF(location);
+        return location;
+    }
+    if (PyErr_Occurred()) {
+        Py_DECREF(key);
+        return NULL;
+    }
+
+    location = make_location(decoder, fields);
+    if (location == NULL || PyDict_SetItem(decoder->locations, key, location) < 0) {
+        Py_DECREF(key);
+        Py_XDECREF(location);
+        return NULL;
+    }
+    Py_DECREF(key);
+    return location;
+}
+
+static PyObject *
+decode_fields(Decoder *decoder, PyObject *object) {
+    uint64_t count;
+    if (!read_varint(decoder, &count))
+        goto error;
+
+    for (uint64_t i = 0; i < count; i++) {
+        PyObject *name = read_string(decoder);
+        if (name == NULL)
+            goto error;
+        PyObject *value = decode_value(decoder);
+        if (value == NULL) {
+            Py_DECREF(name);
+            goto error;
+        }
+        int status = PyDict_SetItem(object, name, value);
+        Py_DECREF(name);
+        Py_DECREF(value);
+        if (status < 0)
+            goto error;
+    }
+
+    if (decoder->object_hook == Py_None)
+        return object;
+    PyObject *result = PyObject_CallFunctionObjArgs(decoder->object_hook, object, NULL);
+    Py_DECREF(object);
+    return result;
+
+error:
+    Py_DECREF(object);
+    return NULL;
+}
+
+static PyObject *
+decode_node(Decoder *decoder) {
+    PyObject *kind = read_string(decoder);
+    if (kind == NULL)
+        return NULL;
+    PyObject *location = decode_location(decoder);
+    if (location == NULL) {
+        Py_DECREF(kind);
+        return NULL;
+    }
+
+    PyObject *object = PyDict_New();
+    int status = object == NULL ? -1 : 0;
+    if (status == 0)
+        status = PyDict_SetItem(object, decoder->type_key, kind);
+    if (status == 0)
+        status = PyDict_SetItem(object, decoder->location_key, location);
+    Py_DECREF(kind);
+    Py_DECREF(location);
+    if (status < 0) {
+        Py_XDECREF(object);
+        return NULL;
+    }
+    return decode_fields(decoder, object);
+}
+
+static PyObject *
+decode_array(Decoder *decoder) {
+    uint64_t count;
+    if (!read_varint(decoder, &count))
+        return NULL;
+    // Каждый элемент занимает хотя бы один байт
+    if (count > (uint64_t) (decoder->end - decoder->pos)) {
+        fail(decoder, "Unexpected end of binary AST");
+        return NULL;
+    }
+
+    PyObject *array = PyList_New((Py_ssize_t) count);
+    if (array == NULL)
+        return NULL;
+    for (uint64_t i = 0; i < count; i++) {
+        PyObject *item = decode_value(decoder);
+        if (item == NULL) {
+            Py_DECREF(array);
+            return NULL;
+        }
+        PyList_SetItem(array, (Py_ssize_t) i, item);
+    }
+    return array;
+}
+
+static PyObject *
+decode_double(Decoder *decoder) {
+    unsigned char bytes[sizeof(double)];
+    if (decoder->end - decoder->pos < (ptrdiff_t) sizeof(double)) {
+        fail(decoder, "Unexpected end of binary AST");
+        return NULL;
+    }
+
+    // Число записано в порядке little-endian (см. include/binary.h)
+    uint64_t bits = 0;
+    memcpy(bytes, decoder->pos, sizeof(bytes));
+    for (int i = sizeof(bytes) - 1; i >= 0; i--)
+        bits = (bits << 8) | bytes[i];
+    decoder->pos += sizeof(double);
+
+    double number;
+    memcpy(&number, &bits, sizeof(number));
+    return PyFloat_FromDouble(number);
+}
+
+static PyObject *
+decode_value(Decoder *decoder) {
+    if (decoder->pos >= decoder->end) {
+        fail(decoder, "Unexpected end of binary AST");
+        return NULL;
+    }
+    if (Py_EnterRecursiveCall(" while decoding binary AST"))
+        return NULL;
+
+    PyObject *result = NULL;
+    uint64_t number;
+    unsigned char tag = *decoder->pos++;
+    switch (tag) {
+        case TAG_NODE:
+            result = decode_node(decoder);
+            break;
+        case TAG_STRING:
+            result = read_string(decoder);
+            break;
+        case TAG_ARRAY:
+            result = decode_array(decoder);
+            break;
+        case TAG_NULL:
+            Py_INCREF(Py_None);
+            result = Py_None;
+            break;
+        case TAG_INT:
+            if (read_varint(decoder, &number))
+                result = PyLong_FromLongLong(
+                    (long long) (number >> 1) ^ -(long long) (number & 1));
+            break;
+        case TAG_FALSE:
+            Py_INCREF(Py_False);
+            result = Py_False;
+            break;
+        case TAG_TRUE:
+            Py_INCREF(Py_True);
+            result = Py_True;
+            break;
+        case TAG_DOUBLE:
+            result = decode_double(decoder);
+            break;
+        case TAG_OBJECT: {
+            PyObject *object = PyDict_New();
+            if (object != NULL)
+                result = decode_fields(decoder, object);
+            break;
+        }
+        default:
+            PyErr_Format(decoder->error_type, "Unknown tag %d", tag);
+    }
+
+    Py_LeaveRecursiveCall();
+    return result;
+}
+
+/**
+ * Декодирует дерево разбора из двоичного формата в объекты Python
+ * так же, как decode_binary_ast в serpent/tree/binary.py.
+ * Вызывается только с удерживаемым GIL.
+ *
+ * @param data          дерево разбора в двоичном формате
+ * @param size          размер data в байтах
+ * @param location_type класс позиции узла (вызывается с first_line,
+ *                      first_column, last_line, last_column и именем файла)
+ * @param object_hook   функция, которой передается каждый декодированный
+ *                      объект, либо None
+ * @param unescape      функция, снимающая JSON-экранирование со строки
+ * @param error_type    класс исключения для некорректных данных
+ *
+ * @return корневое значение, либо NULL с установленным исключением
+ */
+PyObject *
+eiffel_decode_binary(
+        const char *data,
+        size_t size,
+        PyObject *location_type,
+        PyObject *object_hook,
+        PyObject *unescape,
+        PyObject *error_type) {
+    Decoder decoder = {
+        .pos = (const unsigned char *) data,
+        .end = (const unsigned char *) data + size,
+        .location_type = location_type,
+        .object_hook = object_hook,
+        .error_type = error_type,
+    };
+
+    if (size < 5 || memcmp(data, "EIFB", 4) != 0) {
+        fail(&decoder, "Not a binary Eiffel AST");
+        return NULL;
+    }
+    if ((unsigned char) data[4] != BINARY_AST_VERSION) {
+        PyErr_Format(
+            error_type, "Unsupported binary AST version %d, expected %d",
+            (unsigned char) data[4], BINARY_AST_VERSION);
+        return NULL;
+    }
+    decoder.pos += 5;
+
+    // Без слота _packed (например, если передан не Location) позиции
+    // создаются вызовом location_type
+    if (PyType_Check(location_type)
+            && PyObject_HasAttrString(location_type, "_packed"))
+        decoder.location_alloc = (allocfunc) PyType_GetSlot(
+            (PyTypeObject *) location_type, Py_tp_alloc);
+
+    PyObject *result = NULL;
+    PyObject *strings = read_string_table(&decoder, unescape);
+    decoder.locations = PyDict_New();
+    decoder.type_key = PyUnicode_InternFromString("type");
+    decoder.location_key = PyUnicode_InternFromString("location");
+    decoder.packed_key = PyUnicode_InternFromString("_packed");
+    if (strings != NULL && decoder.locations != NULL && decoder.type_key != NULL
+            && decoder.location_key != NULL && decoder.packed_key != NULL) {
+        decoder.strings_count = (size_t) PyList_Size(strings);
+        decoder.strings = PyMem_Malloc(
+            (decoder.strings_count + 1) * sizeof(PyObject *));
+        decoder.file_ids = PyMem_Malloc(
+            (decoder.strings_count + 1) * sizeof(long long));
+        if (decoder.strings == NULL || decoder.file_ids == NULL) {
+            PyErr_NoMemory();
+        }
+        else {
+            // Ссылки заимствуются у списка strings, который живет
+            // до конца декодирования
+            for (size_t i = 0; i < decoder.strings_count; i++)
+                decoder.strings[i] = PyList_GetItem(strings, (Py_ssize_t) i);
+            for (size_t i = 0; i <= decoder.strings_count; i++)
+                decoder.file_ids[i] = FILE_ID_UNKNOWN;
+            result = decode_value(&decoder);
+        }
+        PyMem_Free(decoder.strings);
+        PyMem_Free(decoder.file_ids);
+    }
+
+    Py_XDECREF(strings);
+    Py_XDECREF(decoder.locations);
+    Py_XDECREF(decoder.type_key);
+    Py_XDECREF(decoder.location_key);
+    Py_XDECREF(decoder.packed_key);
+    return result;
+}
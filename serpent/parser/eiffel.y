@@ -1,6 +1,121 @@
 %locations
+%define api.pure full
+%parse-param {void *scanner} {ParserContext *context}
+%lex-param {void *scanner}
 
-%{
+%code requires {
+    #include <stdio.h>
+
+    #include "./include/arena.h"
+    #include "./include/json.h"
+    #include "./include/strbuf.h"
+    #include "./include/strlist.h"
+
+    typedef struct ParserContext ParserContext;
+}
+
+%code provides {
+    /**
+     * Состояние одного разбора. Парсер (api.pure) и лексер (reentrant)
+     * не используют глобальных переменных, поэтому несколько разборов
+     * с разными контекстами могут выполняться одновременно в разных потоках.
+     */
+    struct ParserContext {
+        /**
+         * Найденные классы (NULL, если не найдено ни одного
+         * или классы выводятся построчно, см. class_stream)
+         */
+        Json *classes;
+
+        /**
+         * Поток, в который каждый класс выводится сразу после разбора
+         * (см. add_class). NULL, если классы накапливаются в classes
+         */
+        FILE *class_stream;
+
+        /**
+         * Количество синтаксических ошибок
+         */
+        int errors_count;
+
+        /**
+         * Поток, в который выводятся сообщения об ошибках
+         */
+        FILE *errors;
+
+        /**
+         * Имя разбираемого файла, экранированное для записи в JSON
+         * (NULL, если имя неизвестно, см. ParserContext_set_file_path)
+         */
+        char *file_path;
+
+        /**
+         * Нужно ли строить только интерфейс классов: заголовки, наследование,
+         * конструкторы и сигнатуры фич, без тел и контрактов подпрограмм
+         */
+        bool interface_only;
+
+        /**
+         * Нужно ли выводить позиции узлов компактно: массивом [first_line,
+         * first_column, last_line, last_column, индекс имени файла в files]
+         */
+        bool compact_locations;
+
+        /**
+         * Таблица имен файлов, на которые ссылаются компактные позиции
+         * (NULL, пока ни одна позиция не построена)
+         */
+        Json *files;
+
+        /**
+         * Количество имен в таблице files
+         */
+        int files_count;
+
+        /**
+         * Индекс имени разбираемого файла в таблице files
+         * (-1, если оно еще не добавлено в таблицу)
+         */
+        int file_index;
+
+        /**
+         * Арена, из которой выделяются узлы дерева и строки лексем.
+         * Все дерево освобождается сразу, вместе с контекстом
+         */
+        Arena *arena;
+
+        /**
+         * Состояние арены перед разбором очередного класса: при построчном
+         * выводе все, что выделено после отметки, освобождается сразу
+         * после вывода класса
+         */
+        ArenaMark class_mark;
+
+        /**
+         * Позиция узла, который строится в данный момент (см. YYLLOC_DEFAULT)
+         */
+        YYLTYPE node_loc;
+
+        /**
+         * Буферы лексера для сложных лексем (строк, символов, чисел)
+         */
+        StringBuffer *buf;
+        StringList *verbatim_str;
+    };
+
+    /**
+     * Контекст разбора, выполняющегося в текущем потоке. Через него
+     * конструкторы узлов (см. ast.c) получают позицию строящегося узла,
+     * не принимая контекст явно.
+     */
+    extern _Thread_local ParserContext *active_context;
+
+    int ParserContext_file_index(ParserContext *context);
+
+    int yylex(YYSTYPE *yylval, YYLTYPE *yylloc, void *scanner);
+}
+
+%code {
     #include <stdio.h>
     #include <stdbool.h>
     #include <stdlib.h>
@@ -8,20 +123,24 @@
     #include <unistd.h>
 
     #include "./include/ast.h"
+    #include "./include/binary.h"
+    #include "./include/lex_utils.h"
+    #include "./include/parser.h"
+
+    // Функции лексера (lex.yy.c), yyscan_t - void*
+    extern int yylex_init_extra(ParserContext *context, void **scanner);
+    extern int yylex_destroy(void *scanner);
+    extern void yyrestart(FILE *infile, void *scanner);
+    extern void yyset_lineno(int line_number, void *scanner);
+    extern struct yy_buffer_state *yy_scan_bytes(const char *bytes, int length, void *scanner);
+    extern void yy_delete_buffer(struct yy_buffer_state *buffer, void *scanner);
+    void yyerror(YYLTYPE *loc, void *scanner, ParserContext *context, const char *str);
+    void add_class(ParserContext *context, Json *class_decl);
+
+    _Thread_local ParserContext *active_context = NULL;
 
-    extern int yylex(void);
-    extern void yyrestart(FILE *infile);
-    void yyerror(const char *str);
-
-    int errors_count = 0;
-
-    char *current_file_path = NULL;
-    Json *found_classes = NULL;
-
-    #define YYDEBUG 1
     #define LOG_NODE(msg) printf("Found node: %s\n", msg)
 
-    struct YYLTYPE current_node_loc;
     #define YYLLOC_DEFAULT(Current, Rhs, N)\
         do {\
             if (N) {\
@@ -34,11 +153,12 @@
                 (Current).first_line = (Current).last_line = YYRHSLOC (Rhs, 0).last_line;\
                 (Current).first_column = (Current).last_column = YYRHSLOC (Rhs, 0).last_column;\
             }\
-            current_node_loc = (Current);\
+            context->node_loc = (Current);\
         } while (0)
-%}
+}
 
 %define parse.error verbose
+%define parse.trace
 
 %union {
     int int_value;
@@ -204,8 +324,8 @@
 
 /* ********************************************************************/
 /* Описание программы: набор классов */
-class_list: class_declaration { if (found_classes == NULL) found_classes = mk_list(); add_to_list(found_classes, $1); }
-          | class_list class_declaration { add_to_list(found_classes, $2);  }
+class_list: class_declaration { add_class(context, $1); }
+          | class_list class_declaration { add_class(context, $2); }
           ;
 
 class_declaration: class_header inheritance_opt creators_opt features_clause_opt END { $$ = mk_class_decl($1, $2, $3, $4); }
@@ -697,39 +817,196 @@ expr: constant %prec LOWER_THAN_BRACKETS { $$ = $1; }
     ;
 %%
 
-void yyerror(const char *str) {
-    errors_count++;
-    fprintf(stderr, "Parser error, line %d: %s\n", yylloc.first_line, str);
+void yyerror(YYLTYPE *loc, void *scanner, ParserContext *context, const char *str) {
+    context->errors_count++;
+    fprintf(context->errors, "Parser error, line %d: %s\n", loc->first_line, str);
+}
+
+/**
+ * Создает контекст разбора и лексер, связанный с ним.
+ *
+ * @param context   выходной параметр: контекст разбора
+ * @param scanner   выходной параметр: лексер
+ * @param errors    поток, в который выводятся сообщения об ошибках
+ */
+void
+ParserContext_init(ParserContext *context, void **scanner, FILE *errors) {
+    context->classes = NULL;
+    context->class_stream = NULL;
+    context->errors_count = 0;
+    context->errors = errors;
+    context->file_path = NULL;
+    context->interface_only = false;
+    context->compact_locations = false;
+    context->files = NULL;
+    context->files_count = 0;
+    context->file_index = -1;
+    context->arena = Arena_new();
+    context->class_mark = Arena_mark(context->arena);
+    context->buf = StringBuffer_empty();
+    context->verbatim_str = StringList_new();
+    yylex_init_extra(context, scanner);
+}
+
+/**
+ * Освобождает лексер и буферы контекста разбора, а также арену
+ * вместе со всеми найденными классами (context->classes).
+ */
+void
+ParserContext_destroy(ParserContext *context, void *scanner) {
+    yylex_destroy(scanner);
+    StringBuffer_delete(context->buf);
+    StringList_delete(context->verbatim_str);
+    Arena_delete(context->arena);
+}
+
+/**
+ * Задает имя разбираемого файла. Имя экранируется один раз на файл
+ * и хранится в арене, а узлы дерева ссылаются на эту строку.
+ *
+ * @param context   контекст разбора
+ * @param file_path имя файла (NULL, если имя неизвестно)
+ */
+void
+ParserContext_set_file_path(ParserContext *context, const char *file_path) {
+    context->file_index = -1;
+    if (file_path == NULL) {
+        context->file_path = NULL;
+        return;
+    }
+
+    context->file_path = escape_in_arena(context->arena, (char*) file_path);
+    context->class_mark = Arena_mark(context->arena);
+}
+
+/**
+ * Возвращает индекс имени разбираемого файла в таблице имен файлов
+ * (context->files), добавляя его в таблицу при первом обращении.
+ * Используется компактными позициями узлов (см. mk_current_loc_info в ast.c).
+ *
+ * @param context контекст разбора
+ */
+int
+ParserContext_file_index(ParserContext *context) {
+    if (context->file_index < 0) {
+        if (context->files == NULL)
+            context->files = Json_new(context->arena);
+        if (context->file_path == NULL)
+            Json_add_null_to_array(context->files);
+        else
+            Json_add_string_to_array(context->files, context->file_path);
+        context->file_index = context->files_count++;
+    }
+    return context->file_index;
+}
+
+/**
+ * Возвращает таблицу имен файлов для вывода вместе с деревом
+ * (NULL, если позиции узлов не компактные).
+ *
+ * @param context контекст разбора
+ */
+Json*
+ParserContext_file_table(ParserContext *context) {
+    if (!context->compact_locations)
+        return NULL;
+    // Таблица выводится и тогда, когда ни одной позиции нет
+    if (context->files == NULL)
+        context->files = Json_new(context->arena);
+    return context->files;
+}
+
+/**
+ * Добавляет разобранный класс к результату разбора. Если задан поток
+ * context->class_stream, класс сразу выводится в него отдельной строкой
+ * вида {"file": <имя файла>, "class": <класс>} и освобождается.
+ * При компактных позициях у каждой строки своя таблица имен файлов
+ * ("files" перед "file").
+ * После первой синтаксической ошибки классы не выводятся: как и при
+ * обычном выводе, деревья с ошибками не попадают в результат.
+ *
+ * @param context    контекст разбора
+ * @param class_decl узел класса
+ */
+void
+add_class(ParserContext *context, Json *class_decl) {
+    if (context->class_stream == NULL) {
+        if (context->classes == NULL)
+            context->classes = mk_list();
+        add_to_list(context->classes, class_decl);
+        return;
+    }
+
+    if (context->errors_count == 0) {
+        Json *record = Json_new(context->arena);
+        Json *files = ParserContext_file_table(context);
+        if (files != NULL)
+            Json_add_array_to_object(record, "files", files);
+        if (context->file_path == NULL)
+            Json_add_null_to_object(record, "file");
+        else
+            Json_add_string_to_object(record, "file", context->file_path);
+        Json_add_object_to_object(record, "class", class_decl);
+
+        Json_write(context->class_stream, record, 0);
+        fputc('\n', context->class_stream);
+        // Читатель потока обрабатывает классы, не дожидаясь конца разбора
+        fflush(context->class_stream);
+    }
+
+    // После END класса парсер мог прочитать только ключевое слово
+    // (class, deferred) или конец файла, значения которых не хранятся
+    // в арене, поэтому все выделенное после отметки относится к этому классу
+    Arena_release(context->arena, context->class_mark);
+    // Таблица имен файлов выделена после отметки
+    context->files = NULL;
+    context->files_count = 0;
+    context->file_index = -1;
+}
+
+/**
+ * Разбирает текст, поданный лексеру, в заданном контексте.
+ *
+ * @return количество синтаксических ошибок (накопленное в контексте)
+ */
+int
+run_parser(ParserContext *context, void *scanner) {
+    ParserContext *previous_context = active_context;
+    active_context = context;
+    yyparse(scanner, context);
+    active_context = previous_context;
+    return context->errors_count;
 }
 
 /**
- * Переводит абстрактное синтакисеческое дерево в JSON, сохраняя его в файл
+ * Переводит абстрактное синтакисеческое дерево в JSON (либо в компактный
+ * двоичный формат, см. include/binary.h), сохраняя его в файл
  * с заданным названием, либо печатая его на экран.
  *
  * @param file_name имя файла (NULL, если результат нужно напечатать на экран)
  * @param tree абстрактное синтакисеческое дерево
  * @param pretty true, если дерево должно быть красиво отформатированным
+ * @param binary true, если дерево должно быть записано в двоичном формате
  * @return true, если получилось записать в файл или вывести на экран, иначе - false
  */
 bool
-write_output_tree(char *file_name, Json *tree, bool pretty) {
-    char *json = pretty ? Json_to_pretty_string(tree) : Json_to_short_string(tree);
-
-    if (file_name == NULL) {
-        printf(json);
-        free(json);
-        return true;
+write_output_tree(char *file_name, Json *tree, bool pretty, bool binary) {
+    int space_count = pretty ? 4 : 0;
+
+    FILE *output_file = stdout;
+    if (file_name != NULL) {
+        output_file = fopen(file_name, binary ? "wb" : "w");
+        if (output_file == NULL)
+            return false;
     }
 
-    FILE *output_file = fopen(file_name, "w");
-    if (output_file == NULL) {
-        free(json);
-        return false;
-    }
+    if (binary)
+        Json_write_binary(output_file, tree);
+    else
+        Json_write(output_file, tree, space_count);
 
-    fprintf(output_file, json);
-    fclose(output_file);
-    free(json);
+    if (file_name != NULL)
+        fclose(output_file);
 
     return true;
 }
@@ -737,15 +1014,18 @@ write_output_tree(char *file_name, Json *tree, bool pretty) {
 /**
  * Выполняет парсинг файлов. В случае ошибок (невозможности открыть файл),
  * печатает сообщения на экран. Если количество файлов - 0,
- * то выполняется парсинг из stdin.
+ * то выполняется парсинг из stdin. Классы всех файлов накапливаются
+ * в context->classes.
  *
+ * @param context контекст разбора
+ * @param scanner лексер, связанный с контекстом
  * @param files_count количество файлов
  * @param file_names имена файлов
  */
 void
-parse_files(int files_count, char **file_names) {
+parse_files(ParserContext *context, void *scanner, int files_count, char **file_names) {
     if (files_count == 0) {
-        yyparse();
+        run_parser(context, scanner);
         return;
     }
 
@@ -756,53 +1036,273 @@ parse_files(int files_count, char **file_names) {
             continue;
         }
 
-        current_file_path = file_names[i];
-        yyrestart(eiffel_file);
-        yyparse();
+        ParserContext_set_file_path(context, file_names[i]);
+        yyrestart(eiffel_file, scanner);
+        yyset_lineno(1, scanner);
+        run_parser(context, scanner);
+        fclose(eiffel_file);
     }
 }
 
 /**
- * Печатает на экран сообщение о количестве найденных ошибок.
- * 
+ * Печатает сообщение о количестве найденных ошибок.
+ *
+ * @param errors поток для сообщений об ошибках
  * @param errors_count количество случившихся ошибок
  */
 void
-show_parsing_result(int errors_count) {
+show_parsing_result(FILE *errors, int errors_count) {
     if (errors_count == 1)
-        fprintf(stderr, "Failed to parse, got 1 syntax error\n");
+        fprintf(errors, "Failed to parse, got 1 syntax error\n");
     else if (errors_count > 1)
-        fprintf(stderr, "Failed to parse, got %d syntax errors\n", errors_count);
+        fprintf(errors, "Failed to parse, got %d syntax errors\n", errors_count);
+}
+
+int
+eiffel_parse_with_flags(const char *source, size_t length, const char *file_name, int flags, char **output, char **errors) {
+    size_t errors_size;
+    FILE *errors_stream = open_memstream(errors, &errors_size);
+
+    ParserContext context;
+    void *scanner;
+    ParserContext_init(&context, &scanner, errors_stream);
+    ParserContext_set_file_path(&context, file_name);
+    context.interface_only = (flags & EIFFEL_PARSE_INTERFACE) != 0;
+    context.compact_locations = (flags & EIFFEL_PARSE_COMPACT_LOCATIONS) != 0;
+
+    struct yy_buffer_state *buffer = yy_scan_bytes(source, length, scanner);
+    int errors_count = run_parser(&context, scanner);
+    yy_delete_buffer(buffer, scanner);
+
+    show_parsing_result(errors_stream, errors_count);
+
+    if (errors_count == 0)
+        *output = Json_to_short_string(
+            mk_program(context.classes, ParserContext_file_table(&context)));
+    else
+        *output = NULL;
+
+    fclose(errors_stream);
+    ParserContext_destroy(&context, scanner);
+
+    return errors_count;
+}
+
+int
+eiffel_parse(const char *source, size_t length, const char *file_name, char **output, char **errors) {
+    return eiffel_parse_with_flags(source, length, file_name, 0, output, errors);
+}
+
+int
+eiffel_parse_interface(const char *source, size_t length, const char *file_name, char **output, char **errors) {
+    return eiffel_parse_with_flags(source, length, file_name, EIFFEL_PARSE_INTERFACE, output, errors);
+}
+
+void
+eiffel_free(char *str) {
+    free(str);
+}
+
+/**
+ * Читает из потока блок данных, предваренный своей длиной
+ * (4 байта, big-endian). Прочитанный блок дополняется символом '\0'.
+ *
+ * @param input  входной поток
+ * @param data   выходной параметр: прочитанный блок (освобождается вызывающим)
+ * @param length выходной параметр: длина блока в байтах
+ * @return true, если блок прочитан полностью, иначе (конец потока) - false
+ */
+bool
+read_frame(FILE *input, char **data, size_t *length) {
+    unsigned char header[4];
+    if (fread(header, 1, sizeof(header), input) != sizeof(header))
+        return false;
+
+    *length = ((size_t) header[0] << 24) | ((size_t) header[1] << 16)
+            | ((size_t) header[2] << 8) | (size_t) header[3];
+
+    *data = (char*) malloc(*length + 1);
+    if (fread(*data, 1, *length, input) != *length) {
+        free(*data);
+        return false;
+    }
+    (*data)[*length] = '\0';
+
+    return true;
+}
+
+/**
+ * Записывает в поток блок данных, предваряя его длиной
+ * (4 байта, big-endian).
+ *
+ * @param output выходной поток
+ * @param data   блок данных (NULL равносилен пустому блоку)
+ */
+void
+write_frame(FILE *output, const char *data) {
+    size_t length = data == NULL ? 0 : strlen(data);
+    unsigned char header[4] = {
+        (length >> 24) & 0xFF,
+        (length >> 16) & 0xFF,
+        (length >> 8) & 0xFF,
+        length & 0xFF,
+    };
+
+    fwrite(header, 1, sizeof(header), output);
+    if (length > 0)
+        fwrite(data, 1, length, output);
 }
 
+/**
+ * Режим сервера: парсер не завершается после разбора, а обрабатывает
+ * запросы из stdin, пока поток не будет закрыт.
+ * Запрос состоит из двух блоков: имя файла (пустое, если имя неизвестно)
+ * и текст программы. Ответ также состоит из двух блоков: JSON-дерево
+ * (пустое, если при разборе возникли ошибки) и сообщения об ошибках.
+ * Каждый блок предваряется своей длиной (см. read_frame и write_frame).
+ *
+ * @param flags флаги разбора (см. eiffel_parse_with_flags в include/parser.h)
+ */
+void
+serve(int flags) {
+    char *file_name, *source;
+    size_t file_name_length, source_length;
+
+    while (read_frame(stdin, &file_name, &file_name_length)) {
+        if (!read_frame(stdin, &source, &source_length)) {
+            free(file_name);
+            break;
+        }
+
+        char *output, *errors;
+        eiffel_parse_with_flags(
+            source,
+            source_length,
+            file_name_length == 0 ? NULL : file_name,
+            flags,
+            &output,
+            &errors);
+
+        write_frame(stdout, output);
+        write_frame(stdout, errors);
+        fflush(stdout);
+
+        eiffel_free(output);
+        eiffel_free(errors);
+        free(file_name);
+        free(source);
+    }
+}
+
+/**
+ * Параметры запуска парсера
+ */
+typedef struct ParserOptions {
+    /**
+     * Нужно ли красивое форматирование выходного json
+     */
+    bool pretty_json;
+
+    /**
+     * Имя генерируемого файла (NULL, если имя не предоставлено)
+     */
+    char *output_file_name;
+
+    /**
+     * Нужно ли запустить парсер в режиме сервера (см. serve)
+     */
+    bool server_mode;
+
+    /**
+     * Нужно ли вывести дерево в компактном двоичном формате (см. include/binary.h)
+     */
+    bool binary;
+
+    /**
+     * Нужно ли вывести только интерфейс классов, без тел и контрактов
+     * подпрограмм (см. ParserContext.interface_only)
+     */
+    bool interface_only;
+
+    /**
+     * Нужно ли выводить позиции узлов компактно, с таблицей имен файлов
+     * (см. ParserContext.compact_locations)
+     */
+    bool compact_locations;
+
+    /**
+     * Нужно ли выводить каждый класс отдельной строкой сразу после
+     * его разбора (см. add_class)
+     */
+    bool lines;
+
+    /**
+     * Имя файла, указываемое в позициях узлов, когда текст программы
+     * читается из стандартного ввода (NULL, если имя не предоставлено)
+     */
+    char *stdin_file_name;
+} ParserOptions;
+
 /**
  * Обрабатывает аргументы командной строки для парсера.
- * Парсер умеет обрабатывать два аргумента: -o <имя выходного файла> и -p.
+ * Парсер умеет обрабатывать восемь аргументов: -o <имя выходного файла>, -p, -s, -b, -i, -l, -c
+ * и -n <имя файла>.
  * Первый из них указываем имя для выходного json-файла, второй обозначает,
- * что в результате должен быть сгенерирован красиво отформатированный json-файл.
+ * что в результате должен быть сгенерирован красиво отформатированный json-файл,
+ * третий запускает парсер в режиме сервера, четвертый включает вывод дерева
+ * в компактном двоичном формате вместо json, пятый - вывод только интерфейса
+ * классов (без тел и контрактов подпрограмм), шестой - построчный вывод
+ * классов по мере их разбора (JSON Lines, флаги -p и -b при этом
+ * не учитываются), седьмой - компактный вывод позиций узлов: массивами
+ * чисел со ссылкой на таблицу имен файлов (не учитывается вместе с -b,
+ * двоичный формат хранит позиции компактно и так), восьмой - имя файла
+ * для позиций узлов, если текст программы читается из стандартного ввода.
  *
  * @param argv количество аргументов командной строки
  * @param argv список аргументов командной строки
- * @param pretty_json выходной параметр: нужно ли красивое форматирование
- * @param output_file_name выходной параметр: имя генерируемого файла (NULL, если имя не предоставлено)
+ * @param options выходной параметр: параметры запуска парсера
  *
  * @return индекс первого не-опционного аргумента
  */
 int
-process_args(int argc, char **argv, bool *pretty_json, char **output_file_name) {
-    *pretty_json = false;
-    *output_file_name = NULL;
+process_args(int argc, char **argv, ParserOptions *options) {
+    options->pretty_json = false;
+    options->output_file_name = NULL;
+    options->server_mode = false;
+    options->binary = false;
+    options->interface_only = false;
+    options->lines = false;
+    options->compact_locations = false;
+    options->stdin_file_name = NULL;
 
     int opt;
-    while ((opt = getopt(argc, argv, "o:p")) != -1) {
+    while ((opt = getopt(argc, argv, "o:psbilcn:")) != -1) {
         switch (opt) {
             case 'o':
                 if (optarg == NULL)
                     fprintf(stderr, "Parser warning: no output file name provided, waiting for output from stdin");
-                *output_file_name = optarg;
+                options->output_file_name = optarg;
                 break;
             case 'p':
-                *pretty_json = true;
+                options->pretty_json = true;
+                break;
+            case 's':
+                options->server_mode = true;
+                break;
+            case 'b':
+                options->binary = true;
+                break;
+            case 'i':
+                options->interface_only = true;
+                break;
+            case 'l':
+                options->lines = true;
+                break;
+            case 'c':
+                options->compact_locations = true;
+                break;
+            case 'n':
+                options->stdin_file_name = optarg;
                 break;
         }
     }
@@ -810,31 +1310,70 @@ process_args(int argc, char **argv, bool *pretty_json, char **output_file_name)
     return optind;
 }
 
+#ifndef EIFFELP_LIBRARY
 int
 main(int argc, char **argv) {
     #ifdef DEBUG_PARSER
         yydebug = 1;
     #endif
 
-    bool pretty_json;
-    char *output_file_name;
-    int file_start_idx = process_args(argc, argv, &pretty_json, &output_file_name); 
+    ParserOptions options;
+    int file_start_idx = process_args(argc, argv, &options);
 
-    int files_count = argc - file_start_idx;
-    parse_files(files_count, argv + file_start_idx);
+    if (options.server_mode) {
+        int flags = 0;
+        if (options.interface_only)
+            flags |= EIFFEL_PARSE_INTERFACE;
+        if (options.compact_locations)
+            flags |= EIFFEL_PARSE_COMPACT_LOCATIONS;
+        serve(flags);
+        return EXIT_SUCCESS;
+    }
 
-    show_parsing_result(errors_count);
+    ParserContext context;
+    void *scanner;
+    ParserContext_init(&context, &scanner, stderr);
+    context.interface_only = options.interface_only;
+    // Двоичный формат рассчитан на позиции-объекты (см. include/binary.h)
+    context.compact_locations = options.compact_locations
+        && (options.lines || !options.binary);
+
+    if (options.lines) {
+        context.class_stream = stdout;
+        if (options.output_file_name != NULL) {
+            context.class_stream = fopen(options.output_file_name, "w");
+            if (context.class_stream == NULL) {
+                fprintf(stderr, "Failed to open output file");
+                ParserContext_destroy(&context, scanner);
+                return EXIT_FAILURE;
+            }
+        }
+    }
 
-    if (errors_count == 0) {
-        Json *output_tree = mk_program(found_classes);
+    int files_count = argc - file_start_idx;
+    if (files_count == 0)
+        ParserContext_set_file_path(&context, options.stdin_file_name);
+    parse_files(&context, scanner, files_count, argv + file_start_idx);
+
+    show_parsing_result(stderr, context.errors_count);
+
+    int status = EXIT_FAILURE;
+    if (options.lines) {
+        if (context.class_stream != stdout)
+            fclose(context.class_stream);
+        if (context.errors_count == 0)
+            status = EXIT_SUCCESS;
+    }
+    else if (context.errors_count == 0) {
+        Json *output_tree = mk_program(context.classes, ParserContext_file_table(&context));
 
-        if (!write_output_tree(output_file_name, output_tree, pretty_json)) {
+        if (write_output_tree(options.output_file_name, output_tree, options.pretty_json, options.binary))
+            status = EXIT_SUCCESS;
+        else
             fprintf(stderr, "Failed to open output file");
-            return EXIT_FAILURE;
-        }
-
-        return EXIT_SUCCESS;
     }
 
-    return EXIT_FAILURE;
+    ParserContext_destroy(&context, scanner);
+    return status;
 }
+#endif
@@ -0,0 +1,110 @@
+#ifndef __ARENA_H__
+#define __ARENA_H__
+
+#include <stdalign.h>
+#include <stddef.h>
+
+/**
+ * Блок памяти арены
+ */
+typedef struct ArenaChunk {
+    /**
+     * Предыдущий (заполненный) блок
+     */
+    struct ArenaChunk *prev;
+
+    /**
+     * Емкость блока в байтах
+     */
+    size_t cap;
+
+    /**
+     * Количество занятых байт
+     */
+    size_t size;
+
+    /**
+     * Память блока (выровнена так же, как память от malloc)
+     */
+    alignas(max_align_t) char data[];
+} ArenaChunk;
+
+/**
+ * Арена - последовательный аллокатор.
+ * Память выделяется из больших блоков простым сдвигом указателя,
+ * а освобождается только целиком, вместе с ареной. Используется
+ * для узлов дерева разбора и строк лексем: все они живут до конца
+ * разбора, поэтому освобождать их по одному не требуется.
+ */
+typedef struct Arena {
+    /**
+     * Текущий блок, из которого выделяется память
+     */
+    ArenaChunk *chunk;
+} Arena;
+
+/**
+ * Отметка состояния арены (см. Arena_mark и Arena_release)
+ */
+typedef struct ArenaMark {
+    ArenaChunk *chunk;
+    size_t size;
+} ArenaMark;
+
+/**
+ * Конструктор создания пустой арены
+ *
+ * @return арена, либо NULL, если не получилось выделить память
+ */
+Arena*
+Arena_new();
+
+/**
+ * Выделяет память из арены. Память выровнена так же, как у malloc.
+ *
+ * @param arena арена
+ * @param size  размер в байтах
+ * @return указатель на выделенную память, либо NULL, если
+ * не получилось выделить память
+ */
+void*
+Arena_alloc(Arena *arena, size_t size);
+
+/**
+ * Копирует zero-terminated строку в арену
+ *
+ * @param arena арена
+ * @param str   строка
+ * @return копия строки, либо NULL, если не получилось выделить память
+ */
+char*
+Arena_strdup(Arena *arena, const char *str);
+
+/**
+ * Запоминает текущее состояние арены
+ *
+ * @param arena арена
+ * @return отметка, до которой можно освободить арену (см. Arena_release)
+ */
+ArenaMark
+Arena_mark(Arena *arena);
+
+/**
+ * Освобождает память, выделенную из арены после отметки.
+ * Память, выделенная до отметки, остается действительной.
+ *
+ * @param arena арена
+ * @param mark  отметка, полученная от Arena_mark той же арены
+ */
+void
+Arena_release(Arena *arena, ArenaMark mark);
+
+/**
+ * Освобождает всю память, выделенную из арены, и саму арену
+ *
+ * @param arena арена
+ */
+void
+Arena_delete(Arena *arena);
+
+#endif
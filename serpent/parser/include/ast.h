@@ -234,10 +234,14 @@ add_elseif_expr(Json *alts, Json *cond, Json *expr);
  * Создает корневой узел программы.
  * 
  * @param program Узел программы - список различных узлов
+ * @param files Таблица имен файлов для компактных позиций узлов
+ * (см. ParserContext_file_table), NULL - если позиции не компактные.
+ * Таблица выводится перед классами, чтобы читатель мог восстанавливать
+ * позиции узлов, не дочитав вывод до конца
  * @return Корневой узел программы
  */
 Json*
-mk_program(Json *program);
+mk_program(Json *program, Json *files);
 
 /**
  * Создает узел оператора "if"
@@ -593,7 +597,9 @@ Json*
 mk_routine_with_args(Json *names, Json *params_list, Json *return_type, Json *routine_body);
 
 /**
- * Создает узел тела функции или процедуры
+ * Создает узел тела функции или процедуры.
+ * При разборе только интерфейса (eiffelp -i) вместо тела создается
+ * узел routine_interface, в котором есть только признак is_deferred
  * 
  * @param local Локальные переменные
  * @param require Блок предусловий
@@ -607,6 +613,7 @@ mk_effective_routine_body(Json *local, Json *require, Json *do_clause, Json *the
 
 /**
  * Создает узел тела отложенной функции или процедуры
+ * (при разборе только интерфейса - узел routine_interface)
  * 
  * @param require Блок предусловий
  * @param ensure Блок постусловий
@@ -673,6 +680,7 @@ mk_feature_parameter(Json *name_and_type);
 
 /**
  * Создает узел тела внешней подпрограммы.
+ * При разборе только интерфейса (eiffelp -i) контракты не выводятся.
  * 
  * @param language_name Имя языка, из которого нужно взять определение
  * @param external_routine_name "Псевдоним", зависящий от языка реализации внешней процедуры
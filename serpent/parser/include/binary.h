@@ -0,0 +1,42 @@
+#ifndef __BINARY_H__
+#define __BINARY_H__
+
+#include <stdio.h>
+
+#include "json.h"
+
+/**
+ * Версия компактного двоичного формата дерева разбора
+ */
+#define BINARY_AST_VERSION 1
+
+/**
+ * Записывает дерево разбора в поток в компактном двоичном формате.
+ *
+ * Формат:
+ *   "EIFB", байт версии (BINARY_AST_VERSION);
+ *   таблица строк: varint количество строк, varint размер блока строк,
+ *   блок строк, каждая из которых оканчивается символом '\0';
+ *   корневое значение.
+ *
+ * Значение начинается с байта-тега:
+ *   0 - null, 1 - false, 2 - true;
+ *   3 - целое число (zigzag varint);
+ *   4 - число с плавающей точкой (8 байт, little-endian);
+ *   5 - строка (varint индекс в таблице строк);
+ *   6 - массив (varint количество элементов, элементы);
+ *   7 - объект (varint количество полей, поля: varint индекс имени, значение);
+ *   8 - узел дерева, т.е. объект, первые поля которого "type" и "location":
+ *       varint индекс вида узла, позиция (varint first_line, first_column,
+ *       last_line, last_column и varint индекс имени файла + 1, 0 - если
+ *       имени файла нет), далее остальные поля как у объекта.
+ *
+ * varint - беззнаковое целое в формате LEB128.
+ *
+ * @param stream поток для записи (должен быть открыт в двоичном режиме)
+ * @param json   дерево разбора
+ */
+void
+Json_write_binary(FILE *stream, Json *json);
+
+#endif
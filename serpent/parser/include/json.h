@@ -6,6 +6,7 @@
 #include <stdbool.h>
 #include <stdio.h>
 
+#include "arena.h"
 #include "strbuf.h"
 
 /**
@@ -33,7 +34,9 @@ typedef struct Field {
     JsonValueType value_type;
 
     /**
-     * Имя поля. Может быть NULL, если это элемент массива
+     * Имя поля. Может быть NULL, если это элемент массива.
+     * Имя не копируется: все имена полей - строковые константы,
+     * поэтому одинаковые имена всех узлов указывают на одну строку
      */
     char *field_name;
 
@@ -60,15 +63,23 @@ typedef struct Field {
 typedef struct Json {
     Field *first;
     Field *last;
+
+    /**
+     * Арена, из которой выделяются объект и его поля
+     */
+    Arena *arena;
 } Json;
 
 /**
- * Создает JSON-объекта или массива
+ * Создает JSON-объект или массив. Объект и его поля выделяются из арены
+ * и освобождаются вместе с ней (см. Arena_delete), по отдельности
+ * их освобождать не нужно.
  * 
+ * @param arena арена, из которой выделяется память
  * @return JSON-объект или массив
  */
 Json*
-Json_new();
+Json_new(Arena *arena);
 
 /**
  * Добавляет поле-строку в JSON-объект
@@ -243,6 +254,17 @@ Json_is_array(Json *possible_array);
 char*
 Json_to_string(Json *json, int space_count);
 
+/**
+ * Записывает JSON для заданного объекта непосредственно в поток,
+ * не создавая промежуточную строку
+ * 
+ * @param stream поток для записи
+ * @param json JSON-объект
+ * @param space_count количество пробел в одном отступе
+ */
+void
+Json_write(FILE *stream, Json *json, int space_count);
+
 /**
  * Генерирует короткую JSON-строку для заданного объекта.
  * Дает тот же результат что и Json_to_string(json, 0)
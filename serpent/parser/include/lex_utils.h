@@ -2,6 +2,7 @@
 #define __LEX_UTILS__
 
 #include <stdbool.h>
+#include "arena.h"
 #include "strlist.h"
 
 /**
@@ -115,6 +116,16 @@ is_bin_digit(int ch);
 char*
 escape(char *str);
 
+/**
+ * Экранирует переданную строку, сохраняя результат в арене.
+ * 
+ * @param arena арена
+ * @param str   строка
+ * @return экранированная строка (освобождается вместе с ареной)
+ */
+char*
+escape_in_arena(Arena *arena, char *str);
+
 /**
  * Выравнивает verbatim-строку, удаляя из нее начальные пробелы.
  * Для большей информации: https://www.eiffel.org/doc/eiffel/ET-_Other_Mechanisms
@@ -0,0 +1,77 @@
+#ifndef __PARSER_H__
+#define __PARSER_H__
+
+#include <stddef.h>
+
+/**
+ * Флаги разбора для eiffel_parse_with_flags
+ */
+
+/**
+ * Построить только интерфейс классов (см. eiffel_parse_interface)
+ */
+#define EIFFEL_PARSE_INTERFACE 1
+
+/**
+ * Выводить позиции узлов компактно: вместо объекта с полями first_line,
+ * first_column, last_line, last_column и filename - массив из пяти чисел
+ * [first_line, first_column, last_line, last_column, индекс файла], где
+ * индекс файла указывает на имя в таблице "files" корня дерева.
+ * Таблица выводится первым полем корня, перед "classes"
+ */
+#define EIFFEL_PARSE_COMPACT_LOCATIONS 2
+
+/**
+ * Выполняет парсинг текста программы на Eiffel, находящегося в памяти.
+ * Используется при загрузке парсера как разделяемой библиотеки.
+ *
+ * Результат возвращается через выходные параметры и не зависит от
+ * предыдущих вызовов: каждый разбор использует собственный контекст
+ * (см. ParserContext в eiffel.y), поэтому функцию можно вызывать
+ * одновременно из нескольких потоков.
+ *
+ * @param source    текст программы (не обязательно оканчивающийся '\0')
+ * @param length    длина текста программы в байтах
+ * @param file_name имя файла, которое будет указано в позициях узлов (может быть NULL)
+ * @param output    выходной параметр: JSON-строка с деревом разбора, либо NULL,
+ * если при разборе возникли ошибки
+ * @param errors    выходной параметр: сообщения об ошибках (пустая строка, если ошибок нет)
+ *
+ * @return количество синтаксических ошибок
+ */
+int
+eiffel_parse(const char *source, size_t length, const char *file_name, char **output, char **errors);
+
+/**
+ * Выполняет парсинг текста программы так же, как eiffel_parse, но строит
+ * только интерфейс классов: заголовки, наследование, конструкторы и
+ * сигнатуры фич. Тела и контракты подпрограмм в дерево не попадают
+ * (см. mk_effective_routine_body в include/ast.h).
+ * Используется для классов, от которых только наследуются или
+ * которые только вызываются (например, стандартной библиотеки).
+ *
+ * Параметры и результат - как у eiffel_parse.
+ */
+int
+eiffel_parse_interface(const char *source, size_t length, const char *file_name, char **output, char **errors);
+
+/**
+ * Выполняет парсинг текста программы так же, как eiffel_parse,
+ * с заданными флагами разбора (EIFFEL_PARSE_*).
+ *
+ * @param flags флаги разбора, объединенные через |
+ *
+ * Остальные параметры и результат - как у eiffel_parse.
+ */
+int
+eiffel_parse_with_flags(const char *source, size_t length, const char *file_name, int flags, char **output, char **errors);
+
+/**
+ * Освобождает строку, полученную из функций разбора eiffel_parse*
+ *
+ * @param str строка
+ */
+void
+eiffel_free(char *str);
+
+#endif
@@ -2,9 +2,10 @@
 #include "./include/strbuf.h"
 
 Json*
-Json_new() {
-    Json *object_or_array = (Json*) malloc(sizeof(Json));
+Json_new(Arena *arena) {
+    Json *object_or_array = (Json*) Arena_alloc(arena, sizeof(Json));
     object_or_array->first = object_or_array->last = NULL;
+    object_or_array->arena = arena;
     return object_or_array;
 }
 
@@ -12,9 +13,9 @@ static Field*
 _Json_new_field(Json *json, char *field_name, JsonValueType value_type) {
     Field *prev_field = json->last;
 
-    Field *new_field = (Field*) malloc(sizeof(Field));
+    Field *new_field = (Field*) Arena_alloc(json->arena, sizeof(Field));
     new_field->value_type = value_type;
-    new_field->field_name = field_name == NULL ? field_name : strdup(field_name);
+    new_field->field_name = field_name;
     new_field->next_field = NULL;
 
     if (prev_field != NULL)
@@ -109,25 +110,50 @@ Json_add_null_to_array(Json *array) {
     return Json_add_null_to_object(array, NULL);
 }
 
+/**
+ * Приемник сгенерированного JSON: либо строковый буффер,
+ * либо поток (если stream != NULL)
+ */
+typedef struct JsonWriter {
+    StringBuffer *strbuf;
+    FILE *stream;
+} JsonWriter;
+
+static inline void
+_write(JsonWriter *writer, const char *cstr) {
+    if (writer->stream != NULL)
+        fputs(cstr, writer->stream);
+    else
+        StringBuffer_append(writer->strbuf, cstr);
+}
+
+static inline void
+_write_char(JsonWriter *writer, char ch) {
+    if (writer->stream != NULL)
+        fputc(ch, writer->stream);
+    else
+        StringBuffer_append_char(writer->strbuf, ch);
+}
+
 static inline void
-_indent(StringBuffer *strbuf, int indent_level, int indent_size) {
+_indent(JsonWriter *writer, int indent_level, int indent_size) {
     int space_count = indent_level * indent_size;
     for (int i = 0; i < space_count; i++) {
-        StringBuffer_append(strbuf, " ");
+        _write_char(writer, ' ');
     }
 }
 
 static inline void
-_append_int_to_buf(StringBuffer *strbuf, int value) {
+_write_int(JsonWriter *writer, int value) {
     char buffer[20];
-    itoa(value, buffer, 10);
-    StringBuffer_append(strbuf, buffer);
+    snprintf(buffer, sizeof(buffer), "%d", value);
+    _write(writer, buffer);
 }
 
 static inline void
-_append_double_to_buf(StringBuffer *strbuf, double value) {
-    char buffer[20];
-    sprintf(buffer, "%f", value);
+_write_double(JsonWriter *writer, double value) {
+    char buffer[512];
+    snprintf(buffer, sizeof(buffer), "%f", value);
     
     // Убирает лишние нули, которые создает sprintf в конце числа
     for (int i = strlen(buffer) - 2; i >= 0; i--)
@@ -136,52 +162,55 @@ _append_double_to_buf(StringBuffer *strbuf, double value) {
             break;
         }
 
-    StringBuffer_append(strbuf, buffer);
+    _write(writer, buffer);
 }
 
 static inline void
-_append_string_to_buf(StringBuffer *strbuf, char *string) {
-    StringBuffer_append(strbuf, "\"");
-    StringBuffer_append(strbuf, string);
-    StringBuffer_append(strbuf, "\"");
+_write_string(JsonWriter *writer, char *string) {
+    _write_char(writer, '"');
+    _write(writer, string);
+    _write_char(writer, '"');
 }
 
 static inline void
-_append_bool_to_buf(StringBuffer *strbuf, bool value) {
+_write_bool(JsonWriter *writer, bool value) {
     if (value)
-        StringBuffer_append(strbuf, "true");
+        _write(writer, "true");
     else
-        StringBuffer_append(strbuf, "false");
+        _write(writer, "false");
 }
 
-static char*
-_Json_field_as_string(Field *field, int indent_level, int indent_size) {
-    StringBuffer *strbuf = StringBuffer_empty();
-
+/**
+ * Записывает значение поля (вместе со всеми вложенными полями) в приемник.
+ * Все узлы дерева записываются в один и тот же приемник за один проход,
+ * без создания промежуточных строк.
+ */
+static void
+_Json_write_field(JsonWriter *writer, Field *field, int indent_level, int indent_size) {
     switch (field->value_type) {
         case JSON_STRING:
-            _append_string_to_buf(strbuf, field->str_value);
+            _write_string(writer, field->str_value);
             break;
         case JSON_INT:
-            _append_int_to_buf(strbuf, field->int_value);
+            _write_int(writer, field->int_value);
             break;
         case JSON_DOUBLE:
-            _append_double_to_buf(strbuf, field->double_value);
+            _write_double(writer, field->double_value);
             break;
         case JSON_BOOL:
-            _append_bool_to_buf(strbuf, field->bool_value);
+            _write_bool(writer, field->bool_value);
             break;
         case JSON_NULL:
-            StringBuffer_append(strbuf, "null");
+            _write(writer, "null");
             break;
         case JSON_OBJECT:
         case JSON_ARRAY:
             Json *object_or_array = field->object_or_array;
 
             if (field->value_type == JSON_ARRAY)
-                StringBuffer_append(strbuf, "[");
+                _write_char(writer, '[');
             else
-                StringBuffer_append(strbuf, "{");
+                _write_char(writer, '{');
 
             indent_level++;
             Field *current_field = object_or_array->first;
@@ -190,46 +219,53 @@ _Json_field_as_string(Field *field, int indent_level, int indent_size) {
             if (current_field != NULL) {
                 has_some_elements = true;
                 if (indent_size > 0)
-                    StringBuffer_append(strbuf, "\n");
+                    _write_char(writer, '\n');
             }
 
             while (current_field != NULL) {
-                _indent(strbuf, indent_level, indent_size);
+                _indent(writer, indent_level, indent_size);
 
                 // Если это объект, то необходимо добавить имя поля перед самим значением
                 if (field->value_type == JSON_OBJECT) {
-                    _append_string_to_buf(strbuf, current_field->field_name);
-                    StringBuffer_append(strbuf, ":");
+                    _write_string(writer, current_field->field_name);
+                    _write_char(writer, ':');
                     if (indent_size > 0)
-                        StringBuffer_append(strbuf, " ");
+                        _write_char(writer, ' ');
                 }
 
-                StringBuffer_append(
-                    strbuf,
-                    _Json_field_as_string(current_field, indent_level, indent_size)
-                );
+                _Json_write_field(writer, current_field, indent_level, indent_size);
 
                 if (current_field->next_field != NULL)
-                    StringBuffer_append(strbuf, ",");
+                    _write_char(writer, ',');
 
                 if (indent_size > 0)
-                    StringBuffer_append(strbuf, "\n");
+                    _write_char(writer, '\n');
 
                 current_field = current_field->next_field;
             }
 
             indent_level--;
             if (has_some_elements)
-                _indent(strbuf, indent_level, indent_size);
+                _indent(writer, indent_level, indent_size);
 
             if (field->value_type == JSON_ARRAY)
-                StringBuffer_append(strbuf, "]");
+                _write_char(writer, ']');
             else
-                StringBuffer_append(strbuf, "}");
+                _write_char(writer, '}');
             break;
     }
+}
 
-    return StringBuffer_extract_string(strbuf);
+static void
+_Json_write(JsonWriter *writer, Json *json, int space_count) {
+    Field root = {
+        .value_type = Json_is_array(json) ? JSON_ARRAY : JSON_OBJECT,
+        .field_name = NULL,
+        .object_or_array = json,
+        .next_field = NULL,
+    };
+
+    _Json_write_field(writer, &root, 0, space_count);
 }
 
 bool
@@ -249,19 +285,15 @@ Json_is_array(Json *possible_array) {
 
 char*
 Json_to_string(Json *json, int space_count) {
-    Field *root = (Field*) malloc(sizeof(Field));
-
-    if (Json_is_array(json))
-        root->value_type = JSON_ARRAY;
-    else
-        root->value_type = JSON_OBJECT;
-    root->object_or_array = json;
-
-    char *stringified = _Json_field_as_string(root, 0, space_count);
-
-    free(root);
+    JsonWriter writer = { .strbuf = StringBuffer_empty(), .stream = NULL };
+    _Json_write(&writer, json, space_count);
+    return StringBuffer_extract_string(writer.strbuf);
+}
 
-    return stringified;
+void
+Json_write(FILE *stream, Json *json, int space_count) {
+    JsonWriter writer = { .strbuf = NULL, .stream = stream };
+    _Json_write(&writer, json, space_count);
 }
 
 char*
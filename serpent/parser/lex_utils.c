@@ -5,6 +5,7 @@
 #include <stdbool.h>
 #include <string.h>
 
+#include "./include/arena.h"
 #include "./include/strbuf.h"
 #include "./include/strlist.h"
 
@@ -137,6 +138,14 @@ escape(char *str) {
     return StringBuffer_extract_string(strbuf);
 }
 
+char*
+escape_in_arena(Arena *arena, char *str) {
+    char *escaped = escape(str);
+    char *result = Arena_strdup(arena, escaped);
+    free(escaped);
+    return result;
+}
+
 static inline int
 left_space_count(const char *str) {
     return strspn(str, " \t");
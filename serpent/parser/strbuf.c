@@ -42,25 +42,34 @@ StringBuffer_empty() {
     return StringBuffer_new(NULL);
 }
 
+/**
+ * Гарантирует, что в буффер поместится еще extra_size символов (и '\0').
+ * Емкость растет геометрически, поэтому суммарное время
+ * добавления строк в буффер линейно от их общей длины.
+ */
+static StringBuffer*
+_StringBuffer_reserve(StringBuffer *strbuf, int extra_size) {
+    if (strbuf->size + extra_size < strbuf->cap)
+        return strbuf;
+
+    int new_cap = calculate_capacity(strbuf->size + extra_size);
+    char *new_buffer = (char*) realloc(strbuf->buffer, new_cap);
+
+    if (new_buffer == NULL) return NULL;
+
+    strbuf->buffer = new_buffer;
+    strbuf->cap = new_cap;
+
+    return strbuf;
+}
+
 StringBuffer*
 StringBuffer_append(StringBuffer *strbuf, const char *cstr) {
     int cstr_len = strlen(cstr);
 
-    if (strbuf->size + cstr_len >= strbuf->cap) {
-        int new_cap = calculate_capacity(strbuf->size + cstr_len);
-        char* new_buffer = (char*) calloc(new_cap, sizeof(char));
-
-        if (new_buffer == NULL) return NULL;
+    if (_StringBuffer_reserve(strbuf, cstr_len) == NULL) return NULL;
 
-        strcpy(new_buffer, strbuf->buffer);
-        free(strbuf->buffer);
-
-        strbuf->buffer = new_buffer;
-        strbuf->size = strlen(new_buffer);
-        strbuf->cap = new_cap;
-    }
-    
-    strcpy(strbuf->buffer + strbuf->size, cstr);
+    memcpy(strbuf->buffer + strbuf->size, cstr, cstr_len + 1);
     strbuf->size += cstr_len;
 
     return strbuf;
@@ -68,9 +77,15 @@ StringBuffer_append(StringBuffer *strbuf, const char *cstr) {
 
 StringBuffer*
 StringBuffer_append_char(StringBuffer* strbuf, char ch) {
-    char cstr[2];
-    sprintf(cstr, "%c", ch);
-    return StringBuffer_append(strbuf, cstr);
+    // Буффер хранит zero-terminated строку, поэтому '\0' не добавляется
+    if (ch == '\0') return strbuf;
+
+    if (_StringBuffer_reserve(strbuf, 1) == NULL) return NULL;
+
+    strbuf->buffer[strbuf->size++] = ch;
+    strbuf->buffer[strbuf->size] = '\0';
+
+    return strbuf;
 }
 
 void
@@ -89,7 +104,7 @@ StringBuffer_delete(StringBuffer *strbuf) {
 
 char*
 StringBuffer_extract_string(StringBuffer *strbuf) {
-    char *string = strdup(strbuf->buffer);
-    StringBuffer_delete(strbuf);
+    char *string = strbuf->buffer;
+    free(strbuf);
     return string;
 }
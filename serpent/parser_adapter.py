@@ -1,22 +1,202 @@
+from concurrent.futures import ThreadPoolExecutor
+import ctypes
+import functools
+import json
+import os
+import queue
+import struct
 import subprocess
 import re
+import tempfile
+
+from .tree.abstract_node import Location
+from .tree.binary import BinaryAstError, unescape
+from .tree.class_decl import make_class_decl
 
 
 def replace_rn_with_n(s):
     return "\n".join(s.splitlines())
 
 
-def parse(source, parser_path):
-    """Возвращает результат работы парсера Eiffel по заданному файлу
+class SharedParser:
+    """Парсер Eiffel, загруженный в текущий процесс как разделяемая
+    библиотека (см. serpent/parser/include/parser.h). В отличие от запуска
+    исполняемого файла парсера, не требует создания нового процесса
+    на каждый разбираемый текст.
+
+    Парсер не использует глобального состояния, а ctypes отпускает GIL
+    на время вызова, поэтому parse можно вызывать одновременно из
+    нескольких потоков (см. map).
+    """
+
+    # Флаги разбора (см. eiffel_parse_with_flags в parser.h)
+    PARSE_INTERFACE = 1
+    PARSE_COMPACT_LOCATIONS = 2
+
+    def __init__(self, library_path):
+        """
+        :param library_path: Путь к разделяемой библиотеке парсера
+
+        :raises OSError: если библиотеку не удалось загрузить
+        """
+        self._library = ctypes.CDLL(str(library_path))
+
+        self._library.eiffel_parse_with_flags.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_size_t,
+            ctypes.c_char_p,
+            ctypes.c_int,
+            ctypes.POINTER(ctypes.c_void_p),
+            ctypes.POINTER(ctypes.c_void_p),
+        ]
+        self._library.eiffel_parse_with_flags.restype = ctypes.c_int
+        self._library.eiffel_free.argtypes = [ctypes.c_void_p]
+        self._library.eiffel_free.restype = None
+
+        # Декодер двоичного формата создает объекты Python, поэтому
+        # вызывается через PyDLL: без освобождения GIL и с проверкой
+        # исключения после вызова
+        self._decode_binary = ctypes.PyDLL(str(library_path)).eiffel_decode_binary
+        self._decode_binary.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_size_t,
+            ctypes.py_object,
+            ctypes.py_object,
+            ctypes.py_object,
+            ctypes.py_object,
+        ]
+        self._decode_binary.restype = ctypes.py_object
+
+    def _take_string(self, pointer):
+        if not pointer.value:
+            return ""
+        string = ctypes.string_at(pointer.value).decode()
+        self._library.eiffel_free(pointer.value)
+        return string
+
+    def parse(self, source, file_name=None, interface_only=False, compact_locations=False):
+        """Возвращает результат работы парсера Eiffel по заданному тексту
+
+        :param source: Текст программы на Eiffel
+        :param file_name: Имя файла, указываемое в позициях узлов
+        :param interface_only: Нужно ли строить только интерфейс классов,
+        без тел и контрактов подпрограмм (см. eiffel_parse_interface)
+        :param compact_locations: Нужно ли выводить позиции узлов компактно,
+        с таблицей имен файлов (см. serpent.tree.decode_json_ast)
+
+        :return: кортеж из двух строк: JSON-дерево и сообщения об ошибках
+        """
+        source_bytes = source.encode()
+        output = ctypes.c_void_p()
+        errors = ctypes.c_void_p()
+
+        flags = 0
+        if interface_only:
+            flags |= self.PARSE_INTERFACE
+        if compact_locations:
+            flags |= self.PARSE_COMPACT_LOCATIONS
+        self._library.eiffel_parse_with_flags(
+            source_bytes,
+            len(source_bytes),
+            None if file_name is None else file_name.encode(),
+            flags,
+            ctypes.byref(output),
+            ctypes.byref(errors))
+
+        stdout, stderr = self._take_string(output), self._take_string(errors)
+        return replace_rn_with_n(stdout), replace_rn_with_n(stderr)
+
+    def decode_binary(self, data, object_hook=None):
+        """Декодирует дерево разбора из двоичного формата (eiffelp -b)
+        так же, как serpent.tree.decode_binary_ast, но в C
+
+        :param data: Дерево разбора в двоичном формате
+        :param object_hook: Функция, которой передается каждый
+        декодированный объект (см. decode_binary_ast)
+
+        :raises BinaryAstError: если данные не в двоичном формате
+        или повреждены
+        :return: словарь с деревом разбора (или результат object_hook для корня)
+        """
+        return self._decode_binary(
+            data, len(data), Location, object_hook, unescape, BinaryAstError)
+
+    def map(self, sources, file_names=None, threads=None, interface_only=False,
+            compact_locations=False):
+        """Разбирает несколько текстов программ параллельно в потоках
+        текущего процесса
+
+        :param sources: Тексты программ на Eiffel
+        :param file_names: Имена файлов для каждого из текстов
+        :param threads: Количество потоков (по умолчанию - количество ядер)
+        :param interface_only: Нужно ли строить только интерфейс классов
+        :param compact_locations: Нужно ли выводить позиции узлов компактно
+
+        :return: список результатов разбора в порядке следования текстов
+        """
+        sources = list(sources)
+        if file_names is None:
+            file_names = [None] * len(sources)
+
+        parse = functools.partial(
+            self.parse,
+            interface_only=interface_only,
+            compact_locations=compact_locations)
+        with ThreadPoolExecutor(threads or os.cpu_count() or 1) as executor:
+            return list(executor.map(parse, sources, file_names))
+
+
+@functools.cache
+def load_shared_parser(library_path):
+    """Загружает разделяемую библиотеку парсера
+
+    :param library_path: Путь к разделяемой библиотеке парсера
+
+    :return: загруженный парсер, либо None, если библиотеку загрузить не удалось
+    """
+    try:
+        return SharedParser(library_path)
+    except OSError:
+        return None
+
+
+def parse(source, parser_path, library_path=None, interface_only=False,
+          compact_locations=False, file_name=None):
+    """Возвращает результат работы парсера Eiffel по заданному файлу.
+    Если указан путь к разделяемой библиотеке парсера и ее удалось загрузить,
+    разбор выполняется в текущем процессе, иначе запускается
+    исполняемый файл парсера.
 
     :param program: Текст программы на Eiffel
     :param parser_path: Путь к парсеру, включая имя файла парсера
+    :param library_path: Путь к разделяемой библиотеке парсера
+    :param interface_only: Нужно ли строить только интерфейс классов,
+    без тел и контрактов подпрограмм (eiffelp -i)
+    :param compact_locations: Нужно ли выводить позиции узлов компактно,
+    с таблицей имен файлов (eiffelp -c, см. serpent.tree.decode_json_ast)
+    :param file_name: Имя файла, указываемое в позициях узлов (eiffelp -n)
 
     :return: кортеж из двух строк: stdout и stderr
     """
+    if library_path is not None:
+        shared_parser = load_shared_parser(library_path)
+        if shared_parser is not None:
+            return shared_parser.parse(
+                source,
+                file_name,
+                interface_only=interface_only,
+                compact_locations=compact_locations)
+
+    args = [parser_path]
+    if interface_only:
+        args.append("-i")
+    if compact_locations:
+        args.append("-c")
+    if file_name is not None:
+        args += ["-n", file_name]
     try:
         output = subprocess.run(
-            [parser_path],
+            args,
             input=source.encode(),
             capture_output=True,
         )
@@ -27,6 +207,244 @@ def parse(source, parser_path):
     return replace_rn_with_n(stdout), replace_rn_with_n(stderr)
 
 
+def parse_binary(source, parser_path):
+    """Возвращает дерево разбора в компактном двоичном формате (eiffelp -b),
+    см. serpent/parser/include/binary.h и serpent/tree/binary.py
+
+    :param source: Текст программы на Eiffel
+    :param parser_path: Путь к парсеру, включая имя файла парсера
+
+    :return: кортеж из байтов дерева разбора и строки stderr
+    """
+    try:
+        output = subprocess.run(
+            [parser_path, "-b"],
+            input=source.encode(),
+            capture_output=True,
+        )
+    except FileNotFoundError:
+        raise RuntimeError(
+            f'Couldn\'t find eiffel parser by path "{parser_path}"')
+    return output.stdout, replace_rn_with_n(output.stderr.decode())
+
+
+def iter_classes(paths, parser_path, interface_only=False):
+    """Разбирает файлы одним процессом парсера в построчном режиме
+    (eiffelp -l) и возвращает классы по мере их разбора: класс строится,
+    как только парсер выведет его, не дожидаясь разбора остальных файлов.
+    Поэтому в памяти одновременно находится текст и дерево разбора только
+    одного класса, а не всей программы.
+
+    :param paths: Пути к файлам с исходным кодом
+    :param parser_path: Путь к парсеру, включая имя файла парсера
+    :param interface_only: Нужно ли строить только интерфейс классов
+
+    :return: генератор классов (ClassDecl) в порядке их следования в файлах
+
+    :raises RuntimeError: если парсер не найден или при разборе возникли
+    ошибки (классы, разобранные до первой ошибки, уже будут возвращены)
+    """
+    args = [parser_path, "-l"] + (["-i"] if interface_only else [])
+    # Сообщения об ошибках пишутся в файл: если бы парсер писал их в канал,
+    # который читается только в конце, он мог бы заблокироваться на записи
+    with tempfile.TemporaryFile() as errors:
+        try:
+            process = subprocess.Popen(
+                args + [str(path) for path in paths],
+                stdout=subprocess.PIPE,
+                stderr=errors,
+            )
+        except FileNotFoundError:
+            raise RuntimeError(
+                f'Couldn\'t find eiffel parser by path "{parser_path}"')
+
+        try:
+            for line in process.stdout:
+                yield make_class_decl(json.loads(line)["class"])
+        except BaseException:
+            # Генератор закрыт до конца разбора (или класс не удалось
+            # построить) - продолжать разбор не нужно
+            process.kill()
+            raise
+        finally:
+            process.stdout.close()
+            process.wait()
+
+        errors.seek(0)
+        stderr = replace_rn_with_n(errors.read().decode())
+        if process.returncode != 0:
+            raise RuntimeError(f"Couldn't parse source files:\n{stderr}")
+
+
+class ParserWorker:
+    """Процесс парсера, запущенный в режиме сервера (eiffelp -s).
+    Процесс создается один раз и обрабатывает запросы на разбор,
+    пока не будет вызван close().
+
+    Запрос и ответ состоят из двух блоков, каждый из которых предваряется
+    своей длиной (4 байта, big-endian): запрос - имя файла и текст программы,
+    ответ - JSON-дерево и сообщения об ошибках.
+    """
+
+    FRAME_HEADER = struct.Struct(">I")
+
+    def __init__(self, parser_path, interface_only=False):
+        """
+        :param parser_path: Путь к парсеру, включая имя файла парсера
+        :param interface_only: Нужно ли строить только интерфейс классов
+        """
+        try:
+            self._process = subprocess.Popen(
+                [parser_path, "-s", "-i"] if interface_only else [parser_path, "-s"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            raise RuntimeError(
+                f'Couldn\'t find eiffel parser by path "{parser_path}"')
+
+    def _write_frame(self, data):
+        self._process.stdin.write(self.FRAME_HEADER.pack(len(data)))
+        self._process.stdin.write(data)
+
+    def _read_frame(self):
+        header = self._process.stdout.read(self.FRAME_HEADER.size)
+        if len(header) != self.FRAME_HEADER.size:
+            raise RuntimeError("Eiffel parser worker exited unexpectedly")
+        length, = self.FRAME_HEADER.unpack(header)
+        body = self._process.stdout.read(length)
+        if len(body) != length:
+            raise RuntimeError("Eiffel parser worker exited unexpectedly")
+        return body.decode()
+
+    def parse(self, source, file_name=None):
+        """Возвращает результат работы парсера Eiffel по заданному тексту
+
+        :param source: Текст программы на Eiffel
+        :param file_name: Имя файла, указываемое в позициях узлов
+
+        :return: кортеж из двух строк: JSON-дерево и сообщения об ошибках
+        """
+        self._write_frame(b"" if file_name is None else file_name.encode())
+        self._write_frame(source.encode())
+        self._process.stdin.flush()
+
+        stdout, stderr = self._read_frame(), self._read_frame()
+        return replace_rn_with_n(stdout), replace_rn_with_n(stderr)
+
+    def is_alive(self):
+        """Проверяет, что процесс парсера еще не завершился"""
+        return self._process.poll() is None
+
+    def kill(self):
+        """Принудительно завершает процесс парсера, например, после сбоя
+        обмена, когда его ответы уже не соответствуют запросам
+        """
+        self._process.kill()
+        self.close()
+
+    def close(self):
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            # Процесс завершился, не дочитав запрос
+            pass
+        self._process.wait()
+        self._process.stdout.close()
+
+
+class ParserPool:
+    """Набор процессов парсера в режиме сервера. Позволяет разбирать
+    множество файлов, затрачивая время на запуск процесса один раз
+    на каждый процесс пула, а не на каждый файл.
+    """
+
+    def __init__(self, parser_path, size=None, interface_only=False):
+        """
+        :param parser_path: Путь к парсеру, включая имя файла парсера
+        :param size: Количество процессов (по умолчанию - количество ядер)
+        :param interface_only: Нужно ли строить только интерфейс классов
+        """
+        size = size or os.cpu_count() or 1
+        self._parser_path = parser_path
+        self._interface_only = interface_only
+        self._workers = []
+        try:
+            for _ in range(size):
+                self._workers.append(ParserWorker(parser_path, interface_only))
+        except BaseException:
+            # Уже запущенные процессы не должны пережить неудачное создание пула
+            self.close()
+            raise
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def _release(self, worker, failed):
+        """Возвращает процесс в пул. Процесс, который завершился или
+        на котором разбор прервался ошибкой обмена, заменяется новым
+
+        :param worker: Процесс, на котором выполнялся разбор
+        :param failed: Прервался ли разбор исключением
+        """
+        if not failed and worker.is_alive():
+            self._idle.put(worker)
+            return
+
+        worker.kill()
+        try:
+            replacement = ParserWorker(self._parser_path, self._interface_only)
+        except BaseException:
+            # Новый процесс запустить не удалось - в пул возвращается
+            # завершенный, следующий разбор на нем снова попробует его заменить
+            self._idle.put(worker)
+            raise
+        self._workers[self._workers.index(worker)] = replacement
+        self._idle.put(replacement)
+
+    def parse(self, source, file_name=None):
+        """Разбирает текст программы на первом свободном процессе пула
+
+        :param source: Текст программы на Eiffel
+        :param file_name: Имя файла, указываемое в позициях узлов
+
+        :return: кортеж из двух строк: JSON-дерево и сообщения об ошибках
+        """
+        worker = self._idle.get()
+        failed = True
+        try:
+            result = worker.parse(source, file_name)
+            failed = False
+            return result
+        finally:
+            self._release(worker, failed)
+
+    def map(self, sources, file_names=None):
+        """Разбирает несколько текстов программ параллельно
+
+        :param sources: Тексты программ на Eiffel
+        :param file_names: Имена файлов для каждого из текстов
+
+        :return: список результатов разбора в порядке следования текстов
+        """
+        sources = list(sources)
+        if file_names is None:
+            file_names = [None] * len(sources)
+
+        with ThreadPoolExecutor(len(self._workers)) as executor:
+            return list(executor.map(self.parse, sources, file_names))
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 def make_error_message(stderr):
     """Считывает все сообщения об ошибках из stderr
 
@@ -0,0 +1,180 @@
+"""Профилирование стадий компиляции: для каждой стадии записываются
+время по часам, процессорное время, пиковый прирост памяти
+(по tracemalloc) и счетчики (количество узлов дерева, построенных
+таблиц фич и т.д.).
+
+Результаты сохраняются в JSON (dump_json) или в формате Trace Event
+(dump_chrome_trace), который открывается в chrome://tracing и Perfetto.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, is_dataclass
+from pathlib import Path
+from typing import Iterator
+
+from .tree.abstract_node import Node
+from .tree.features import LAZY_METHOD_FIELDS, Method
+
+
+@dataclass
+class StageRecord:
+    name: str
+    # Время начала стадии (в секундах) относительно создания профилировщика
+    start: float
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    # Пиковый прирост памяти (в байтах) относительно начала стадии
+    peak_memory: int = 0
+    # Глубина вложенности стадии
+    depth: int = 0
+    counters: Counter = field(default_factory=Counter)
+
+
+class Profiler:
+    """Собирает статистику стадий компиляции.
+
+    Выключенный профилировщик (enabled=False) ничего не измеряет:
+    stage и count для него почти ничего не стоят, поэтому его можно
+    передавать в стадии компиляции всегда.
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = True) -> None:
+        """
+        :param trace_memory: Измерять ли пиковую память (tracemalloc заметно
+        замедляет выполнение программы)
+        """
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.records: list[StageRecord] = []
+
+        self._origin = time.perf_counter()
+        self._stack: list[StageRecord] = []
+        # Пик памяти, достигнутый внутри стадий стека до сброса
+        # пика при входе во вложенную стадию
+        self._peaks: list[int] = []
+        self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageRecord | None]:
+        """Измеряет выполнение блока with как стадию name"""
+        if not self.enabled:
+            yield None
+            return
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+        memory = 0
+        if self.trace_memory:
+            memory, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+
+        record = StageRecord(
+            name=name,
+            start=time.perf_counter() - self._origin,
+            depth=len(self._stack))
+        self.records.append(record)
+        self._stack.append(record)
+        self._peaks.append(memory)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record.cpu_time = time.process_time() - cpu_start
+            record.wall_time = time.perf_counter() - wall_start
+            self._stack.pop()
+            peak = self._peaks.pop()
+            if self.trace_memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                record.peak_memory = peak - memory
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Увеличивает счетчик name текущей стадии"""
+        if self._stack:
+            self._stack[-1].counters[name] += value
+
+    def close(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def to_json(self) -> dict:
+        return {
+            "stages": [
+                {
+                    "name": record.name,
+                    "depth": record.depth,
+                    "start": record.start,
+                    "wall_time": record.wall_time,
+                    "cpu_time": record.cpu_time,
+                    "peak_memory": record.peak_memory if self.trace_memory else None,
+                    "counters": dict(record.counters),
+                }
+                for record in self.records
+            ],
+        }
+
+    def dump_json(self, path: Path | str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.to_json(), file, indent=2)
+
+    def to_chrome_trace(self) -> dict:
+        """Возвращает стадии в формате Trace Event: каждая стадия - событие
+        с длительностью (ph = "X"), время - в микросекундах
+        """
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = []
+        for record in self.records:
+            args = {"cpu_time_ms": record.cpu_time * 1000, **record.counters}
+            if self.trace_memory:
+                args["peak_memory"] = record.peak_memory
+            events.append({
+                "name": record.name,
+                "cat": "serpent",
+                "ph": "X",
+                "ts": record.start * 1e6,
+                "dur": record.wall_time * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path: Path | str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.to_chrome_trace(), file)
+
+
+def count_nodes(root) -> int:
+    """Возвращает количество построенных узлов (Node) дерева или списка
+    деревьев. Еще не построенные тела методов (см. Method) не считаются
+    и при подсчете не строятся.
+    """
+    count = 0
+    stack = [root]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif is_dataclass(value) and not isinstance(value, type):
+            if isinstance(value, Node):
+                count += 1
+            names = [f.name for f in fields(value)]
+            if isinstance(value, Method) and not value.is_body_built:
+                names = [name for name in names if name not in LAZY_METHOD_FIELDS]
+            stack.extend(getattr(value, name) for name in names)
+    return count
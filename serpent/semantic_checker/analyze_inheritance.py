@@ -1,7 +1,7 @@
 from __future__ import annotations
-import copy
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable
 
 from ..tree import (
     ClassDecl,
@@ -9,27 +9,91 @@ from ..tree import (
     Feature,
     SelectedFeatures,
     Constant,
-    Field,
     BaseMethod,
     Method,
     ClassType)
 from ..tree.abstract_node import Location
 from ..errors import CompilerError, ErrorCollector
 
+if TYPE_CHECKING:
+    from ..cache import CompilationCache
 
-@dataclass
+
+@dataclass(frozen=True, slots=True, eq=False)
 class FeatureRecord:
+    """Неизменяемая запись о фиче в таблице фич класса.
+
+    Запись ссылается на объявление фичи и хранит только отличия от него
+    (новое имя, признак отложенности, класс выбранной реализации), поэтому
+    ни записи, ни объявления при наследовании не копируются: записи,
+    не затронутые секциями наследования, разделяются таблицами предка
+    и потомков, а rename/undefine/redefine/select создают новую
+    запись с той же ссылкой на объявление.
+    """
     from_class: str
     name: str
+    # Объявление фичи (для переопределенной фичи - объявление в потомке)
     node: Feature
+    # Фича сделана отложенной в секции undefine
+    undefined: bool = False
+    # Класс, реализация фичи из которого выбрана в секции select
+    selected_from: str | None = None
 
     @property
     def location(self) -> Location:
         return self.node.location
 
+    @property
+    def is_deferred(self) -> bool:
+        return self.undefined or (isinstance(self.node, Method) and self.node.is_deferred)
+
+    def renamed(self, name: str) -> FeatureRecord:
+        return FeatureRecord(
+            self.from_class, name, self.node, self.undefined, self.selected_from)
+
+    def made_deferred(self) -> FeatureRecord:
+        return FeatureRecord(
+            self.from_class, self.name, self.node, True, self.selected_from)
+
+    def implemented_by(
+            self,
+            feature: FeatureRecord,
+            selected: bool = False) -> FeatureRecord:
+        """Возвращает запись, реализацией которой является фича feature
+        (при переопределении, select и слиянии отложенной фичи с реализованной)
+        """
+        return FeatureRecord(
+            self.from_class,
+            self.name,
+            feature.node,
+            feature.undefined,
+            feature.from_class if selected else self.selected_from)
+
     def __eq__(self, other: FeatureRecord) -> bool:
         return self.from_class == other.from_class and self.name == other.name
 
+    def __hash__(self) -> int:
+        return hash((self.from_class, self.name))
+
+    def __reduce__(self):
+        return FeatureRecord, (
+            self.from_class, self.name, self.node, self.undefined, self.selected_from)
+
+
+# Индекс фич по имени
+type FeatureIndex = dict[str, FeatureRecord]
+
+
+def index_features(features: Iterable[FeatureRecord]) -> FeatureIndex:
+    """Строит индекс фич по имени. Если несколько фич имеют одно имя,
+    в индекс попадает первая из них - та же, которую нашел бы
+    поиск перебором по списку.
+    """
+    index = {}
+    for feature in features:
+        index.setdefault(feature.name, feature)
+    return index
+
 
 @dataclass
 class FlattenClass:
@@ -42,6 +106,9 @@ class FlattenClass:
     inherited: list[FeatureRecord]
     own: list[FeatureRecord]
     constructors: list[FeatureRecord]
+    # Индекс explicit_features по имени, заполняется по окончании
+    # построения таблицы (см. adapt)
+    explicit_index: FeatureIndex = field(default_factory=dict, repr=False)
 
     @property
     def class_name(self) -> str:
@@ -51,11 +118,50 @@ class FlattenClass:
     def explicit_features(self):
         return self.own + self.inherited + self.constructors
 
+    def update_index(self) -> None:
+        self.explicit_index = index_features(self.explicit_features)
+
+    def __getstate__(self) -> dict:
+        # Индекс не сериализуется, а строится заново при загрузке
+        state = self.__dict__.copy()
+        del state["explicit_index"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.update_index()
+
+
+# Списки записей о фичах в FlattenClass
+RECORD_LISTS = (
+    "renamed",
+    "undefined",
+    "redefined",
+    "precursors",
+    "selected",
+    "inherited",
+    "own",
+    "constructors",
+)
+
+
+@dataclass
+class FlattenStats:
+    """Статистика построения таблиц фич: сколько таблиц было построено,
+    сколько раз уже построенная таблица родителя была переиспользована
+    при построении таблицы потомка, сколько записей о фичах было
+    унаследовано от родителей и сколько таблиц было взято из кэша.
+    """
+    computed: int = 0
+    reused: int = 0
+    inherited: int = 0
+    cached: int = 0
+
 
 def check_rename_clause(
         parent: Parent,
-        parent_features: list[FeatureRecord],
-        own_child_features: list[FeatureRecord]) -> None:
+        parent_features: FeatureIndex,
+        own_child_features: FeatureIndex) -> None:
     """Проверят, можно ли выполнить переименования фич, опираясь
     на имена фич для переименования, заданные родительские фичи и
     заданные фичи ребенка. Ошибочные ситуации возникают если:
@@ -90,8 +196,7 @@ def check_rename_clause(
 
     # Проверка на наличие несуществующих фич родителя
     for rule in rename_clause:
-        if not any(rule.original_name ==
-                   feature.name for feature in parent_features):
+        if rule.original_name not in parent_features:
             raise CompilerError(
                 f"Nonexistent parent feature in rename clause: {
                     rule.original_name}",
@@ -99,7 +204,7 @@ def check_rename_clause(
 
     # Проверка на то, что в дочернем классе нет фич с именем псевдонима
     for rule in rename_clause:
-        if any(rule.alias_name == feature.name for feature in own_child_features):
+        if rule.alias_name in own_child_features:
             # Возможно, в сообщение также нужно добавить позицию
             # той фичи, которая конфликует с rule.alias_name
             raise CompilerError(
@@ -114,19 +219,18 @@ def rename(
     if not rename_clause:
         return [], parent_features
 
+    rules = {rule.original_name: rule for rule in rename_clause}
     inherired = []
     renamed = []
 
     for pf in parent_features:
-        rule = next(
-            (r for r in rename_clause if r.original_name == pf.name),
-            None)
+        rule = rules.get(pf.name)
 
         if rule is None:
             inherired.append(pf)
             continue
 
-        inherired.append(copy.replace(pf, name=rule.alias_name))
+        inherired.append(pf.renamed(rule.alias_name))
         renamed.append(pf)
 
     return renamed, inherired
@@ -134,8 +238,8 @@ def rename(
 
 def check_redefine_clause(
         parent: Parent,
-        parent_features: list[FeatureRecord],
-        own_child_features: list[FeatureRecord]) -> None:
+        parent_features: FeatureIndex,
+        own_child_features: FeatureIndex) -> None:
     """Проверят, можно ли выполнить переопределение фич, опираясь
     на имена фич для переопределения, заданные родительские фичи и
     заданные фичи ребенка. Ошибочные ситуации возникают если:
@@ -159,27 +263,27 @@ def check_redefine_clause(
 
     # Проверка на наличие фич в родительском классе
     for feature_name in redefine_clause:
-        if not any(feature_name == pf.name for pf in parent_features):
+        if feature_name not in parent_features:
             raise CompilerError(
                 f"Nonexistent parent feature in redefine clause: {feature_name}",
                 parent.location)
 
     # Проверка, что дочерний класс действительно переопределяет фичу
     for feature_name in redefine_clause:
-        if not any(feature_name == cf.name for cf in own_child_features):
+        if feature_name not in own_child_features:
             raise CompilerError(
                 f"Child class does not redefine a feature: {feature_name}",
                 parent.location)
 
     # Проверка, что не происходит попытка переопределить константу
     for feature_name in redefine_clause:
-        parent_feature = next(
-            pf.node for pf in parent_features if pf.name == feature_name)
+        parent_record = parent_features[feature_name]
+        parent_feature = parent_record.node
         if isinstance(parent_feature, Constant):
             raise CompilerError(
                 f"Redefinition of constant 'f{feature_name}' is not allowed",
                 parent.location)
-        elif isinstance(parent_feature, Method) and parent_feature.is_deferred:
+        elif parent_record.is_deferred:
             raise CompilerError(
                 f"Cannot redefine feature '{
                     parent_feature.name}' of class '{
@@ -191,11 +295,11 @@ If you're trying to define it, just remove it from redefine clause",
 def redefine(
         parent: Parent,
         parent_features: list[FeatureRecord],
-        own_child_features: list[FeatureRecord]):
-    redefine_clause = parent.redefine
-    if not redefine_clause:
+        own_child_features: FeatureIndex):
+    if not parent.redefine:
         return [], [], parent_features
 
+    redefine_clause = set(parent.redefine)
     inherited = []
     redefined = []
     precursors = []
@@ -205,9 +309,7 @@ def redefine(
             inherited.append(pf)
             continue
 
-        child_node = next(
-            f.node for f in own_child_features if f.name == pf.name)
-        redefined.append(copy.replace(pf, node=child_node))
+        redefined.append(pf.implemented_by(own_child_features[pf.name]))
         precursors.append(pf)
 
     return precursors, redefined, inherited
@@ -215,8 +317,8 @@ def redefine(
 
 def check_undefine_clause(
         parent: Parent,
-        parent_features: list[FeatureRecord],
-        own_child_features: list[FeatureRecord]) -> None:
+        parent_features: FeatureIndex,
+        own_child_features: FeatureIndex) -> None:
     """Проверят, можно ли выполнить undefine фич, опираясь
     на имена фич для undefine, заданные родительские фичи и
     заданные фичи ребенка. Ошибочные ситуации возникают если:
@@ -240,7 +342,7 @@ def check_undefine_clause(
 
     # Проверка на существование фич, которые будут сделаны отложенными
     for feature_name in undefine_clause:
-        if not any(feature_name == pf.name for pf in parent_features):
+        if feature_name not in parent_features:
             raise CompilerError(
                 f"Nonexistent parent feature in undefine clause: {feature_name}",
                 parent.location)
@@ -249,21 +351,20 @@ def check_undefine_clause(
     # родительской фичи и определять её - для этого необходимо
     # воспользоваться redefine
     for feature_name in undefine_clause:
-        if any(feature_name == cf.name for cf in own_child_features):
+        if feature_name in own_child_features:
             raise CompilerError(
                 f"Child class already redefines feature: {feature_name}. \
                     Cannot undefine it. Consider moving it to redefine clause", parent.location)
 
     # Проверка, что не происходит попытка переопределить константу
     for feature_name in undefine_clause:
-        parent_feature = next(
-            pf for pf in parent_features if pf.name == feature_name).node
+        parent_record = parent_features[feature_name]
 
-        if isinstance(parent_feature, Constant):
+        if isinstance(parent_record.node, Constant):
             raise CompilerError(
                 f"Undefine of constant '{feature_name}' is not allowed",
                 parent.location)
-        elif isinstance(parent_feature, Method) and parent_feature.is_deferred:
+        elif parent_record.is_deferred:
             raise CompilerError(
                 f"Cannot undefine feature '{feature_name}' twice -- it's already deferred in parent class",
                 parent.location)
@@ -273,39 +374,28 @@ def undefine(
         parent: Parent,
         parent_features: list[FeatureRecord]):
     """Выполняет undefine родительских фич: фичи с заданными именами
-    становятся отложенными
+    становятся отложенными (объявления фич при этом не меняются,
+    см. FeatureRecord.undefined)
     """
-    undefine_clause = parent.undefine
-    if not undefine_clause:
+    if not parent.undefine:
         return parent_features
 
+    undefine_clause = set(parent.undefine)
     inherited = []
     for pf in parent_features:
         if pf.name not in undefine_clause:
             inherited.append(pf)
             continue
 
-        node = pf.node
-        if isinstance(node, Field):
-            node = Method(
-                location=node.location,
-                name=node.name,
-                clients=node.clients,
-                is_deferred=True,
-                return_type=node.value_type,
-            )
-        elif isinstance(node, Method):
-            node = copy.replace(node, is_deferred=True)
-
-        inherited.append(copy.replace(pf, node=node))
+        inherited.append(pf.made_deferred())
 
     return inherited
 
 
 def check_select_clause(
         select_clauses: dict[Parent, SelectedFeatures],
-        parent_to_features: dict[str, list[FeatureRecord]],
-        own_child_features: list[FeatureRecord]) -> None:
+        parent_to_features: dict[Parent, FeatureIndex],
+        own_child_features: FeatureIndex) -> None:
     if not any(
             select_clause.selected_features for select_clause in select_clauses.values()):
         return
@@ -330,7 +420,7 @@ def check_select_clause(
         nonexistent_features = [
             feature_name
             for feature_name in select_clause.selected_features
-            if not any(feature_name == pf.name for pf in parent_features)]
+            if feature_name not in parent_features]
         if nonexistent_features:
             ending = "" if len(nonexistent_features) == 1 else "s"
             raise CompilerError(
@@ -343,7 +433,7 @@ def check_select_clause(
         parents_with_feature = [
             parent.class_name
             for parent, features in parent_to_features.items()
-            if any(feature_name == pf.name for pf in features)]
+            if feature_name in features]
 
         if len(parents_with_feature) < 1:
             # Берем первого родителя, у которого такая фича есть
@@ -355,7 +445,7 @@ def check_select_clause(
     # Проверка, что фичи, указанные в select, не определены в ребенке
     already_defined_in_child = [
         cf
-        for cf in own_child_features
+        for cf in own_child_features.values()
         if cf.name in grouped_by_name
     ]
     if already_defined_in_child:
@@ -388,14 +478,15 @@ def select(
         for feature in clause.selected_features
     }
 
-    all_features = [pf for features in parent_to_features.values()
-                    for pf in features]
+    # Индекс всех фич родителей по имени и классу, в котором они
+    # объявлены; при совпадении берется первая фича, как при переборе
+    all_features = {}
+    for features in parent_to_features.values():
+        for pf in features:
+            all_features.setdefault((pf.name, pf.from_class), pf)
 
     candidate_map = {
-        feature: next(
-            pf for pf in all_features
-            if pf.name == feature and pf.from_class == desired_class
-        )
+        feature: all_features[feature, desired_class]
         for feature, desired_class in select_map.items()
     }
 
@@ -411,8 +502,7 @@ def select(
                     updated_features.append(pf)
                     continue
 
-                new_pf = copy.replace(pf, node=feature.node)
-                selected_features.append(new_pf)
+                selected_features.append(pf.implemented_by(feature, selected=True))
             else:
                 updated_features.append(pf)
         new_parent_to_features[parent] = updated_features
@@ -422,13 +512,12 @@ def select(
 
 def check_create_clause(
         class_decl: ClassDecl,
-        own_child_features: list[FeatureRecord]) -> None:
+        own_child_features: FeatureIndex) -> None:
     create_clause = class_decl.create
     for feature_name in create_clause:
         # Проверка, что имя указанного конструктора действительно есть
         # среди определенных фич
-        candidate = next(
-            (cf for cf in own_child_features if cf.name == feature_name), None)
+        candidate = own_child_features.get(feature_name)
         if candidate is None:
             raise CompilerError(
                 f"Creation procedure '{feature_name}' is not defined in the class '{
@@ -470,19 +559,8 @@ def merge(features: list[FeatureRecord],
     inherited = []
     undefined = []
     for feature_name, features in grouped_by_name.items():
-        effective = [
-            feature
-            for feature in features
-            if not isinstance(feature.node, Method)
-            or not feature.node.is_deferred
-        ]
-
-        deferred = [
-            feature
-            for feature in features
-            if isinstance(feature.node, Method)
-            and feature.node.is_deferred
-        ]
+        effective = [feature for feature in features if not feature.is_deferred]
+        deferred = [feature for feature in features if feature.is_deferred]
 
         if len(effective) == 1:
             effective_feature = effective[0]
@@ -491,7 +569,7 @@ def merge(features: list[FeatureRecord],
 
             if len(deferred) > 0:
                 undefined.extend(
-                    copy.replace(feature, node=effective_feature.node)
+                    feature.implemented_by(effective_feature)
                     for feature in deferred)
             continue
 
@@ -509,6 +587,30 @@ def merge(features: list[FeatureRecord],
     return inherited, undefined
 
 
+def effect(
+        inherited: list[FeatureRecord],
+        own_child_features: FeatureIndex):
+    """Реализует унаследованные отложенные фичи, которые класс объявляет
+    заново. В отличие от переопределения, секция redefine для этого
+    не нужна (см. check_redefine_clause). Как и при слиянии (см. merge),
+    реализованная отложенная фича попадает в undefined.
+
+    Возвращает оставшиеся унаследованные фичи и записи реализованных
+    отложенных фич.
+    """
+    remaining = []
+    effected = []
+    for feature in inherited:
+        own_feature = own_child_features.get(feature.name)
+        if (feature.is_deferred
+                and own_feature is not None
+                and not own_feature.is_deferred):
+            effected.append(feature.implemented_by(own_feature))
+        else:
+            remaining.append(feature)
+    return remaining, effected
+
+
 def remove_duplicates(features: list[FeatureRecord]) -> list[FeatureRecord]:
     seen = set()
     unique_features = []
@@ -526,7 +628,7 @@ def check_if_all_defined(
     deferred_features = [
         feature.node
         for feature in features
-        if isinstance(feature.node, Method) and feature.node.is_deferred]
+        if feature.is_deferred]
 
     if deferred_features and not class_decl.is_deferred:
         info_about_deferred_features = ', '.join([
@@ -543,6 +645,7 @@ contains deferred feature{ending}: {info_about_deferred_features}",
 def split_create_features(
         all_features: list[FeatureRecord],
         constructors_names: list[str]):
+    constructors_names = set(constructors_names)
     constructors = []
     features = []
 
@@ -556,7 +659,11 @@ def split_create_features(
 
 
 def adapt(class_decl: ClassDecl,
-          class_mapping: dict[str, ClassDecl]):
+          tables: dict[str, FlattenClass],
+          stats: FlattenStats | None = None) -> FlattenClass:
+    """Строит таблицу фич класса. Таблицы фич всех родителей
+    должны быть уже построены и находиться в tables.
+    """
     own_child_features = [
         FeatureRecord(
             from_class=class_decl.class_name,
@@ -567,6 +674,7 @@ def adapt(class_decl: ClassDecl,
 
     # 0 этап. Проверяем отсутствие дубликатов в собственных фичах
     check_duplicate_features(own_child_features)
+    own_index = index_features(own_child_features)
 
     child_table = FlattenClass(
         class_decl=class_decl,
@@ -579,27 +687,32 @@ def adapt(class_decl: ClassDecl,
         constructors=[],
         own=own_child_features)
     if not class_decl.inherit:
-        check_create_clause(class_decl, own_child_features)
+        check_create_clause(class_decl, own_index)
         constructors, own_child_features = split_create_features(
             own_child_features, class_decl.create)
         child_table.constructors = constructors
         child_table.own = own_child_features
+        child_table.update_index()
         return child_table
 
     parent_to_features = {}
     select_clauses = {}
 
     for parent in class_decl.inherit:
-        parent_decl = class_mapping[parent.class_name]
-        parent_table = adapt(parent_decl, class_mapping)
+        parent_table = tables[parent.class_name]
         parent_features = parent_table.explicit_features
+        if stats is not None:
+            stats.reused += 1
+            stats.inherited += len(parent_features)
 
         # 1 этап. Применяем rename clause.
         check_rename_clause(
             parent,
-            parent_table.explicit_features,
-            own_child_features)
+            parent_table.explicit_index,
+            own_index)
         renamed, parent_features = rename(parent, parent_features)
+        parent_index = (index_features(parent_features)
+                        if parent.rename else parent_table.explicit_index)
 
         # Добавляем в список renamed фичи из rename clause и унаследованные от
         # родителя.
@@ -609,18 +722,20 @@ def adapt(class_decl: ClassDecl,
         # 2 этап. Применяем undefine clause.
         check_undefine_clause(
             parent,
-            parent_features,
-            own_child_features)
+            parent_index,
+            own_index)
         parent_features = undefine(parent, parent_features)
+        if parent.undefine:
+            parent_index = index_features(parent_features)
         child_table.undefined.extend(parent_table.undefined)
 
         # 3 этап. Применяем redefine clause.
         check_redefine_clause(
             parent,
-            parent_features,
-            own_child_features)
+            parent_index,
+            own_index)
         precursors, redefined, parent_features = redefine(
-            parent, parent_features, own_child_features)
+            parent, parent_features, own_index)
 
         child_table.precursors.extend(precursors)
         child_table.precursors.extend(parent_table.precursors)
@@ -638,8 +753,9 @@ def adapt(class_decl: ClassDecl,
     # 4.2 этап. Применяем select clause.
     check_select_clause(
         select_clauses,
-        parent_to_features,
-        own_child_features)
+        {parent: index_features(features)
+         for parent, features in parent_to_features.items()},
+        own_index)
     parent_to_features, selected_features = select(
         list(select_clauses.values()),
         parent_to_features)
@@ -654,6 +770,10 @@ def adapt(class_decl: ClassDecl,
     # 6 этап. "Сливаем" все фичи вместе
     inherited, undefined = merge(all_features, class_decl)
 
+    # 7 этап. Реализуем отложенные фичи, объявленные в классе заново
+    inherited, effected = effect(inherited, own_index)
+    undefined.extend(effected)
+
     check_if_all_defined(inherited + child_table.own, class_decl)
 
     child_table.renamed = remove_duplicates(child_table.renamed)
@@ -664,29 +784,125 @@ def adapt(class_decl: ClassDecl,
     child_table.inherited = inherited
     child_table.selected = remove_duplicates(selected_features)
 
-    check_create_clause(class_decl, child_table.explicit_features)
+    check_create_clause(
+        class_decl, index_features(child_table.explicit_features))
 
     constructors, own_child_features = split_create_features(
         child_table.own, class_decl.create)
     child_table.constructors = constructors
     child_table.own = own_child_features
+    child_table.update_index()
 
     return child_table
 
 
-def analyze_inheritance(
-        classes: list[ClassDecl],
-        error_collector: ErrorCollector) -> list[FlattenClass]:
-    class_mapping = {decl.class_name: decl for decl in classes}
+def _ancestors_hashes(
+        ancestors: set[str],
+        cache: CompilationCache) -> dict[str, str | None]:
+    return {ancestor: cache.class_hash(ancestor) for ancestor in sorted(ancestors)}
+
+
+def _store_flatten(
+        table: FlattenClass,
+        ancestors_hashes: dict[str, str | None],
+        declarations: dict[str, ClassDecl],
+        cache: CompilationCache) -> None:
+    if None not in ancestors_hashes.values():
+        cache.store_flatten(table, ancestors_hashes, declarations)
+
 
-    tables = []
+def _check_order(classes: list[ClassDecl], known: set[str]) -> None:
+    known = set(known)
     for decl in classes:
-        try:
-            tables.append(adapt(decl, class_mapping))
-        except CompilerError as err:
-            error_collector.add_error(err)
+        for parent in decl.inherit:
+            if parent.class_name not in known:
+                raise ValueError(
+                    f"Class '{parent.class_name}' must be analyzed before '{
+                        decl.class_name}', classes are not in topological order")
+        known.add(decl.class_name)
+
+
+def flatten_classes(
+        classes: list[ClassDecl],
+        error_collector: ErrorCollector,
+        stats: FlattenStats | None = None,
+        cache: CompilationCache | None = None,
+        prebuilt: list[FlattenClass] | None = None) -> dict[str, FlattenClass]:
+    """Строит таблицы фич классов (см. analyze_inheritance), возвращая
+    все таблицы, которые удалось построить, даже если для части
+    классов возникли ошибки.
+
+    :param prebuilt: Уже построенные таблицы (например, из снимка
+    стандартной библиотеки), которые не нужно строить заново
+    """
+    tables = {table.class_name: table for table in prebuilt or ()}
+    _check_order(classes, tables.keys())
+    # Объявления, на которые ссылаются записи таблиц в кэше
+    declarations = {name: table.class_decl for name, table in tables.items()}
+    declarations.update((decl.class_name, decl) for decl in classes)
+    with error_collector.stage("analyze_inheritance"):
+        failed = set()
+        ancestors: dict[str, set[str]] = {}
+        for decl in classes:
+            if any(parent.class_name in failed for parent in decl.inherit):
+                failed.add(decl.class_name)
+                continue
+
+            ancestors[decl.class_name] = set().union(*(
+                {parent.class_name} | ancestors.get(parent.class_name, set())
+                for parent in decl.inherit))
+
+            if decl.class_name in tables:
+                continue
+
+            ancestors_hashes = None
+            if cache is not None:
+                ancestors_hashes = _ancestors_hashes(ancestors[decl.class_name], cache)
+                table = cache.load_flatten(
+                    decl.class_name, ancestors_hashes, declarations)
+                if table is not None:
+                    tables[decl.class_name] = table
+                    if stats is not None:
+                        stats.cached += 1
+                    continue
+
+            try:
+                tables[decl.class_name] = adapt(decl, tables, stats)
+            except CompilerError as err:
+                error_collector.add_error(err)
+                failed.add(decl.class_name)
+                continue
+
+            if stats is not None:
+                stats.computed += 1
+
+            if cache is not None:
+                _store_flatten(
+                    tables[decl.class_name], ancestors_hashes, declarations, cache)
+
+        return tables
+
+
+def analyze_inheritance(
+        classes: list[ClassDecl],
+        error_collector: ErrorCollector,
+        stats: FlattenStats | None = None,
+        cache: CompilationCache | None = None,
+        prebuilt: list[FlattenClass] | None = None) -> list[FlattenClass]:
+    """Строит таблицы фич для всех классов системы. Классы должны быть
+    переданы в топологическом порядке, который возвращает examine_system.
+    Каждая таблица строится ровно один раз, а потомки переиспользуют
+    уже построенные таблицы родителей.
+    Если таблицу класса построить не удалось, его потомки пропускаются -
+    ошибка родителя уже добавлена в error_collector.
+    Если передан кэш (см. serpent/cache.py), таблицы классов, файлы которых
+    и файлы предков которых не изменились, берутся из него.
+    Таблицы из prebuilt (см. serpent/stdlib.py) используются как есть.
+    """
+    tables = flatten_classes(
+        classes, error_collector, stats, cache, prebuilt)
 
     if not error_collector.ok():
         return []
 
-    return tables
+    return list(tables.values())
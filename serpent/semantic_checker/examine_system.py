@@ -56,53 +56,87 @@ def check_duplicated_parents(classes: list[ClassDecl]) -> None:
             seen.add(parent.class_name)
 
 
-def _check_circular_inheritance_for(
-    class_decl: ClassDecl,
-    visited: list[ClassDecl],
-    class_map: dict[str, ClassDecl]
-) -> list[ClassDecl]:
-    """
-    Рекурсивная функция для поиска цикла в иерархии наследования.
-    Если найден цикл, возвращается список классов (цепочка наследования),
-    приводящая к циклическому подключению.
-    Если цикл не обнаружен, возвращается пустой список.
-    """
-    for parent in class_decl.inherit:
-        parent_decl = class_map.get(parent.class_name)
-        if parent_decl is None:
-            continue
-
-        if any(v.class_name == parent_decl.class_name for v in visited):
-            return visited + [parent_decl]
+WHITE, GREY, BLACK = 0, 1, 2
 
-        cycle = _check_circular_inheritance_for(
-            parent_decl, visited + [parent_decl], class_map)
-        if cycle:
-            return cycle
 
-    return []
+def inheritance_order(
+        classes: list[ClassDecl]) -> tuple[list[ClassDecl], list[list[ClassDecl]]]:
+    """
+    Выполняет один итеративный обход в глубину по иерархии наследования,
+    раскрашивая классы в белый (не посещен), серый (в стеке обхода)
+    и черный (обработан) цвета.
+    Возвращает пару: классы в топологическом порядке (каждый родитель
+    раньше своих потомков) и список всех найденных циклов, где каждый
+    цикл - цепочка наследования вида A -> B -> A.
+    Ссылки на несуществующие классы игнорируются.
+    """
+    class_map = {decl.class_name: decl for decl in classes}
+    color = {decl.class_name: WHITE for decl in classes}
 
+    order = []
+    cycles = []
+    for root in classes:
+        if color[root.class_name] != WHITE:
+            continue
 
-def check_circular_inheritance(classes: list[ClassDecl]) -> None:
+        color[root.class_name] = GREY
+        path = [root]
+        stack = [iter(root.inherit)]
+        while stack:
+            parent = next(stack[-1], None)
+            if parent is None:
+                stack.pop()
+                decl = path.pop()
+                color[decl.class_name] = BLACK
+                order.append(decl)
+                continue
+
+            parent_decl = class_map.get(parent.class_name)
+            if parent_decl is None:
+                continue
+
+            parent_color = color[parent_decl.class_name]
+            if parent_color == WHITE:
+                color[parent_decl.class_name] = GREY
+                path.append(parent_decl)
+                stack.append(iter(parent_decl.inherit))
+            elif parent_color == GREY:
+                start = next(
+                    i for i, decl in enumerate(path)
+                    if decl.class_name == parent_decl.class_name)
+                cycles.append(path[start:] + [parent_decl])
+
+    return order, cycles
+
+
+def check_circular_inheritance(
+        classes: list[ClassDecl],
+        error_collector: ErrorCollector) -> list[ClassDecl]:
     """
     Проверяет, что в системе классов отсутствует циклическое наследование.
-    При обнаружении цикла бросается CompilerError с описанием цепочки.
+    Для каждого найденного цикла в error_collector добавляется CompilerError
+    с описанием цепочки.
+    Возвращает классы в топологическом порядке, либо пустой список,
+    если был найден хотя бы один цикл.
     """
-    class_map = {decl.class_name: decl for decl in classes}
+    order, cycles = inheritance_order(classes)
 
-    for decl in classes:
-        cycle = _check_circular_inheritance_for(decl, [decl], class_map)
-        if cycle:
-            # Формируем читаемую цепочку, например: A -> B -> C -> A
-            cycle_names = " -> ".join(c.class_name for c in cycle)
-            raise CompilerError(
-                f"Circular inheritance detected: {cycle_names}",
-                decl.location,
-            )
+    for cycle in cycles:
+        # Формируем читаемую цепочку, например: A -> B -> C -> A
+        cycle_names = " -> ".join(c.class_name for c in cycle)
+        error_collector.add_error(CompilerError(
+            f"Circular inheritance detected: {cycle_names}",
+            cycle[0].location,
+        ))
+
+    if cycles:
+        return []
+
+    return order
 
 
 def examine_system(classes: list[ClassDecl],
-                   error_collector: ErrorCollector) -> None:
+                   error_collector: ErrorCollector) -> list[ClassDecl]:
     """
     Первая стадия семантического анализа.
     Проверяет:
@@ -111,12 +145,22 @@ def examine_system(classes: list[ClassDecl],
       3) Отсутствие дублированных записей родителей;
       4) Отсутствие циклического наследования.
 
-    При возникновении первой ошибки бросается CompilerError, который добавляется в ErrorCollector.
+    При возникновении ошибки в проверках 1-3 бросается CompilerError, который
+    добавляется в ErrorCollector. В проверке 4 в ErrorCollector добавляются
+    все найденные циклы.
+
+    Возвращает классы в топологическом порядке (родители раньше потомков),
+    либо пустой список в случае ошибок. Последующие стадии обходят классы
+    в этом порядке, а не в порядке classes (см. flatten_classes
+    и Program.classes в serpent/driver.py).
     """
-    try:
-        check_duplicated_classes(classes)
-        check_nonexistent_parents(classes)
-        check_duplicated_parents(classes)
-        check_circular_inheritance(classes)
-    except CompilerError as err:
-        error_collector.add_error(err)
+    with error_collector.stage("examine_system"):
+        try:
+            check_duplicated_classes(classes)
+            check_nonexistent_parents(classes)
+            check_duplicated_parents(classes)
+        except CompilerError as err:
+            error_collector.add_error(err)
+            return []
+
+        return check_circular_inheritance(classes, error_collector)
@@ -0,0 +1,184 @@
+"""Снимок стандартной библиотеки: заранее разобранные классы stdlib/*.e
+и построенные для них таблицы фич.
+
+Классы стандартной библиотеки являются неявными предками всех
+пользовательских классов, поэтому вместо их разбора и анализа при
+каждом запуске компилятор загружает снимок, созданный командой
+
+    python -m serpent.stdlib
+
+(или make stdlib). Если исходные файлы библиотеки изменились после
+создания снимка, снимок считается устаревшим и библиотека
+обрабатывается из исходных файлов.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from .errors import CompilerError, ErrorCollector
+from .parser_adapter import parse, make_error_message
+from .semantic_checker.analyze_inheritance import FlattenClass, flatten_classes
+from .semantic_checker.examine_system import examine_system
+from .tree import ClassDecl, make_ast
+
+
+STDLIB_DIR = Path(__file__).resolve().parent.parent / "stdlib"
+SNAPSHOT_PATH = Path("build") / "stdlib.snapshot"
+
+# Версия формата снимка. Должна увеличиваться при изменении
+# классов дерева или FlattenClass, иначе старый снимок не прочитается,
+# а также правил построения таблиц фич, иначе снимок сохранит
+# устаревшие таблицы и ошибки
+SNAPSHOT_VERSION = 7
+
+
+@dataclass
+class Stdlib:
+    # Классы библиотеки в топологическом порядке
+    classes: list[ClassDecl]
+    # Таблицы фич классов, которые удалось построить. Классы, при анализе
+    # которых возникли ошибки, анализируются заново вместе с программой,
+    # чтобы их потомки в программе тоже считались неудавшимися
+    tables: list[FlattenClass]
+    # Ошибки построения таблиц фич классов библиотеки
+    errors: list[CompilerError]
+
+
+def source_hashes(stdlib_dir: Path = STDLIB_DIR) -> dict[str, str]:
+    return {
+        path.name: hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted(stdlib_dir.glob("*.e"))
+    }
+
+
+def compile_stdlib(
+        parser_path: Path | str,
+        stdlib_dir: Path = STDLIB_DIR,
+        library_path: Path | str | None = None) -> Stdlib:
+    """Разбирает и анализирует исходные файлы стандартной библиотеки.
+    Ошибки построения таблиц фич не прерывают анализ, а сохраняются
+    в Stdlib.errors
+
+    :raises RuntimeError: если библиотеку не удалось разобрать
+    или в ней нарушена иерархия классов
+    """
+    classes = []
+    for path in sorted(stdlib_dir.glob("*.e")):
+        source = path.read_text()
+        # Часть файлов библиотеки - пустые заготовки
+        if not source.strip():
+            continue
+
+        # Тела методов библиотеки компилятору не нужны: от ее классов
+        # только наследуются и их фичи только вызываются
+        # Имя файла - относительно каталога библиотеки, чтобы снимок
+        # не зависел от того, где лежит репозиторий
+        file_name = str(path.relative_to(stdlib_dir.parent))
+        stdout, stderr = parse(
+            source, parser_path, library_path, interface_only=True, file_name=file_name)
+        if stderr:
+            raise RuntimeError(
+                f"Couldn't parse {path}:\n{make_error_message(stderr)}")
+        classes.extend(make_ast(json.loads(stdout)))
+
+    error_collector = ErrorCollector()
+    ordered = examine_system(classes, error_collector)
+    if not error_collector.ok():
+        raise RuntimeError(
+            "Invalid standard library:\n"
+            + "\n".join(str(error) for error in error_collector.errors))
+
+    error_collector = ErrorCollector()
+    tables = flatten_classes(ordered, error_collector)
+    return Stdlib(
+        classes=ordered,
+        tables=list(tables.values()),
+        errors=error_collector.errors)
+
+
+def build_snapshot(
+        parser_path: Path | str,
+        snapshot_path: Path = SNAPSHOT_PATH,
+        stdlib_dir: Path = STDLIB_DIR,
+        library_path: Path | str | None = None) -> Stdlib:
+    """Создает снимок стандартной библиотеки"""
+    hashes = source_hashes(stdlib_dir)
+    stdlib = compile_stdlib(parser_path, stdlib_dir, library_path)
+
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=snapshot_path.parent)
+    with os.fdopen(fd, "wb") as file:
+        pickle.dump(
+            (SNAPSHOT_VERSION, hashes, stdlib.classes, stdlib.tables, stdlib.errors),
+            file,
+            pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, snapshot_path)
+
+    return stdlib
+
+
+def load_snapshot(
+        snapshot_path: Path = SNAPSHOT_PATH,
+        stdlib_dir: Path = STDLIB_DIR) -> Stdlib | None:
+    """Загружает снимок стандартной библиотеки
+
+    :return: снимок, либо None, если снимка нет, он поврежден или устарел
+    """
+    try:
+        with open(snapshot_path, "rb") as file:
+            version, hashes, *contents = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError,
+            ValueError, AttributeError, ImportError):
+        return None
+
+    if version != SNAPSHOT_VERSION or hashes != source_hashes(stdlib_dir):
+        return None
+    classes, tables, errors = contents
+    return Stdlib(classes=classes, tables=tables, errors=errors)
+
+
+def load_stdlib(
+        parser_path: Path | str,
+        snapshot_path: Path = SNAPSHOT_PATH,
+        stdlib_dir: Path = STDLIB_DIR,
+        library_path: Path | str | None = None) -> Stdlib:
+    """Возвращает стандартную библиотеку из снимка, а если снимок
+    отсутствует или устарел - из исходных файлов
+    """
+    stdlib = load_snapshot(snapshot_path, stdlib_dir)
+    if stdlib is None:
+        stdlib = compile_stdlib(parser_path, stdlib_dir, library_path)
+    return stdlib
+
+
+def main() -> None:
+    args_parser = argparse.ArgumentParser(
+        description="Build the standard library snapshot")
+    args_parser.add_argument(
+        "--parser", type=Path, default=Path("build") / "eiffelp")
+    args_parser.add_argument(
+        "--library", type=Path, default=Path("build") / "libeiffelp.so")
+    args_parser.add_argument("-o", "--output", type=Path, default=SNAPSHOT_PATH)
+    args = args_parser.parse_args()
+
+    try:
+        stdlib = build_snapshot(args.parser, args.output, library_path=args.library)
+    except RuntimeError as err:
+        print(err, file=sys.stderr)
+        sys.exit(1)
+
+    for error in stdlib.errors:
+        print(error.format(colored=sys.stderr.isatty()), file=sys.stderr)
+    print(f"{args.output}: {len(stdlib.classes)} classes, "
+          f"{len(stdlib.tables)} feature tables, {len(stdlib.errors)} errors")
+
+
+if __name__ == "__main__":
+    main()
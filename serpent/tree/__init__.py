@@ -1,4 +1,6 @@
 from .ast import make_ast
+from .binary import decode_binary_ast, make_ast_from_binary
+from .json_loader import decode_json_ast, make_ast_from_json
 from .class_decl import (
     ClassDecl,
     Parent,
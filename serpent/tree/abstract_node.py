@@ -1,15 +1,163 @@
 from __future__ import annotations
 from abc import ABC
 from dataclasses import dataclass
+import threading
+
+
+# Размеры упакованных в позицию составляющих в обычной раскладке (см. Location)
+_COMPONENT_BITS = 18
+_COMPONENT_MASK = (1 << _COMPONENT_BITS) - 1
+_FILE_BITS = 16
+_FILE_MASK = (1 << _FILE_BITS) - 1
+# Младший бит позиции отличает широкую раскладку от обычной,
+# в широкой за ним следует ширина ее полей
+_WIDE = 1
+_WIDTH_BITS = 8
+_WIDTH_MASK = (1 << _WIDTH_BITS) - 1
+
+
+def _zigzag(number: int) -> int:
+    return number << 1 if number >= 0 else (-number << 1) - 1
+
+
+def _unzigzag(number: int) -> int:
+    return (number >> 1) ^ -(number & 1)
 
 
-@dataclass(frozen=True)
 class Location:
-    first_line: int
-    first_column: int
-    last_line: int
-    last_column: int
-    filename: str | None
+    """Позиция узла в исходном тексте.
+
+    Для экономии памяти позиция хранит одно целое число (_packed),
+    в которое упакованы (от старших битов к младшим) first_line,
+    first_column, количество строк узла, last_column и номер файла в общей
+    таблице имен файлов. Поэтому имя файла хранится один раз для всех
+    позиций файла.
+
+    Обычно на каждую составляющую отводится _COMPONENT_BITS бит, а на номер
+    файла - _FILE_BITS. Если значения в них не помещаются (очень длинные
+    строки, отрицательные значения, слишком много файлов), позиция
+    упаковывается в широкой раскладке, где ширина полей выбирается
+    по наибольшему значению.
+
+    Позиции равны, только если равны все их составляющие; с числами
+    позиции не сравниваются, и любая позиция истинна.
+    """
+
+    __slots__ = ("_packed",)
+
+    _filenames: list[str | None] = [None]
+    _file_ids: dict[str | None, int] = {None: 0}
+    _file_ids_lock = threading.Lock()
+
+    def __init__(
+            self,
+            first_line: int,
+            first_column: int,
+            last_line: int,
+            last_column: int,
+            filename: str | None) -> None:
+        file_id = self._file_ids.get(filename)
+        if file_id is None:
+            file_id = self._register_file(filename)
+
+        line_count = last_line - first_line
+        # Отрицательные числа тоже дают ненулевые биты вне маски
+        if (first_line < 0
+                or (first_column | line_count | last_column) & ~_COMPONENT_MASK
+                or file_id > _FILE_MASK):
+            self._packed = self._pack_wide(
+                first_line, first_column, line_count, last_column, file_id)
+        else:
+            self._packed = (
+                ((((first_line << _COMPONENT_BITS | first_column)
+                   << _COMPONENT_BITS | line_count)
+                  << _COMPONENT_BITS | last_column)
+                 << _FILE_BITS | file_id)
+                << 1)
+
+    @staticmethod
+    def _pack_wide(first_line: int, *fields: int) -> int:
+        # Поля (кроме старшего first_line) имеют одинаковую ширину,
+        # знак каждого поля хранится в его младшем бите
+        fields = [_zigzag(field) for field in fields]
+        width = max(field.bit_length() for field in fields) or 1
+        if width > _WIDTH_MASK:
+            raise ValueError(f"Location component is too large: {max(fields)}")
+
+        packed = _zigzag(first_line)
+        for field in fields:
+            packed = packed << width | field
+        return (packed << _WIDTH_BITS | width) << 1 | _WIDE
+
+    @classmethod
+    def _register_file(cls, filename: str) -> int:
+        with cls._file_ids_lock:
+            file_id = cls._file_ids.get(filename)
+            if file_id is None:
+                file_id = len(cls._filenames)
+                cls._filenames.append(filename)
+                cls._file_ids[filename] = file_id
+            return file_id
+
+    def _field(self, index: int) -> int:
+        """Возвращает поле позиции, начиная с младшего: номер файла,
+        last_column, количество строк, first_column, first_line
+        """
+        packed = self._packed
+        if packed & _WIDE:
+            width = (packed >> 1) & _WIDTH_MASK
+            field = packed >> (1 + _WIDTH_BITS + index * width)
+            if index < 4:
+                field &= (1 << width) - 1
+            return _unzigzag(field)
+
+        if index == 0:
+            return (packed >> 1) & _FILE_MASK
+        field = packed >> (1 + _FILE_BITS + (index - 1) * _COMPONENT_BITS)
+        return field if index == 4 else field & _COMPONENT_MASK
+
+    @property
+    def is_wide(self) -> bool:
+        """Упакована ли позиция в широкой раскладке"""
+        return bool(self._packed & _WIDE)
+
+    @property
+    def filename(self) -> str | None:
+        return self._filenames[self._field(0)]
+
+    @property
+    def last_column(self) -> int:
+        return self._field(1)
+
+    @property
+    def last_line(self) -> int:
+        return self.first_line + self._field(2)
+
+    @property
+    def first_column(self) -> int:
+        return self._field(3)
+
+    @property
+    def first_line(self) -> int:
+        return self._field(4)
+
+    def __reduce__(self):
+        # Номер файла имеет смысл только внутри процесса, поэтому
+        # при сериализации позиция передается по составляющим
+        return (self.__class__, (
+            self.first_line,
+            self.first_column,
+            self.last_line,
+            self.last_column,
+            self.filename))
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not Location:
+            return NotImplemented
+        return self._packed == other._packed
+
+    def __hash__(self) -> int:
+        return hash(self._packed)
 
     def __repr__(self) -> str:
         filename = self.filename or "<input>"
@@ -20,8 +168,24 @@ class Location:
             return f"{filename}@{self.first_line}:{self.first_column}-" \
                 f"{self.last_line}:{self.last_column}"
 
+    __str__ = __repr__
+
+
+def make_location(location: Location | dict) -> Location:
+    """Создает позицию узла по ее словарю из JSON-дерева. Двоичный формат
+    дерева (см. serpent/tree/binary.py) передает позиции уже готовыми.
+    """
+    if type(location) is dict:
+        return Location(
+            location["first_line"],
+            location["first_column"],
+            location["last_line"],
+            location["last_column"],
+            location["filename"])
+    return location
+
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Node(ABC):
     location: Location | None
 
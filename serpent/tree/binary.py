@@ -0,0 +1,172 @@
+from __future__ import annotations
+from itertools import islice
+from typing import Callable
+import gc
+import json
+import struct
+
+from .abstract_node import Location
+from .class_decl import ClassDecl
+from .json_loader import make_object_hook
+
+
+MAGIC = b"EIFB"
+VERSION = 1
+
+TAG_NULL = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_DOUBLE = 4
+TAG_STRING = 5
+TAG_ARRAY = 6
+TAG_OBJECT = 7
+TAG_NODE = 8
+
+DOUBLE = struct.Struct("<d")
+
+
+class BinaryAstError(ValueError):
+    pass
+
+
+def unescape(string: str) -> str:
+    # Парсер хранит строки в том же экранированном виде,
+    # в котором они попадают в JSON
+    if "\\" not in string:
+        return string
+    return json.loads(f'"{string}"')
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_string_table(data: bytes) -> tuple[list[str], int]:
+    if data[:len(MAGIC)] != MAGIC:
+        raise BinaryAstError("Not a binary Eiffel AST")
+    if data[len(MAGIC)] != VERSION:
+        raise BinaryAstError(
+            f"Unsupported binary AST version {data[len(MAGIC)]}, expected {VERSION}")
+
+    count, pos = _read_varint(data, len(MAGIC) + 1)
+    size, pos = _read_varint(data, pos)
+    blob = data[pos:pos + size].decode()
+    strings = [unescape(string) for string in blob.split("\0")[:count]]
+    return strings, pos + size
+
+
+def decode_binary_ast(data: bytes, object_hook: Callable[[dict], object] | None = None):
+    """Декодирует дерево разбора из двоичного формата (eiffelp -b)
+    в словарь того же вида, что и JSON-дерево. Позиции узлов при этом
+    сразу представлены объектами Location, одинаковые позиции
+    разделяют один объект.
+
+    :param data: Дерево разбора в двоичном формате
+    (см. serpent/parser/include/binary.h)
+    :param object_hook: Функция, которой, как и в json.loads, передается
+    каждый декодированный объект (после всех его полей); ее результат
+    заменяет объект в дереве
+
+    :return: словарь с деревом разбора (или результат object_hook для корня)
+    """
+    strings, pos = _read_string_table(data)
+    filenames = [None] + strings
+    locations: dict[tuple, Location] = {}
+
+    # Байты читаются итератором: это заметно быстрее индексации
+    # с ручным отслеживанием позиции
+    stream = iter(memoryview(data)[pos:])
+    next_byte = stream.__next__
+
+    def long_varint(byte: int) -> int:
+        result = byte & 0x7F
+        shift = 7
+        while True:
+            byte = next_byte()
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def varint() -> int:
+        byte = next_byte()
+        return byte if byte < 0x80 else long_varint(byte)
+
+    def fields(obj: dict) -> dict:
+        for _ in range(varint()):
+            name = strings[varint()]
+            obj[name] = value()
+        return obj if object_hook is None else object_hook(obj)
+
+    def value():
+        tag = next_byte()
+
+        if tag == TAG_NODE:
+            kind = strings[varint()]
+            key = (varint(), varint(), varint(), varint(), varint())
+            location = locations.get(key)
+            if location is None:
+                location = locations[key] = Location(*key[:4], filenames[key[4]])
+            return fields({"type": kind, "location": location})
+        if tag == TAG_STRING:
+            return strings[varint()]
+        if tag == TAG_ARRAY:
+            return [value() for _ in range(varint())]
+        if tag == TAG_NULL:
+            return None
+        if tag == TAG_INT:
+            number = varint()
+            return (number >> 1) ^ -(number & 1)
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_DOUBLE:
+            number, = DOUBLE.unpack(bytes(islice(stream, DOUBLE.size)))
+            return number
+        if tag == TAG_OBJECT:
+            return fields({})
+        raise BinaryAstError(f"Unknown tag {tag}")
+
+    try:
+        return value()
+    except StopIteration:
+        raise BinaryAstError("Unexpected end of binary AST")
+
+
+def make_ast_from_binary(
+        data: bytes,
+        decode: Callable[[bytes, Callable[[dict], object]], dict] = decode_binary_ast,
+) -> list[ClassDecl]:
+    """Строит список классов по дереву разбора в двоичном формате за один
+    проход: как и в make_ast_from_json, узлы создаются прямо во время
+    декодирования, по мере того как декодер завершает их (снизу вверх),
+    и дерево из словарей целиком не создается
+
+    :param data: Дерево разбора в двоичном формате
+    :param decode: Декодер: decode_binary_ast или декодер разделяемой
+    библиотеки парсера (SharedParser.decode_binary), который в разы быстрее
+
+    :return: список классов
+    """
+    # Позиции уже декодированы в Location, преобразовывать их не нужно
+    object_hook = make_object_hook(None)
+
+    # Дерево состоит только из новых объектов без циклических ссылок,
+    # поэтому сборщик мусора на время построения отключается: иначе на
+    # больших файлах он забирает бОльшую часть времени
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return decode(data, object_hook)["classes"]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
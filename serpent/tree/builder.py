@@ -0,0 +1,126 @@
+from __future__ import annotations
+from types import GeneratorType
+from typing import Any, Callable, Generator
+
+from .abstract_node import UnknownNodeTypeError
+
+
+# Тип правила-генератора, строящего узел типа T
+type Building[T] = Generator[Any, Any, T]
+
+
+class BuilderTable:
+    """Таблица правил построения узлов одной категории (выражения,
+    инструкции, объявления типов, ...), ключ таблицы - вид узла,
+    т.е. поле "type" словаря узла.
+
+    Правило - функция, принимающая словарь узла и возвращающая узел.
+    Если для построения узла нужны дочерние узлы, правило пишется как
+    генератор: вместо рекурсивного вызова оно отдает через yield запрос
+    на построение и получает обратно готовый узел, например:
+
+        left = yield EXPR(bin_op_dict["left"])
+
+    Запросом может быть:
+    - результат вызова таблицы: table(node_dict, *args);
+    - генератор, построенный по тем же правилам (вспомогательные построители);
+    - список запросов - в ответ будет получен список узлов.
+
+    Все запросы выполняет build с помощью явного стека, поэтому глубина
+    дерева не ограничена глубиной рекурсии Python.
+
+    Вместо словаря запросу можно передать уже построенный узел (так строит
+    дерево однопроходный загрузчик, см. serpent/tree/json_loader.py): он
+    возвращается как есть или через адаптер таблицы для его класса.
+    """
+
+    def __init__(self, kind_name: str) -> None:
+        """
+        :param kind_name: Название вида узлов для сообщения об ошибке
+        """
+        self.kind_name = kind_name
+        self.rules: dict[str, Callable] = {}
+        self.adapters: dict[type, Callable] = {}
+
+    def rule(self, *kinds: str) -> Callable[[Callable], Callable]:
+        """Регистрирует правило для узлов заданных видов"""
+        def register(rule: Callable) -> Callable:
+            for kind in kinds:
+                self.rules[kind] = rule
+            return rule
+        return register
+
+    def adapter(self, *node_types: type) -> Callable[[Callable], Callable]:
+        """Регистрирует адаптер для уже построенных узлов заданных классов,
+        если в этой таблице такой узел должен стать узлом другого класса
+        (например, вызов в позиции инструкции)
+        """
+        def register(adapter: Callable) -> Callable:
+            for node_type in node_types:
+                self.adapters[node_type] = adapter
+            return adapter
+        return register
+
+    def __call__(self, node_dict: dict, *args) -> tuple:
+        """Создает запрос на построение узла. Дополнительные аргументы
+        передаются правилу после словаря узла.
+        """
+        return (self, node_dict, args)
+
+    def build(self, node_dict: dict, *args) -> Any:
+        return build((self, node_dict, args))
+
+
+def _build_all(requests: list) -> Building[list]:
+    nodes = []
+    for request in requests:
+        nodes.append((yield request))
+    return nodes
+
+
+def build(request) -> Any:
+    """Выполняет запрос на построение (см. BuilderTable)
+
+    :param request: Запрос на построение
+
+    :return: построенный узел (или список узлов для списка запросов)
+    """
+    # Генераторы правил, ожидающие построения дочерних узлов
+    stack: list[GeneratorType] = []
+    result = None
+
+    while True:
+        # Запуск построения по запросу
+        request_type = type(request)
+        if request_type is tuple:
+            table, node_dict, args = request
+            if type(node_dict) is dict:
+                rule = table.rules.get(node_dict["type"])
+                if rule is None:
+                    raise UnknownNodeTypeError(
+                        f"Unknown {table.kind_name}: {node_dict["type"]}")
+                result = rule(node_dict, *args)
+            else:
+                adapter = table.adapters.get(type(node_dict))
+                result = node_dict if adapter is None else adapter(node_dict, *args)
+        elif request_type is list:
+            result = _build_all(request) if request else []
+        else:
+            result = request
+
+        if type(result) is GeneratorType:
+            stack.append(result)
+            result = None
+        elif not stack:
+            return result
+
+        # Передача готовых узлов ожидающим их правилам
+        while True:
+            try:
+                request = stack[-1].send(result)
+                break
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                if not stack:
+                    return result
@@ -6,19 +6,19 @@ from .features import Feature, make_feature_list
 from .type_decl import ClassType, GenericSpec, make_type_decl
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Alias(Node):
     original_name: str
     alias_name: str
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class SelectedFeatures:
     class_name: str
     selected_features: list[str]
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Parent(Node):
     class_name: str
     select: SelectedFeatures
@@ -31,7 +31,7 @@ class Parent(Node):
         return hash(self.class_name)
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ClassDecl(Node):
     class_name: str
     is_deferred: bool = True
@@ -43,7 +43,7 @@ class ClassDecl(Node):
 
 def make_class_decl(class_decl_dict: dict) -> ClassDecl:
     class_decl = ClassDecl(
-        location=Location(**class_decl_dict["location"]),
+        location=make_location(class_decl_dict["location"]),
         class_name=class_decl_dict["header"]["name"],
         is_deferred=class_decl_dict["header"]["is_deferred"],
         generics=[
@@ -52,7 +52,7 @@ def make_class_decl(class_decl_dict: dict) -> ClassDecl:
         ],
         inherit=[
             Parent(
-                location=Location(**parent_dict["location"]),
+                location=make_location(parent_dict["location"]),
                 class_name=parent_dict["parent_header"]["name"],
                 generics=[
                     make_generic(generic_dict)
@@ -60,7 +60,7 @@ def make_class_decl(class_decl_dict: dict) -> ClassDecl:
                 ],
                 rename=[
                     Alias(
-                        location=Location(**pair_dict["location"]),
+                        location=make_location(pair_dict["location"]),
                         original_name=pair_dict["original_name"],
                         alias_name=pair_dict["alias_name"],
                     )
@@ -104,7 +104,7 @@ def make_generic(generic_dict: dict) -> GenericSpec:
         required_parent = ClassType(location=None, name="ANY")
 
     return GenericSpec(
-        location=Location(**generic_dict["location"]),
-        template_type_name=generic_dict["generic_type"]["type_name"],
+        location=make_location(generic_dict["location"]),
+        template_type_name=make_type_decl(generic_dict["generic_type"]).name,
         required_parent=required_parent,
     )
@@ -3,89 +3,90 @@ from abc import ABC
 from dataclasses import dataclass, field
 
 from .abstract_node import *
+from .builder import BuilderTable, Building
 
 
 class Expr(Node, ABC):
-    pass
+    __slots__ = ()
 
 
 class ConstantValue(Expr, ABC):
-    pass
+    __slots__ = ()
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class IntegerConst(ConstantValue):
     value: int
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class RealConst(ConstantValue):
     value: float
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class CharacterConst(ConstantValue):
     value: str
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class StringConst(ConstantValue):
     value: str
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class BoolConst(ConstantValue):
     value: bool
 
 
 class VoidConst(ConstantValue):
-    pass
+    __slots__ = ()
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class ManifestTuple(Expr):
     values: list[Expr]
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class ManifestArray(Expr):
     values: list[Expr]
 
 
 class ResultConst(Expr):
-    pass
+    __slots__ = ()
 
 
 class CurrentConst(Expr):
-    pass
+    __slots__ = ()
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class FeatureCall(Expr):
     feature_name: str
     arguments: list[Expr] = field(default_factory=list)
     owner: Expr | None = None
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class PrecursorCall(Expr):
     arguments: list[Expr] = field(default_factory=list)
     ancestor_name: str | None = None
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class CreateExpr(Expr):
     type_name: str
     constructor_call: FeatureCall | None = None
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class ElseifExprBranch(Expr):
     condition: Expr
     expr: Expr
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class IfExpr(Expr):
     condition: Expr
     then_expr: Expr
@@ -93,19 +94,24 @@ class IfExpr(Expr):
     elseif_exprs: list[ElseifExprBranch] = field(default_factory=list)
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class BracketAccess(Expr):
     indexed_expr: Expr
     indices: list[Expr]
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class BinaryOp(Expr):
     left: Expr
     right: Expr
 
 
-class BinaryFeature(BinaryOp, FeatureCall):
+# Слоты BinaryOp и FeatureCall несовместимы для множественного наследования,
+# поэтому BinaryFeature и UnaryFeature наследуют только FeatureCall, а их
+# операнды хранятся в owner и arguments. Принадлежность к BinaryOp
+# и UnaryOp сохраняется регистрацией как виртуальных подклассов.
+class BinaryFeature(FeatureCall):
+    __slots__ = ("symbol_name",)
 
     def __init__(
             self,
@@ -114,7 +120,6 @@ class BinaryFeature(BinaryOp, FeatureCall):
             feature_name: str,
             left: Expr,
             right: Expr) -> None:
-        BinaryOp.__init__(self, location=location, left=left, right=right)
         FeatureCall.__init__(
             self,
             location=location,
@@ -123,13 +128,25 @@ class BinaryFeature(BinaryOp, FeatureCall):
             owner=left)
         self.symbol_name = symbol_name
 
+    @property
+    def left(self) -> Expr:
+        return self.owner
 
-@dataclass(match_args=True, kw_only=True)
+    @property
+    def right(self) -> Expr:
+        return self.arguments[0]
+
+
+BinaryOp.register(BinaryFeature)
+
+
+@dataclass(match_args=True, kw_only=True, slots=True)
 class UnaryOp(Expr):
     argument: Expr
 
 
-class UnaryFeature(UnaryOp, FeatureCall):
+class UnaryFeature(FeatureCall):
+    __slots__ = ("symbol_name",)
 
     def __init__(
             self,
@@ -137,7 +154,6 @@ class UnaryFeature(UnaryOp, FeatureCall):
             symbol_name: str,
             feature_name: str,
             argument: Expr) -> None:
-        UnaryOp.__init__(self, location=location, argument=argument)
         FeatureCall.__init__(
             self,
             location=location,
@@ -145,312 +161,365 @@ class UnaryFeature(UnaryOp, FeatureCall):
             owner=argument)
         self.symbol_name = symbol_name
 
+    @property
+    def argument(self) -> Expr:
+        return self.owner
+
+
+UnaryOp.register(UnaryFeature)
+
 
 class AddOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "+", "plus", left, right)
 
 
 class SubOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "-", "minus", left, right)
 
 
 class MulOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "*", "product", left, right)
 
 
 class DivOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "/", "division", left, right)
 
 
 class MinusOp(UnaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, argument: Expr) -> None:
         super().__init__(location, "-", "opposite", argument)
 
 
 class PlusOp(UnaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, argument: Expr) -> None:
         super().__init__(location, "+", "identity", argument)
 
 
 class IntDivOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "//", "qiotient", left, right)
 
 
 class ModOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "\\\\", "remainder", left, right)
 
 
 class PowOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "^", "power", left, right)
 
 
 class LtOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "<", "less", left, right)
 
 
 class GtOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, ">", "greater", left, right)
 
 
 class EqOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "=", "is_equal", left, right)
 
 
 class NeqOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "/=", "not_equal", left, right)
 
 
 class LeOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, "<=", "less_equal", left, right)
 
 
 class GeOp(BinaryFeature):
+    __slots__ = ()
 
     def __init__(self, *, location: Location, left: Expr, right: Expr) -> None:
         super().__init__(location, ">=", "greater_equal", left, right)
 
 
 class AndOp(BinaryOp):
-    pass
+    __slots__ = ()
 
 
 class OrOp(BinaryOp):
-    pass
+    __slots__ = ()
 
 
 class NotOp(UnaryOp):
-    pass
+    __slots__ = ()
 
 
 class AndThenOp(BinaryOp):
-    pass
+    __slots__ = ()
 
 
 class OrElseOp(BinaryOp):
-    pass
+    __slots__ = ()
 
 
 class XorOp(BinaryOp):
-    pass
+    __slots__ = ()
 
 
 class ImpliesOp(BinaryOp):
-    pass
+    __slots__ = ()
+
+
+EXPR = BuilderTable("expression type")
 
 
 def make_expr(expr_dict: dict) -> Expr:
-    location = Location(**expr_dict["location"])
-    match expr_dict["type"]:
-        case "int_const":
-            return IntegerConst(
-                location=location,
-                value=expr_dict["value"],
-            )
-        case "real_const":
-            return RealConst(
-                location=location,
-                value=expr_dict["value"],
-            )
-        case "char_const":
-            return CharacterConst(
-                location=location,
-                value=expr_dict["value"]
-            )
-        case "string_const":
-            unescaped = (expr_dict["value"]
-                         .encode("raw_unicode_escape")
-                         .decode("unicode_escape")
-                         )
-            return StringConst(
-                location=location,
-                value=unescaped,
-            )
-        case "boolean_const":
-            return BoolConst(
-                location=location,
-                value=expr_dict["value"],
-            )
-        case "result_const":
-            return ResultConst(location=location)
-        case "current_const":
-            return CurrentConst(location=location)
-        case "void_const":
-            return VoidConst(location=location)
-        case "manifest_tuple":
-            return make_manifest_tuple(expr_dict)
-        case "manifest_array":
-            return make_manifest_array(expr_dict)
-        case "feature_call":
-            return make_feature_call(expr_dict)
-        case "precursor_call":
-            return make_precursor_call(expr_dict)
-        case "bracket_access":
-            return make_bracket_access(expr_dict)
-        case "if_expr":
-            return make_if_expr(expr_dict)
-        case "create_expr":
-            return make_create_expr(expr_dict)
-        case "binop":
-            return make_bin_op(expr_dict)
-        case "unop":
-            return make_unary_op(expr_dict)
-        case unknown_type:
-            raise UnknownNodeTypeError(
-                f"Unknown expression type: {unknown_type}")
-
-
-def make_manifest_tuple(manifest_tuple_dict: dict) -> ManifestTuple:
+    return EXPR.build(expr_dict)
+
+
+@EXPR.rule("int_const")
+def make_integer_const(int_const_dict: dict) -> IntegerConst:
+    return IntegerConst(
+        location=make_location(int_const_dict["location"]),
+        value=int_const_dict["value"],
+    )
+
+
+@EXPR.rule("real_const")
+def make_real_const(real_const_dict: dict) -> RealConst:
+    return RealConst(
+        location=make_location(real_const_dict["location"]),
+        value=real_const_dict["value"],
+    )
+
+
+@EXPR.rule("char_const")
+def make_character_const(char_const_dict: dict) -> CharacterConst:
+    return CharacterConst(
+        location=make_location(char_const_dict["location"]),
+        value=char_const_dict["value"],
+    )
+
+
+@EXPR.rule("string_const")
+def make_string_const(string_const_dict: dict) -> StringConst:
+    unescaped = (string_const_dict["value"]
+                 .encode("raw_unicode_escape")
+                 .decode("unicode_escape")
+                 )
+    return StringConst(
+        location=make_location(string_const_dict["location"]),
+        value=unescaped,
+    )
+
+
+@EXPR.rule("boolean_const")
+def make_bool_const(bool_const_dict: dict) -> BoolConst:
+    return BoolConst(
+        location=make_location(bool_const_dict["location"]),
+        value=bool_const_dict["value"],
+    )
+
+
+@EXPR.rule("result_const")
+def make_result_const(result_const_dict: dict) -> ResultConst:
+    return ResultConst(location=make_location(result_const_dict["location"]))
+
+
+@EXPR.rule("current_const")
+def make_current_const(current_const_dict: dict) -> CurrentConst:
+    return CurrentConst(location=make_location(current_const_dict["location"]))
+
+
+@EXPR.rule("void_const")
+def make_void_const(void_const_dict: dict) -> VoidConst:
+    return VoidConst(location=make_location(void_const_dict["location"]))
+
+
+@EXPR.rule("manifest_tuple")
+def make_manifest_tuple(manifest_tuple_dict: dict) -> Building[ManifestTuple]:
     return ManifestTuple(
-        location=Location(**manifest_tuple_dict["location"]),
-        values=[make_expr(value) for value in manifest_tuple_dict["content"]],
+        location=make_location(manifest_tuple_dict["location"]),
+        values=(yield [EXPR(value) for value in manifest_tuple_dict["content"]]),
     )
 
 
-def make_manifest_array(manifest_array_dict: dict) -> ManifestArray:
+@EXPR.rule("manifest_array")
+def make_manifest_array(manifest_array_dict: dict) -> Building[ManifestArray]:
     return ManifestArray(
-        location=Location(**manifest_array_dict["location"]),
-        values=[make_expr(value) for value in manifest_array_dict["content"]],
+        location=make_location(manifest_array_dict["location"]),
+        values=(yield [EXPR(value) for value in manifest_array_dict["content"]]),
     )
 
 
-def make_feature_call(feature_call_dict: dict) -> FeatureCall:
+@EXPR.rule("feature_call")
+def make_feature_call(feature_call_dict: dict) -> FeatureCall | Building[FeatureCall]:
+    # Вызов без аргументов и владельца (обращение к полю, локальной
+    # переменной и т.п.) - самый частый узел, он строится без генератора
+    if not feature_call_dict["feature"]["args_list"] and not feature_call_dict["owner"]:
+        return FeatureCall(
+            location=make_location(feature_call_dict["location"]),
+            feature_name=feature_call_dict["feature"]["name"],
+        )
+    return make_feature_call_with_args(feature_call_dict)
+
+
+def make_feature_call_with_args(feature_call_dict: dict) -> Building[FeatureCall]:
+    owner = feature_call_dict["owner"]
     return FeatureCall(
-        location=Location(**feature_call_dict["location"]),
+        location=make_location(feature_call_dict["location"]),
         feature_name=feature_call_dict["feature"]["name"],
-        arguments=[
-            make_expr(arg) for arg in feature_call_dict["feature"]["args_list"]],
-        owner=make_expr(
-            feature_call_dict["owner"]) if feature_call_dict["owner"] else None,
+        arguments=(yield [
+            EXPR(arg) for arg in feature_call_dict["feature"]["args_list"]]),
+        owner=(yield EXPR(owner)) if owner else None,
     )
 
 
-def make_precursor_call(precursor_call_dict: dict) -> PrecursorCall:
+@EXPR.rule("precursor_call")
+def make_precursor_call(precursor_call_dict: dict) -> Building[PrecursorCall]:
     return PrecursorCall(
-        location=Location(**precursor_call_dict["location"]),
-        arguments=[make_expr(arg) for arg in precursor_call_dict["args_list"]],
+        location=make_location(precursor_call_dict["location"]),
+        arguments=(yield [EXPR(arg) for arg in precursor_call_dict["args_list"]]),
         ancestor_name=precursor_call_dict["parent_name"],
     )
 
 
-def make_bracket_access(bracket_access_dict: dict) -> BracketAccess:
+@EXPR.rule("bracket_access")
+def make_bracket_access(bracket_access_dict: dict) -> Building[BracketAccess]:
     indices = []
     source = bracket_access_dict
 
-    while source["type"] == "bracket_access":
-        indices.append(make_expr(source["index"]))
+    while type(source) is dict and source["type"] == "bracket_access":
+        indices.append(EXPR(source["index"]))
         source = source["source"]
 
+    indices = yield indices
     return BracketAccess(
-        location=Location(**bracket_access_dict["location"]),
-        indexed_expr=make_expr(source),
+        location=make_location(bracket_access_dict["location"]),
+        indexed_expr=(yield EXPR(source)),
         indices=indices,
     )
 
 
-def make_if_expr(if_expr_dict: dict) -> IfExpr:
+def make_elseif_expr(elseif_expr_dict: dict) -> Building[ElseifExprBranch]:
+    return ElseifExprBranch(
+        location=make_location(elseif_expr_dict["location"]),
+        condition=(yield EXPR(elseif_expr_dict["cond"])),
+        expr=(yield EXPR(elseif_expr_dict["expr"])),
+    )
+
+
+@EXPR.rule("if_expr")
+def make_if_expr(if_expr_dict: dict) -> Building[IfExpr]:
     return IfExpr(
-        location=Location(**if_expr_dict["location"]),
-        condition=make_expr(if_expr_dict["cond"]),
-        then_expr=make_expr(if_expr_dict["then_expr"]),
-        else_expr=make_expr(if_expr_dict["else_expr"]),
-        elseif_exprs=[
-            ElseifExprBranch(
-                location=Location(**elseif_expr_dict["location"]),
-                condition=make_expr(elseif_expr_dict["cond"]),
-                expr=make_expr(elseif_expr_dict["expr"]),
-            )
+        location=make_location(if_expr_dict["location"]),
+        condition=(yield EXPR(if_expr_dict["cond"])),
+        then_expr=(yield EXPR(if_expr_dict["then_expr"])),
+        else_expr=(yield EXPR(if_expr_dict["else_expr"])),
+        elseif_exprs=(yield [
+            make_elseif_expr(elseif_expr_dict)
             for elseif_expr_dict in if_expr_dict["elseif_exprs"]
-        ]
+        ]),
     )
 
 
-def make_create_expr(create_expr_dict: dict) -> CreateExpr:
+@EXPR.rule("create_expr")
+def make_create_expr(create_expr_dict: dict) -> Building[CreateExpr]:
+    constructor_call = create_expr_dict["constructor_call"]
     return CreateExpr(
-        location=Location(
-            **create_expr_dict["location"]),
+        location=make_location(create_expr_dict["location"]),
         type_name=create_expr_dict["type_name"],
         constructor_call=(
-            make_feature_call(
-                create_expr_dict["constructor_call"]) if create_expr_dict["constructor_call"] else None),
+            (yield make_feature_call(constructor_call)) if constructor_call else None),
     )
 
 
-def make_bin_op(bin_op_dict: dict) -> BinaryOp:
-    bin_type_mapping = {
-        "add_op": AddOp,
-        "sub_op": SubOp,
-        "mul_op": MulOp,
-        "div_op": DivOp,
-        "int_div_op": IntDivOp,
-        "mod_op": ModOp,
-        "pow_op": PowOp,
-        "and_op": AndOp,
-        "or_op": OrOp,
-        "and_then_op": AndThenOp,
-        "or_else_op": OrElseOp,
-        "implies_op": ImpliesOp,
-        "xor_op": XorOp,
-        "lt_op": LtOp,
-        "gt_op": GtOp,
-        "le_op": LeOp,
-        "ge_op": GeOp,
-        "eq_op": EqOp,
-        "neq_op": NeqOp,
-    }
-
+BINARY_OPERATORS = {
+    "add_op": AddOp,
+    "sub_op": SubOp,
+    "mul_op": MulOp,
+    "div_op": DivOp,
+    "int_div_op": IntDivOp,
+    "mod_op": ModOp,
+    "pow_op": PowOp,
+    "and_op": AndOp,
+    "or_op": OrOp,
+    "and_then_op": AndThenOp,
+    "or_else_op": OrElseOp,
+    "implies_op": ImpliesOp,
+    "xor_op": XorOp,
+    "lt_op": LtOp,
+    "gt_op": GtOp,
+    "le_op": LeOp,
+    "ge_op": GeOp,
+    "eq_op": EqOp,
+    "neq_op": NeqOp,
+}
+
+
+@EXPR.rule("binop")
+def make_bin_op(bin_op_dict: dict) -> Building[BinaryOp]:
     node_type = bin_op_dict["binop_type"]
-    op_class = bin_type_mapping.get(node_type)
+    op_class = BINARY_OPERATORS.get(node_type)
     if op_class is None:
         raise UnknownNodeTypeError(
             f"Unknown binary expression type: {node_type}")
 
     return op_class(
-        location=Location(**bin_op_dict["location"]),
-        left=make_expr(bin_op_dict["left"]),
-        right=make_expr(bin_op_dict["right"]),
+        location=make_location(bin_op_dict["location"]),
+        left=(yield EXPR(bin_op_dict["left"])),
+        right=(yield EXPR(bin_op_dict["right"])),
     )
 
 
-def make_unary_op(unary_op_dict: dict) -> UnaryOp:
-    unary_op_mapping = {
-        "unary_minus_op": MinusOp,
-        "unary_plus_op": PlusOp,
-        "not_op": NotOp,
-    }
+UNARY_OPERATORS = {
+    "unary_minus_op": MinusOp,
+    "unary_plus_op": PlusOp,
+    "not_op": NotOp,
+}
+
 
+@EXPR.rule("unop")
+def make_unary_op(unary_op_dict: dict) -> Building[UnaryOp]:
     node_type = unary_op_dict["unop_type"]
-    op_class = unary_op_mapping.get(node_type)
+    op_class = UNARY_OPERATORS.get(node_type)
     if op_class is None:
         raise UnknownNodeTypeError(
             f"Unknown unary expression type: {node_type}")
 
     return op_class(
-        location=Location(**unary_op_dict["location"]),
-        argument=make_expr(unary_op_dict["arg"]),
+        location=make_location(unary_op_dict["location"]),
+        argument=(yield EXPR(unary_op_dict["arg"])),
     )
@@ -1,49 +1,50 @@
 from __future__ import annotations
 from abc import ABC
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 
 from .abstract_node import *
-from .type_decl import TypeDecl, make_type_decl
-from .stmts import Statement, Assignment, make_stmt
-from .expr import Expr, ResultConst, make_expr
+from .builder import BuilderTable, Building, build
+from .type_decl import TYPE_DECL, TypeDecl
+from .stmts import STMT, Statement, Assignment
+from .expr import EXPR, Expr, ResultConst
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class Feature(Node, ABC):
     name: str
     clients: list[str]
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class Field(Feature):
     value_type: TypeDecl
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class Constant(Feature):
     value_type: TypeDecl
     constant_value: Expr
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class Parameter(Node):
     name: str
     value_type: TypeDecl
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class LocalVarDecl(Node):
     name: str
     value_type: TypeDecl
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class Condition(Node):
     condition_expr: Expr
     tag: str | None = None
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class BaseMethod(Feature, ABC):
     return_type: TypeDecl
     parameters: list[Parameter] = field(default_factory=list)
@@ -51,21 +52,82 @@ class BaseMethod(Feature, ABC):
     ensure: list[Condition] = field(default_factory=list)
 
 
-@dataclass(match_args=True, kw_only=True)
+# Поля метода, которые строятся по требованию (см. Method)
+LAZY_METHOD_FIELDS = ("do", "local_var_decls", "require", "ensure")
+
+
+@dataclass(match_args=True, kw_only=True, slots=True)
 class Method(BaseMethod):
+    """Метод с телом.
+
+    Метод, созданный через Method.lazy (так его строит make_method), хранит
+    тело и контракты в виде словаря из дерева разбора (raw_body) и строит их
+    при первом обращении к любому из полей LAZY_METHOD_FIELDS. Для анализа
+    наследования достаточно сигнатур, поэтому тела большинства методов
+    (например, методов стандартной библиотеки) не строятся вовсе.
+    """
     is_deferred: bool
     do: list[Statement] = field(default_factory=list)
     local_var_decls: list[LocalVarDecl] = field(default_factory=list)
+    # Словарь тела метода (узел routine_body), пока тело не построено
+    raw_body: dict | None = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def lazy(cls, raw_body: dict, **kwargs) -> Method:
+        """Создает метод, тело и контракты которого будут построены
+        по raw_body при первом обращении к ним
+        """
+        method = cls(raw_body=raw_body, **kwargs)
+        # Незаполненный слот при чтении вызывает __getattr__
+        for name in LAZY_METHOD_FIELDS:
+            delattr(method, name)
+        return method
+
+    @property
+    def is_body_built(self) -> bool:
+        return self.raw_body is None
+
+    def __getattr__(self, name: str):
+        # Вызывается только для незаполненных слотов, т.е. для еще
+        # не построенных полей тела
+        if name not in LAZY_METHOD_FIELDS:
+            raise AttributeError(name)
+
+        raw_body = self.raw_body
+        if raw_body is not None:
+            body = build(make_method_body(raw_body))
+            for body_field in LAZY_METHOD_FIELDS:
+                setattr(self, body_field, body[body_field])
+            # Сбрасывается последним: если тело строится одновременно
+            # в другом потоке, он увидит None только после заполнения полей
+            self.raw_body = None
+        return object.__getattribute__(self, name)
+
+    def __getstate__(self) -> dict:
+        # Непостроенное тело сохраняется (в кэш, снимок стандартной
+        # библиотеки, другой процесс) как есть, без построения
+        return {
+            method_field.name: getattr(self, method_field.name)
+            for method_field in fields(self)
+            if self.is_body_built or method_field.name not in LAZY_METHOD_FIELDS
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class ExternalMethod(BaseMethod):
     language: str
     alias: str
 
 
+FEATURE = BuilderTable("feature node type")
+
+
 def make_feature_list(feature_clauses: list) -> list[Feature]:
-    features: list[Feature] = []
+    requests = []
 
     for feature_clause in feature_clauses:
         # По умолчанию, если клиенты не указаны,
@@ -73,153 +135,178 @@ def make_feature_list(feature_clauses: list) -> list[Feature]:
         clients = feature_clause["clients"] or ["ANY"]
 
         for feature_dict in feature_clause["feature_list"]:
-            feature_dicts = separate_declarations(feature_dict)
-
-            for feature_dict in feature_dicts:
-                match feature_dict["type"]:
-                    case "class_field":
-                        features.append(make_field(clients, feature_dict))
-                    case "class_constant":
-                        features.append(make_constant(clients, feature_dict))
-                    case "class_routine":
-                        match feature_dict["body"]["type"]:
-                            case "routine_body":
-                                features.append(make_method(
-                                    clients, feature_dict))
-                            case "external_routine_body":
-                                features.append(
-                                    make_external_method(
-                                        clients, feature_dict))
-                            case unknown_body_type:
-                                raise UnknownNodeTypeError(
-                                    f"Unknown feature body type: {unknown_body_type}")
-                    case unknown_feature_type:
-                        raise UnknownNodeTypeError(
-                            f"Unknown feature node type: {unknown_feature_type}")
-
-    return features
-
-
-def make_field(clients: list[str], field_dict: dict) -> Field:
+            requests.extend(
+                FEATURE(feature_dict, clients)
+                for feature_dict in separate_declarations(feature_dict))
+
+    return build(requests)
+
+
+@FEATURE.rule("class_field")
+def make_field(field_dict: dict, clients: list[str]) -> Building[Field]:
     return Field(
-        location=Location(**field_dict["location"]),
+        location=make_location(field_dict["location"]),
         name=field_dict["name_and_type"]["name"],
         clients=clients,
-        value_type=make_type_decl(field_dict["name_and_type"]["field_type"]),
+        value_type=(yield TYPE_DECL(field_dict["name_and_type"]["field_type"])),
     )
 
 
-def make_constant(clients: list[str], constant_dict: dict) -> Constant:
+@FEATURE.rule("class_constant")
+def make_constant(constant_dict: dict, clients: list[str]) -> Building[Constant]:
     return Constant(
-        location=Location(**constant_dict["location"]),
+        location=make_location(constant_dict["location"]),
         name=constant_dict["name_and_type"]["name"],
         clients=clients,
-        value_type=make_type_decl(
-            constant_dict["name_and_type"]["field_type"]),
-        constant_value=make_expr(
-            constant_dict["constant_value"]),
+        value_type=(yield TYPE_DECL(
+            constant_dict["name_and_type"]["field_type"])),
+        constant_value=(yield EXPR(
+            constant_dict["constant_value"])),
     )
 
 
-def make_parameters(parameters_list: list) -> list[Parameter]:
-    parameters: list[Parameter] = []
-
-    for parameter_dict in parameters_list:
-        parameter_dicts = separate_declarations(parameter_dict)
-
-        parameters.extend(
-            Parameter(
-                location=Location(**parameter_dict["location"]),
-                name=parameter_dict["name_and_type"]["name"],
-                value_type=make_type_decl(parameter_dict["name_and_type"]["field_type"]),
-            )
-            for parameter_dict in parameter_dicts
+@FEATURE.rule("class_routine")
+def make_routine(routine_dict: dict, clients: list[str]) -> Building[BaseMethod]:
+    match routine_dict["body"]["type"]:
+        case "routine_body":
+            return make_method(routine_dict, clients)
+        case "routine_interface":
+            return make_method_interface(routine_dict, clients)
+        case "external_routine_body":
+            return make_external_method(routine_dict, clients)
+        case unknown_body_type:
+            raise UnknownNodeTypeError(
+                f"Unknown feature body type: {unknown_body_type}")
+
+
+def make_parameters(parameters_list: list) -> Building[list[Parameter]]:
+    parameter_dicts = [
+        separated_dict
+        for parameter_dict in parameters_list
+        for separated_dict in separate_declarations(parameter_dict)
+    ]
+    value_types = yield [
+        TYPE_DECL(parameter_dict["name_and_type"]["field_type"])
+        for parameter_dict in parameter_dicts
+    ]
+
+    return [
+        Parameter(
+            location=make_location(parameter_dict["location"]),
+            name=parameter_dict["name_and_type"]["name"],
+            value_type=value_type,
         )
-
-    return parameters
-
-
-def make_local_var_decls(var_decl_list: list) -> list[LocalVarDecl]:
-    var_decls: list[LocalVarDecl] = []
-
-    for var_decl_dict in var_decl_list:
-        var_decls_dicts = separate_declarations(var_decl_dict)
-
-        var_decls.extend(
-            LocalVarDecl(
-                location=Location(**var_decl_dict["location"]),
-                name=var_decl_dict["name_and_type"]["name"],
-                value_type=make_type_decl(var_decl_dict["name_and_type"]["field_type"]),
-            )
-            for var_decl_dict in var_decls_dicts
+        for parameter_dict, value_type in zip(parameter_dicts, value_types)
+    ]
+
+
+def make_local_var_decls(var_decl_list: list) -> Building[list[LocalVarDecl]]:
+    var_decl_dicts = [
+        separated_dict
+        for var_decl_dict in var_decl_list
+        for separated_dict in separate_declarations(var_decl_dict)
+    ]
+    value_types = yield [
+        TYPE_DECL(var_decl_dict["name_and_type"]["field_type"])
+        for var_decl_dict in var_decl_dicts
+    ]
+
+    return [
+        LocalVarDecl(
+            location=make_location(var_decl_dict["location"]),
+            name=var_decl_dict["name_and_type"]["name"],
+            value_type=value_type,
         )
+        for var_decl_dict, value_type in zip(var_decl_dicts, value_types)
+    ]
 
-    return var_decls
 
+def make_condition(condition_dict: dict) -> Building[Condition]:
+    return Condition(
+        location=make_location(condition_dict["location"]),
+        condition_expr=(yield EXPR(condition_dict["cond"])),
+        tag=condition_dict["tag"],
+    )
 
-def make_conditions(condition_list: list) -> list[Condition]:
-    conditions = []
-
-    for condition_dict in condition_list:
-        condition = Condition(
-            location=Location(**condition_dict["location"]),
-            condition_expr=make_expr(condition_dict["cond"]),
-            tag=condition_dict["tag"],
-        )
-        conditions.append(condition)
 
-    return conditions
+def make_conditions(condition_list: list) -> list:
+    return [make_condition(condition_dict) for condition_dict in condition_list]
 
 
-def make_do(method_dict: dict) -> list[Statement]:
-    body = method_dict["body"]
-    stmts = [make_stmt(stmt_dict) for stmt_dict in body["do"]]
+def make_do(body: dict) -> Building[list[Statement]]:
+    stmts = yield [STMT(stmt_dict) for stmt_dict in body["do"]]
 
     then = body["then"]
     if then is not None:
+        value = yield EXPR(then)
         stmts.append(
             Assignment(
-                location=Location(**then["location"]),
+                location=value.location,
                 target=ResultConst(location=None),
-                value=make_expr(then)
+                value=value
             )
         )
 
     return stmts
 
 
-def make_method(clients: list[str], method_dict: dict) -> Method:
+def make_method_body(body: dict) -> Building[dict]:
+    """Строит поля тела метода (LAZY_METHOD_FIELDS) по узлу routine_body
+
+    :return: словарь из имени поля в его значение
+    """
+    return {
+        "do": (yield make_do(body)),
+        "local_var_decls": (yield make_local_var_decls(body["local"])),
+        "require": (yield make_conditions(body["require"])),
+        "ensure": (yield make_conditions(body["ensure"])),
+    }
+
+
+def make_method(method_dict: dict, clients: list[str]) -> Building[Method]:
+    # Сигнатура строится сразу, а тело - при первом обращении к нему
+    return Method.lazy(
+        method_dict["body"],
+        location=make_location(method_dict["location"]),
+        name=method_dict["name_and_type"]["name"],
+        clients=clients,
+        is_deferred=method_dict["body"]["is_deferred"],
+        return_type=(yield TYPE_DECL(method_dict["name_and_type"]["field_type"])),
+        parameters=(yield make_parameters(method_dict["params"])),
+    )
+
+
+def make_method_interface(method_dict: dict, clients: list[str]) -> Building[Method]:
+    """Строит метод без тела и контрактов по узлу интерфейса подпрограммы
+    (дерево разбора только интерфейса, eiffelp -i)
+    """
     return Method(
-        location=Location(**method_dict["location"]),
+        location=make_location(method_dict["location"]),
         name=method_dict["name_and_type"]["name"],
         clients=clients,
         is_deferred=method_dict["body"]["is_deferred"],
-        return_type=make_type_decl(method_dict["name_and_type"]["field_type"]),
-        parameters=make_parameters(method_dict["params"]),
-        do=make_do(method_dict),
-        local_var_decls=make_local_var_decls(method_dict["body"]["local"]),
-        require=make_conditions(method_dict["body"]["require"]),
-        ensure=make_conditions(method_dict["body"]["ensure"]),
+        return_type=(yield TYPE_DECL(method_dict["name_and_type"]["field_type"])),
+        parameters=(yield make_parameters(method_dict["params"])),
     )
 
 
 def make_external_method(
-        clients: list[str],
-        external_method_dict: dict) -> ExternalMethod:
+        external_method_dict: dict,
+        clients: list[str]) -> Building[ExternalMethod]:
     return ExternalMethod(
-        location=Location(**external_method_dict["location"]),
+        location=make_location(external_method_dict["location"]),
         name=external_method_dict["name_and_type"]["name"],
         clients=clients,
         language=external_method_dict["body"]["language"],
-        return_type=make_type_decl(
-            external_method_dict["name_and_type"]["field_type"]),
-        parameters=make_parameters(
-            external_method_dict["params"]),
+        return_type=(yield TYPE_DECL(
+            external_method_dict["name_and_type"]["field_type"])),
+        parameters=(yield make_parameters(
+            external_method_dict["params"])),
         alias=external_method_dict["body"]["alias"],
-        require=make_conditions(
-            external_method_dict["body"]["require"]),
-        ensure=make_conditions(
-            external_method_dict["body"]["ensure"]),
+        require=(yield make_conditions(
+            external_method_dict["body"]["require"])),
+        ensure=(yield make_conditions(
+            external_method_dict["body"]["ensure"])),
     )
 
 
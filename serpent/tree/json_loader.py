@@ -0,0 +1,152 @@
+from __future__ import annotations
+from types import GeneratorType
+from typing import Callable
+import gc
+import json
+
+from .abstract_node import Location
+from .builder import build
+from .class_decl import ClassDecl, make_class_decl
+from .expr import EXPR
+from .stmts import STMT
+from .type_decl import TYPE_DECL
+
+
+# Узлы, которые разбирают словари своих дочерних узлов сами, а не через
+# таблицы правил, поэтому их дочерние узлы остаются словарями: bracket_access
+# (цепочка индексаций) и current_const (like Current)
+_DEFERRED_KINDS = {"bracket_access", "current_const"}
+
+# Вызовы строятся как выражения, в позиции инструкции их адаптирует STMT
+_RULES = {
+    kind: rule
+    for table in (TYPE_DECL, STMT, EXPR)
+    for kind, rule in table.rules.items()
+    if kind not in _DEFERRED_KINDS
+}
+
+
+# Начало JSON-дерева с компактными позициями (eiffelp -c): таблица имен
+# файлов - первое поле корня, поэтому ее можно прочитать до остального дерева
+_FILE_TABLE_PREFIX = '{"files":'
+
+_decoder = json.JSONDecoder()
+
+
+def read_file_table(json_text: str) -> list[str | None] | None:
+    """Читает таблицу имен файлов JSON-дерева с компактными позициями
+    (eiffelp -c), не декодируя остальное дерево
+
+    :param json_text: Дерево разбора в формате JSON
+
+    :return: таблица имен файлов, либо None, если позиции не компактные
+    """
+    if not json_text.startswith(_FILE_TABLE_PREFIX):
+        return None
+    files, _ = _decoder.raw_decode(json_text, len(_FILE_TABLE_PREFIX))
+    return files
+
+
+def _location_decoder(files: list[str | None]) -> Callable[[list], Location]:
+    """Возвращает функцию, превращающую компактную позицию
+    [first_line, first_column, last_line, last_column, индекс файла]
+    в Location. Одинаковые позиции разделяют один объект.
+    """
+    locations: dict[tuple, Location] = {}
+
+    def decode_location(location: list) -> Location:
+        key = tuple(location)
+        shared = locations.get(key)
+        if shared is None:
+            shared = locations[key] = Location(
+                key[0], key[1], key[2], key[3], files[key[4]])
+        return shared
+
+    return decode_location
+
+
+def make_object_hook(decode_location: Callable[[list], Location] | None):
+    """Возвращает object_hook, строящий узлы из словарей, дочерние узлы
+    которых уже построены. Используется и декодером двоичного формата
+    (см. decode_binary_ast).
+
+    :param decode_location: Функция, превращающая компактную позицию
+    в Location, либо None, если позиции узлов уже не нужно преобразовывать
+    """
+    def object_hook(obj: dict):
+        kind = obj.get("type")
+        if kind is None:
+            if "first_line" in obj:
+                return Location(
+                    obj["first_line"],
+                    obj["first_column"],
+                    obj["last_line"],
+                    obj["last_column"],
+                    obj["filename"])
+            return obj
+
+        if decode_location is not None:
+            obj["location"] = decode_location(obj["location"])
+        rule = _RULES.get(kind)
+        if rule is not None:
+            # Дочерние узлы уже построены, поэтому правило-генератор
+            # получает их от build сразу, без обхода поддерева
+            node = rule(obj)
+            return build(node) if type(node) is GeneratorType else node
+        if kind == "class_decl":
+            return make_class_decl(obj)
+        return obj
+
+    return object_hook
+
+
+def decode_json_ast(json_text: str) -> dict:
+    """Декодирует JSON-дерево разбора в словарь (как json.loads).
+    Компактные позиции (eiffelp -c) при этом сразу превращаются
+    в объекты Location, одинаковые позиции разделяют один объект,
+    как и в decode_binary_ast.
+
+    :param json_text: Дерево разбора в формате JSON
+
+    :return: словарь с деревом разбора
+    """
+    files = read_file_table(json_text)
+    if files is None:
+        return json.loads(json_text)
+
+    decode_location = _location_decoder(files)
+
+    def object_hook(obj: dict) -> dict:
+        if "location" in obj:
+            obj["location"] = decode_location(obj["location"])
+        return obj
+
+    return json.loads(json_text, object_hook=object_hook)
+
+
+def make_ast_from_json(json_text: str | bytes) -> list[ClassDecl]:
+    """Строит список классов по JSON-дереву разбора за один проход:
+    узлы создаются прямо во время декодирования JSON, по мере того как
+    декодер завершает объекты (снизу вверх), поэтому дерево из словарей
+    целиком не создается. Результат совпадает с make_ast(json.loads(...)).
+    Позиции узлов могут быть как обычными, так и компактными (eiffelp -c).
+
+    :param json_text: Дерево разбора в формате JSON (вывод eiffelp)
+
+    :return: список классов
+    """
+    if type(json_text) is bytes:
+        json_text = json_text.decode()
+    files = read_file_table(json_text)
+    object_hook = make_object_hook(
+        _location_decoder(files) if files is not None else None)
+
+    # Как и в make_ast_from_binary, создаются только новые объекты без
+    # циклических ссылок, и сборщик мусора лишь замедлил бы построение
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return json.loads(json_text, object_hook=object_hook)["classes"]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
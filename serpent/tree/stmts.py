@@ -3,39 +3,40 @@ from abc import ABC
 from dataclasses import dataclass
 
 from .abstract_node import *
-from .expr import Expr, FeatureCall, PrecursorCall, make_expr, make_feature_call, make_precursor_call
+from .builder import BuilderTable, Building, build
+from .expr import EXPR, Expr, FeatureCall, PrecursorCall, make_feature_call, make_precursor_call
 
 
 class Statement(Node, ABC):
-    pass
+    __slots__ = ()
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class Assignment(Statement):
     target: str | Expr
     value: Expr
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class CreateStmt(Statement):
     constructor_call: FeatureCall
     type_name: str | None
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class ConstructorCall(Node):
     object_name: str
     constructor_name: str | None
     arguments: list[Expr]
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class ElseifBranch(Statement):
     condition: Expr
     body: list[Statement]
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class IfStmt(Statement):
     condition: Expr
     then_branch: list[Statement]
@@ -43,7 +44,7 @@ class IfStmt(Statement):
     elseif_branches: list[ElseifBranch]
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class LoopStmt(Statement):
     init_stmts: list[Statement]
     until_cond: Expr
@@ -51,74 +52,65 @@ class LoopStmt(Statement):
 
 
 class Choice(Node, ABC):
-    pass
+    __slots__ = ()
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class ValueChoice(Choice):
     value: Expr
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class IntervalChoice(Choice):
     start: Expr
     end: Expr
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class WhenBranch(Statement):
     choices: list[Choice]
     body: list[Statement]
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class InspectStmt(Statement):
     expr: Expr
     when_branches: list[WhenBranch]
     else_branch: list[Statement]
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class RoutineCall(Statement):
     feature_call: FeatureCall
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class PrecursorCallStmt(Statement):
     precursor_call: PrecursorCall
 
 
+STMT = BuilderTable("statement type")
+
+
 def make_stmt(stmt_dict: dict) -> Statement:
-    match stmt_dict["type"]:
-        case "assign_stmt":
-            return make_assignment_stmt(stmt_dict)
-        case "create_stmt":
-            return make_create_stmt(stmt_dict)
-        case "if_stmt":
-            return make_if_stmt(stmt_dict)
-        case "loop_stmt":
-            return make_loop_stmt(stmt_dict)
-        case "inspect_stmt":
-            return make_inspect_stmt(stmt_dict)
-        case "feature_call":
-            return make_call_stmt(stmt_dict)
-        case "precursor_call":
-            return make_precursor_stmt(stmt_dict)
-        case unknown_node_type:
-            raise UnknownNodeTypeError(
-                f"Unknown statement type: {unknown_node_type}")
-
-
-def make_create_stmt(create_stmt_dict: dict) -> CreateStmt:
+    return STMT.build(stmt_dict)
+
+
+def make_stmts(stmts: list) -> list[Statement]:
+    return build([STMT(stmt_dict) for stmt_dict in stmts])
+
+
+@STMT.rule("create_stmt")
+def make_create_stmt(create_stmt_dict: dict) -> Building[CreateStmt]:
     return CreateStmt(
-        location=Location(**create_stmt_dict["location"]),
-        constructor_call=make_constructor_call(
-            create_stmt_dict["constructor_call"]),
+        location=make_location(create_stmt_dict["location"]),
+        constructor_call=(yield make_constructor_call(
+            create_stmt_dict["constructor_call"])),
         type_name=create_stmt_dict["type_name"],
     )
 
 
-def make_constructor_call(constructor_call_dict: dict) -> FeatureCall:
+def make_constructor_call(constructor_call_dict: dict) -> Building[ConstructorCall]:
     constructor_name = (
         None
         if constructor_call_dict["feature"] is None
@@ -130,97 +122,124 @@ def make_constructor_call(constructor_call_dict: dict) -> FeatureCall:
         else constructor_call_dict["feature"]["args_list"]
     )
     return ConstructorCall(
-        location=Location(**constructor_call_dict["location"]),
+        location=make_location(constructor_call_dict["location"]),
         object_name=constructor_call_dict["object"],
         constructor_name=constructor_name,
-        arguments=[make_expr(arg) for arg in args_list],
+        arguments=(yield [EXPR(arg) for arg in args_list]),
     )
 
 
-def make_assignment_stmt(assignment_stmt_dict: dict) -> Assignment:
+@STMT.rule("assign_stmt")
+def make_assignment_stmt(assignment_stmt_dict: dict) -> Building[Assignment]:
     left = assignment_stmt_dict["left"]
     return Assignment(
-        location=Location(
-            **assignment_stmt_dict["location"]),
-        target=left["value"] if left["type"] == "ident_lit" else make_expr(left),
-        value=make_expr(
-            assignment_stmt_dict["right"]),
+        location=make_location(assignment_stmt_dict["location"]),
+        target=(
+            left["value"] if type(left) is dict and left["type"] == "ident_lit"
+            else (yield EXPR(left))),
+        value=(yield EXPR(assignment_stmt_dict["right"])),
     )
 
 
-def make_if_stmt(if_stmt_dict: dict) -> IfStmt:
+def make_elseif_branch(elseif_branch_dict: dict) -> Building[ElseifBranch]:
+    return ElseifBranch(
+        location=make_location(elseif_branch_dict["location"]),
+        condition=(yield EXPR(elseif_branch_dict["cond"])),
+        body=(yield [STMT(stmt_dict) for stmt_dict in elseif_branch_dict["body"]]),
+    )
+
+
+@STMT.rule("if_stmt")
+def make_if_stmt(if_stmt_dict: dict) -> Building[IfStmt]:
     return IfStmt(
-        location=Location(**if_stmt_dict["location"]),
-        condition=make_expr(if_stmt_dict["cond"]),
-        then_branch=make_stmts(if_stmt_dict["then_clause"]),
-        else_branch=make_stmts(if_stmt_dict["else_clause"]),
-        elseif_branches=[
-            ElseifBranch(
-                location=Location(**elseif_branch_dict["location"]),
-                condition=make_expr(elseif_branch_dict["cond"]),
-                body=make_stmts(elseif_branch_dict["body"]),
-            )
+        location=make_location(if_stmt_dict["location"]),
+        condition=(yield EXPR(if_stmt_dict["cond"])),
+        then_branch=(yield [
+            STMT(stmt_dict) for stmt_dict in if_stmt_dict["then_clause"]]),
+        else_branch=(yield [
+            STMT(stmt_dict) for stmt_dict in if_stmt_dict["else_clause"]]),
+        elseif_branches=(yield [
+            make_elseif_branch(elseif_branch_dict)
             for elseif_branch_dict in if_stmt_dict["elseif_clauses"]
-        ],
+        ]),
     )
 
 
-def make_loop_stmt(loop_stmt_dict: dict) -> LoopStmt:
+@STMT.rule("loop_stmt")
+def make_loop_stmt(loop_stmt_dict: dict) -> Building[LoopStmt]:
     return LoopStmt(
-        location=Location(**loop_stmt_dict["location"]),
-        init_stmts=make_stmts(loop_stmt_dict["init"]),
-        until_cond=make_expr(loop_stmt_dict["cond"]),
-        body=make_stmts(loop_stmt_dict["body"]),
+        location=make_location(loop_stmt_dict["location"]),
+        init_stmts=(yield [STMT(stmt_dict) for stmt_dict in loop_stmt_dict["init"]]),
+        until_cond=(yield EXPR(loop_stmt_dict["cond"])),
+        body=(yield [STMT(stmt_dict) for stmt_dict in loop_stmt_dict["body"]]),
+    )
+
+
+def make_when_branch(when_branch_dict: dict) -> Building[WhenBranch]:
+    return WhenBranch(
+        location=make_location(when_branch_dict["location"]),
+        choices=(yield [
+            make_when_choice(choice_dict)
+            for choice_dict in when_branch_dict["choices"]
+        ]),
+        body=(yield [STMT(stmt_dict) for stmt_dict in when_branch_dict["body"]]),
     )
 
 
-def make_inspect_stmt(inspect_stmt_dict: dict) -> InspectStmt:
+@STMT.rule("inspect_stmt")
+def make_inspect_stmt(inspect_stmt_dict: dict) -> Building[InspectStmt]:
     return InspectStmt(
-        location=Location(**inspect_stmt_dict["location"]),
-        expr=make_expr(inspect_stmt_dict["expr"]),
-        when_branches=[
-            WhenBranch(
-                location=Location(**when_branch_dict["location"]),
-                choices=[
-                    make_when_choice(choice_dict)
-                    for choice_dict in when_branch_dict["choices"]
-                ],
-                body=make_stmts(when_branch_dict["body"]),
-            )
+        location=make_location(inspect_stmt_dict["location"]),
+        expr=(yield EXPR(inspect_stmt_dict["expr"])),
+        when_branches=(yield [
+            make_when_branch(when_branch_dict)
             for when_branch_dict in inspect_stmt_dict["when_clauses"]
-        ],
-        else_branch=make_stmts(inspect_stmt_dict["else_clause"]),
+        ]),
+        else_branch=(yield [
+            STMT(stmt_dict) for stmt_dict in inspect_stmt_dict["else_clause"]]),
     )
 
 
-def make_when_choice(choice_dict: dict) -> Choice:
-    if choice_dict["type"] == "choice_interval":
+def make_when_choice(choice_dict: dict) -> Building[Choice]:
+    # Значение выбора может быть уже построено при однопроходной загрузке
+    if type(choice_dict) is dict and choice_dict["type"] == "choice_interval":
         return IntervalChoice(
-            location=Location(**choice_dict["location"]),
-            start=make_expr(choice_dict["start"]),
-            end=make_expr(choice_dict["end"]),
+            location=make_location(choice_dict["location"]),
+            start=(yield EXPR(choice_dict["start"])),
+            end=(yield EXPR(choice_dict["end"])),
         )
 
-    choice_expr = make_expr(choice_dict)
+    choice_expr = yield EXPR(choice_dict)
     return ValueChoice(
         location=choice_expr.location,
         value=choice_expr,
     )
 
 
-def make_call_stmt(call_stmt_dict: dict) -> RoutineCall:
+@STMT.rule("feature_call")
+def make_call_stmt(call_stmt_dict: dict) -> Building[RoutineCall]:
     return RoutineCall(
-        location=Location(**call_stmt_dict["location"]),
-        feature_call=make_feature_call(call_stmt_dict),
+        location=make_location(call_stmt_dict["location"]),
+        feature_call=(yield make_feature_call(call_stmt_dict)),
     )
 
 
-def make_precursor_stmt(precursor_call_stmt: dict) -> PrecursorCallStmt:
+@STMT.rule("precursor_call")
+def make_precursor_stmt(precursor_call_stmt: dict) -> Building[PrecursorCallStmt]:
     return PrecursorCallStmt(
-        location=Location(**precursor_call_stmt["location"]),
-        precursor_call=make_precursor_call(precursor_call_stmt),
+        location=make_location(precursor_call_stmt["location"]),
+        precursor_call=(yield make_precursor_call(precursor_call_stmt)),
     )
 
 
-def make_stmts(stmts: list) -> list[Statement]:
-    return [make_stmt(stmt_dict) for stmt_dict in stmts]
+# Однопроходный загрузчик строит вызовы как выражения,
+# в позиции инструкции они становятся инструкциями вызова
+@STMT.adapter(FeatureCall)
+def adapt_call_stmt(feature_call: FeatureCall) -> RoutineCall:
+    return RoutineCall(location=feature_call.location, feature_call=feature_call)
+
+
+@STMT.adapter(PrecursorCall)
+def adapt_precursor_stmt(precursor_call: PrecursorCall) -> PrecursorCallStmt:
+    return PrecursorCallStmt(
+        location=precursor_call.location, precursor_call=precursor_call)
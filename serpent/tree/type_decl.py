@@ -2,55 +2,51 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 
 from .abstract_node import *
+from .builder import BuilderTable, Building
 
 
 class TypeDecl(Node, ABC):
-    pass
+    __slots__ = ()
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class ClassType(TypeDecl):
     name: str
     generics: list[TypeDecl] = field(default_factory=list)
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class TupleType(TypeDecl):
     generics: list[TypeDecl] = field(default_factory=list)
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class GenericSpec(Node):
     template_type_name: str
     required_parent: TypeDecl
 
 
-@dataclass
+@dataclass(slots=True)
 class LikeCurrent(TypeDecl):
     pass
 
 
-@dataclass(match_args=True, kw_only=True)
+@dataclass(match_args=True, kw_only=True, slots=True)
 class LikeFeature(TypeDecl):
     feature_name: str
 
 
+TYPE_DECL = BuilderTable("type declaration")
+
+
 def make_type_decl(type_decl_dict: dict) -> TypeDecl:
-    match type_decl_dict["type"]:
-        case "type_spec":
-            return make_simple_type_decl(type_decl_dict)
-        case "type_spec_like":
-            return make_like_type_decl(type_decl_dict)
-        case "generic_type_spec":
-            return make_generic_type_decl(type_decl_dict)
-        case unkwnown_type_decl:
-            raise UnknownNodeTypeError(
-                f"Unknown type declaration: {unkwnown_type_decl}")
+    return TYPE_DECL.build(type_decl_dict)
 
 
+@TYPE_DECL.rule("type_spec")
 def make_simple_type_decl(simple_decl_dict: dict) -> TypeDecl:
     type_name = simple_decl_dict["type_name"]
-    location = Location(**simple_decl_dict["location"])
+    location = make_location(simple_decl_dict["location"])
     return ClassType(
         location=location,
         name=type_name,
@@ -58,8 +54,9 @@ def make_simple_type_decl(simple_decl_dict: dict) -> TypeDecl:
     )
 
 
+@TYPE_DECL.rule("type_spec_like")
 def make_like_type_decl(like_decl_dict: dict) -> TypeDecl:
-    location = Location(**like_decl_dict["location"])
+    location = make_location(like_decl_dict["location"])
     like_what_value = like_decl_dict["like_what"]
     match like_what_value["type"]:
         case "current_const":
@@ -74,11 +71,12 @@ def make_like_type_decl(like_decl_dict: dict) -> TypeDecl:
                 f"Unknown value type of like spec: {unknown_value}")
 
 
-def make_generic_type_decl(generic_decl_dict: dict) -> TypeDecl:
-    location = Location(**generic_decl_dict["location"])
+@TYPE_DECL.rule("generic_type_spec")
+def make_generic_type_decl(generic_decl_dict: dict) -> Building[TypeDecl]:
+    location = make_location(generic_decl_dict["location"])
     type_name = generic_decl_dict["type_name"]
-    generics = [
-        make_type_decl(element_type)
+    generics = yield [
+        TYPE_DECL(element_type)
         for element_type in generic_decl_dict["type_list"]
     ]
 
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from serpent.parser_adapter import load_shared_parser, parse, parse_binary
+from serpent.tree import decode_binary_ast, make_ast, make_ast_from_binary
+from serpent.tree.abstract_node import Location
+from serpent.tree.binary import (
+    MAGIC,
+    TAG_ARRAY,
+    TAG_NODE,
+    TAG_STRING,
+    VERSION,
+    BinaryAstError,
+)
+from testlib.config import PARSER_BUILD_PATH, PARSER_LIBRARY_PATH, TEST_EXAMPLES_DIR
+
+
+def test_binary_ast_matches_json_ast():
+    for example in sorted(TEST_EXAMPLES_DIR.glob("*.e")):
+        source = example.read_text()
+
+        json_ast, stderr = parse(source, PARSER_BUILD_PATH)
+        if stderr:
+            continue
+        binary_ast, _ = parse_binary(source, PARSER_BUILD_PATH)
+
+        assert make_ast_from_binary(binary_ast) == make_ast(json.loads(json_ast)), example.name
+
+
+@pytest.fixture
+def shared_parser():
+    shared_parser = load_shared_parser(PARSER_LIBRARY_PATH)
+    if shared_parser is None:
+        pytest.skip("parser library is not built")
+    return shared_parser
+
+
+def test_c_decoder_matches_python_decoder(shared_parser):
+    for example in sorted(TEST_EXAMPLES_DIR.glob("*.e")):
+        binary_ast, stderr = parse_binary(example.read_text(), PARSER_BUILD_PATH)
+        if stderr:
+            continue
+
+        assert shared_parser.decode_binary(binary_ast) == decode_binary_ast(binary_ast)
+        assert make_ast_from_binary(binary_ast, shared_parser.decode_binary) == \
+            make_ast_from_binary(binary_ast), example.name
+
+
+def node(kind, location, file_index):
+    # Узел без полей (см. serpent/parser/include/binary.h)
+    return bytes([TAG_NODE, kind]) + b"".join(
+        varint(field) for field in location) + varint(file_index) + b"\0"
+
+
+def varint(number):
+    data = bytearray()
+    while number >= 0x80:
+        data.append(number & 0x7F | 0x80)
+        number >>= 7
+    return bytes(data + bytes([number]))
+
+
+def binary(strings, root):
+    blob = b"".join(string.encode() + b"\0" for string in strings)
+    return MAGIC + bytes([VERSION]) + varint(len(strings)) + varint(len(blob)) + blob + root
+
+
+@pytest.mark.parametrize("location", [
+    (3, 4, 10, 7),
+    (0, 0, 0, 0),
+    (2**20, 2**18 - 1, 2**20 + 2**18 - 1, 2**18 - 1),
+    # Широкая раскладка
+    (1, 1, 1, 300000),
+    (5, 1, 2, 1),
+    (10**12, 10**9, 10**12 + 10**9, 10**9),
+])
+@pytest.mark.parametrize("file_index", [0, 2])
+def test_c_decoder_locations(shared_parser, location, file_index):
+    data = binary(["node", "a.e"], TAG_ARRAY.to_bytes() + varint(2) + node(
+        0, location, file_index) * 2)
+
+    decoded = shared_parser.decode_binary(data)
+    assert decoded == decode_binary_ast(data)
+    expected = Location(*location, "a.e" if file_index else None)
+    assert decoded[0]["location"] == expected
+    assert decoded[0]["location"].is_wide == expected.is_wide
+    # Одинаковые позиции разделяют один объект
+    assert decoded[0]["location"] is decoded[1]["location"]
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"JSON", "Not a binary"),
+    (MAGIC + bytes([VERSION + 1]), "Unsupported binary AST version"),
+    (MAGIC + bytes([VERSION]) + b"\1\2a\0" + TAG_NODE.to_bytes(), "Unexpected end"),
+    (MAGIC + bytes([VERSION]) + b"\0\0\x09", "Unknown tag 9"),
+    (MAGIC + bytes([VERSION]) + b"\0\0" + TAG_STRING.to_bytes() + b"\0", "out of range"),
+])
+def test_c_decoder_rejects_malformed_data(shared_parser, data, message):
+    with pytest.raises(BinaryAstError, match=message):
+        shared_parser.decode_binary(data)
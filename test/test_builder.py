@@ -0,0 +1,75 @@
+import pickle
+
+from serpent.profiling import count_nodes
+from serpent.tree import AddOp, IntegerConst
+from serpent.tree.expr import make_expr
+from serpent.tree.features import make_feature_list
+
+
+LOCATION = {
+    "first_line": 1,
+    "first_column": 1,
+    "last_line": 1,
+    "last_column": 1,
+    "filename": None,
+}
+
+
+def int_const(value):
+    return {"type": "int_const", "location": LOCATION, "value": value}
+
+
+def test_deep_expression_does_not_hit_recursion_limit():
+    depth = 50_000
+    expr_dict = int_const(0)
+    for i in range(depth):
+        expr_dict = {
+            "type": "binop",
+            "location": LOCATION,
+            "binop_type": "add_op",
+            "left": int_const(i + 1),
+            "right": expr_dict,
+        }
+
+    expr = make_expr(expr_dict)
+
+    for i in reversed(range(depth)):
+        assert isinstance(expr, AddOp)
+        assert expr.left.value == i + 1
+        expr = expr.right
+    assert isinstance(expr, IntegerConst) and expr.value == 0
+
+
+def test_method_body_is_built_on_first_access():
+    method_dict = {
+        "type": "class_routine",
+        "location": LOCATION,
+        "name_and_type": {
+            "names": ["f"],
+            "field_type": {"type": "type_spec", "location": LOCATION, "type_name": "INTEGER"},
+        },
+        "params": [],
+        "body": {
+            "type": "routine_body",
+            "location": LOCATION,
+            "is_deferred": False,
+            "local": [],
+            "require": [],
+            "ensure": [{"type": "condition", "location": LOCATION,
+                        "cond": int_const(2), "tag": None}],
+            "do": [],
+            "then": int_const(1),
+        },
+    }
+
+    method, = make_feature_list([{"clients": [], "feature_list": [method_dict]}])
+    assert not method.is_body_built
+    assert count_nodes(method) == 2
+
+    unpickled = pickle.loads(pickle.dumps(method))
+    assert not unpickled.is_body_built
+
+    assert method.do[0].value == IntegerConst(location=method.location, value=1)
+    assert method.ensure[0].condition_expr.value == 2
+    assert method.is_body_built
+    assert unpickled == method
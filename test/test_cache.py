@@ -0,0 +1,93 @@
+from serpent.cache import CompilationCache
+from serpent.errors import ErrorCollector
+from serpent.semantic_checker.examine_system import examine_system
+from serpent.semantic_checker.analyze_inheritance import (
+    analyze_inheritance,
+    FlattenStats,
+)
+
+from test_inheritance import make_class
+
+
+HIERARCHY = {
+    "TOP": ([], ["top"]),
+    "LEFT": (["TOP"], ["left"]),
+    "RIGHT": (["TOP"], ["right"]),
+    "BOTTOM": (["LEFT", "RIGHT"], []),
+}
+
+
+def compile_system(cache_dir, sources_dir):
+    """Выполняет сборку, разбирая (здесь - создавая в памяти) только
+    классы, которых нет в кэше. Возвращает имена разобранных классов,
+    таблицы фич и статистику их построения
+    """
+    cache = CompilationCache(cache_dir)
+    parsed = []
+    classes = []
+    for name, (parents, features) in HIERARCHY.items():
+        path = sources_dir / f"{name.lower()}.e"
+        file_classes = cache.load_classes(path)
+        if file_classes is None:
+            parsed.append(name)
+            file_classes = [make_class(name, parents, features)]
+            cache.store_classes(path, file_classes)
+        classes.extend(file_classes)
+
+    stats = FlattenStats()
+    error_collector = ErrorCollector()
+    ordered = examine_system(classes, error_collector)
+    tables = analyze_inheritance(ordered, error_collector, stats, cache)
+    assert error_collector.ok()
+    return parsed, tables, stats
+
+
+def test_touching_a_class_rebuilds_only_it_and_descendants(tmp_path):
+    cache_dir = tmp_path / "cache"
+    sources_dir = tmp_path / "src"
+    sources_dir.mkdir()
+    for name in HIERARCHY:
+        (sources_dir / f"{name.lower()}.e").write_text(f"class {name} end")
+
+    parsed, tables, stats = compile_system(cache_dir, sources_dir)
+    assert parsed == list(HIERARCHY)
+    assert (stats.computed, stats.cached) == (4, 0)
+
+    parsed, cached_tables, stats = compile_system(cache_dir, sources_dir)
+    assert parsed == []
+    assert (stats.computed, stats.cached) == (0, 4)
+    assert [table.class_name for table in cached_tables] == [
+        table.class_name for table in tables]
+    assert sorted(f.name for f in cached_tables[-1].inherited) == [
+        "left", "right", "top"]
+
+    (sources_dir / "left.e").write_text("class LEFT end -- changed")
+    parsed, _, stats = compile_system(cache_dir, sources_dir)
+    assert parsed == ["LEFT"]
+    assert (stats.computed, stats.cached) == (2, 2)
+
+
+def test_cached_tables_reference_loaded_declarations(tmp_path):
+    cache_dir = tmp_path / "cache"
+    sources_dir = tmp_path / "src"
+    sources_dir.mkdir()
+    for name in HIERARCHY:
+        (sources_dir / f"{name.lower()}.e").write_text(f"class {name} end")
+
+    _, tables, _ = compile_system(cache_dir, sources_dir)
+    _, cached_tables, stats = compile_system(cache_dir, sources_dir)
+    assert stats.cached == 4
+
+    # Таблицы хранят ссылки на объявления, а не сами объявления
+    for entry in (cache_dir / "classes").iterdir():
+        assert b"ClassDecl" not in entry.read_bytes()
+        assert b"Method" not in entry.read_bytes()
+
+    declarations = {table.class_name: table.class_decl for table in cached_tables}
+    top, left, right, bottom = cached_tables
+    assert bottom.class_decl is declarations["BOTTOM"]
+    assert bottom.explicit_index["top"].node is declarations["TOP"].features[0]
+    assert bottom.explicit_index["left"].node is declarations["LEFT"].features[0]
+    for table, cached_table in zip(tables, cached_tables):
+        assert list(cached_table.explicit_index) == list(table.explicit_index)
+        assert cached_table.inherited == table.inherited
@@ -0,0 +1,167 @@
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from serpent.driver import collect_sources, compile_program, load_interfaces
+from serpent.errors import ErrorCollector
+from serpent.stdlib import STDLIB_DIR, build_snapshot
+from serpent.tree import Method
+from testlib.config import PARSER_BUILD_PATH, PARSER_LIBRARY_PATH
+
+
+@pytest.fixture
+def stdlib_dir(tmp_path):
+    # ANY - единственный класс библиотеки, нужный любой программе. Полная
+    # библиотека сейчас сама содержит ошибки (см. test_default_stdlib_errors)
+    stdlib_dir = tmp_path / "stdlib"
+    stdlib_dir.mkdir()
+    shutil.copy(STDLIB_DIR / "any.e", stdlib_dir)
+    return stdlib_dir
+
+
+def write_program(program_dir, count):
+    (program_dir / "nested").mkdir(parents=True)
+    for i in range(count):
+        parent = f"inherit C{i - 1}" if i > 0 else ""
+        directory = program_dir / "nested" if i % 2 else program_dir
+        (directory / f"c{i}.e").write_text(
+            f"class C{i}\n{parent}\nfeature\n    f{i}: INTEGER\nend\n")
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_program_from_directory(tmp_path, stdlib_dir, jobs):
+    program_dir = tmp_path / "program"
+    write_program(program_dir, 6)
+
+    error_collector = ErrorCollector()
+    program = compile_program(
+        [program_dir],
+        error_collector,
+        PARSER_BUILD_PATH,
+        jobs,
+        snapshot_path=tmp_path / "missing.snapshot",
+        stdlib_dir=stdlib_dir)
+
+    assert error_collector.ok()
+    assert [decl.class_name for decl in program.classes] == [
+        "ANY", "C0", "C1", "C2", "C3", "C4", "C5"]
+    features = {record.name for record in program.tables["C5"].explicit_features}
+    assert {"default_create", "f0", "f1", "f2", "f3", "f4", "f5"} <= features
+
+
+def test_parse_errors_are_reported_per_file(tmp_path, stdlib_dir):
+    program_dir = tmp_path / "program"
+    write_program(program_dir, 2)
+    broken = program_dir / "broken.e"
+    broken.write_text("class BROKEN\nfeature\n    f do x := end\nend\n")
+
+    error_collector = ErrorCollector()
+    program = compile_program(
+        collect_sources([program_dir, broken]),
+        error_collector,
+        PARSER_BUILD_PATH,
+        2,
+        snapshot_path=tmp_path / "missing.snapshot",
+        stdlib_dir=stdlib_dir)
+
+    assert program.classes == []
+    assert [error.source for error in error_collector.errors] == [str(broken)]
+
+
+LIBRARY_CLASS = """deferred class LIB
+feature
+    twice (x: INTEGER): INTEGER
+        local
+            y: INTEGER
+        require
+            positive: x > 0
+        do
+            y := x + x
+            Result := y
+        ensure
+            Result > x
+        end
+
+    reset
+        deferred
+        end
+end
+"""
+
+
+@pytest.mark.parametrize("library_path", [None, PARSER_LIBRARY_PATH])
+def test_dependencies_are_loaded_without_bodies(tmp_path, stdlib_dir, library_path):
+    library_dir = tmp_path / "library"
+    library_dir.mkdir()
+    (library_dir / "lib.e").write_text(LIBRARY_CLASS)
+    program_dir = tmp_path / "program"
+    program_dir.mkdir()
+    (program_dir / "main.e").write_text("deferred class MAIN\ninherit LIB\nend\n")
+
+    error_collector = ErrorCollector()
+    lib, = load_interfaces(
+        [library_dir], error_collector, PARSER_BUILD_PATH, library_path=library_path)
+    assert error_collector.ok()
+
+    twice, reset = lib.features
+    assert isinstance(twice, Method) and isinstance(reset, Method)
+    assert (twice.do, twice.local_var_decls, twice.require, twice.ensure) == ([], [], [], [])
+    assert [parameter.name for parameter in twice.parameters] == ["x"]
+    assert twice.return_type.name == "INTEGER"
+    assert (twice.is_deferred, reset.is_deferred) == (False, True)
+
+    program = compile_program(
+        [program_dir],
+        error_collector,
+        PARSER_BUILD_PATH,
+        snapshot_path=tmp_path / "missing.snapshot",
+        stdlib_dir=stdlib_dir,
+        library_path=library_path,
+        interface_paths=[library_dir])
+
+    assert error_collector.ok()
+    features = {record.name for record in program.tables["MAIN"].explicit_features}
+    assert {"twice", "reset"} <= features
+
+
+@pytest.mark.parametrize("from_snapshot", [False, True])
+def test_default_stdlib_compiles_cleanly(tmp_path, from_snapshot):
+    program_dir = tmp_path / "program"
+    write_program(program_dir, 2)
+    snapshot_path = tmp_path / "stdlib.snapshot"
+    if from_snapshot:
+        build_snapshot(PARSER_BUILD_PATH, snapshot_path)
+
+    error_collector = ErrorCollector()
+    program = compile_program(
+        [program_dir],
+        error_collector,
+        PARSER_BUILD_PATH,
+        snapshot_path=snapshot_path)
+
+    # REAL и INTEGER реализуют отложенную фичу NUMERIC без секции redefine
+    assert error_collector.ok()
+    assert [decl.class_name for decl in program.classes] == [
+        "ANY", "NUMERIC", "REAL", "INTEGER", "C0", "C1"]
+    assert list(program.tables) == [
+        "ANY", "NUMERIC", "REAL", "INTEGER", "C0", "C1"]
+    add = program.tables["REAL"].explicit_index["add"]
+    assert add.from_class == "REAL" and not add.is_deferred
+
+
+def test_cli_compiles_with_default_stdlib(tmp_path):
+    program_dir = tmp_path / "program"
+    write_program(program_dir, 2)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "serpent",
+         "--parser", PARSER_BUILD_PATH,
+         "--snapshot", tmp_path / "missing.snapshot",
+         program_dir],
+        capture_output=True,
+        text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stderr.splitlines() == ["6 classes, 6 feature tables"]
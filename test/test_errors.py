@@ -0,0 +1,122 @@
+import io
+import json
+import pickle
+
+import pytest
+
+from serpent.errors import (
+    CompilerError,
+    CompilerWarning,
+    ErrorCollector,
+    JsonLinesSink,
+    TextSink,
+    TooManyErrors,
+)
+from serpent.tree.abstract_node import Location
+
+
+def make_error(desc: str, line: int = 1, filename: str = "a.e") -> CompilerError:
+    return CompilerError(desc, location=Location(line, 1, line, 2, filename))
+
+
+def test_duplicates_are_ignored():
+    error_collector = ErrorCollector()
+    error_collector.add_error(make_error("bad"))
+    error_collector.add_error(make_error("bad"))
+    error_collector.add_error(make_error("bad", line=2))
+    error_collector.add_error(CompilerWarning("bad", location=Location(1, 1, 1, 2, "a.e")))
+
+    assert len(error_collector.errors) == 3
+    assert make_error("bad") in error_collector
+    assert make_error("other") not in error_collector
+
+
+def test_pickled_diagnostics_keep_location_and_source():
+    for error in [make_error("bad"), CompilerWarning("bad", source="a.e")]:
+        restored = pickle.loads(pickle.dumps(error))
+        assert type(restored) is type(error)
+        assert ErrorCollector.key(restored) == ErrorCollector.key(error)
+
+
+def test_stage_and_file_limits():
+    error_collector = ErrorCollector(max_errors_per_stage=2, max_errors_per_file=3)
+    with error_collector.stage("first"):
+        for line in range(5):
+            error_collector.add_error(make_error("bad", line, "a.e"))
+        with error_collector.stage("second"):
+            error_collector.add_error(make_error("bad", 1, "b.e"))
+            assert error_collector.current_stage == "second"
+        assert error_collector.current_stage == "first"
+
+    with error_collector.stage("third"):
+        error_collector.add_error(make_error("bad", 10, "a.e"))
+        error_collector.add_error(make_error("bad", 11, "a.e"))
+
+    assert [(error.location.filename, error.location.first_line)
+            for error in error_collector.errors] == [("a.e", 0), ("a.e", 1), ("b.e", 1), ("a.e", 10)]
+    assert error_collector.suppressed == 4
+    assert error_collector.current_stage is None
+
+
+def test_too_many_errors_aborts():
+    error_collector = ErrorCollector(max_errors=3, max_errors_per_file=1)
+    with pytest.raises(TooManyErrors) as exc_info:
+        for line in range(100):
+            error_collector.add_error(make_error("bad", line))
+            error_collector.add_error(make_error("bad", line))
+
+    assert exc_info.value.count == 3
+    assert len(error_collector.errors) == 1
+    assert error_collector.suppressed == 2
+    assert not error_collector.ok()
+
+
+def test_warnings_do_not_count_towards_limits():
+    error_collector = ErrorCollector(
+        max_errors=3, max_errors_per_stage=2, max_errors_per_file=2)
+    with error_collector.stage("first"):
+        for line in range(10):
+            error_collector.add_error(
+                CompilerWarning("unused", location=Location(line, 1, line, 2, "a.e")))
+        error_collector.add_error(make_error("bad", 1))
+        error_collector.add_error(make_error("bad", 2))
+
+    # Ни одно предупреждение не скрыто, и ошибки не скрыты предупреждениями
+    assert [error.severity for error in error_collector.errors] == \
+        ["warning"] * 10 + ["error"] * 2
+    assert error_collector.suppressed == 0
+
+    # Порог - третья ошибка, несмотря на десять предупреждений до нее
+    with error_collector.stage("first"), pytest.raises(TooManyErrors) as exc_info:
+        error_collector.add_error(make_error("bad", 3))
+    assert exc_info.value.count == 3
+    assert error_collector.suppressed == 1
+
+
+def test_sinks_receive_diagnostics_as_added():
+    text = io.StringIO()
+    lines = io.StringIO()
+    error_collector = ErrorCollector(
+        max_errors_per_file=1,
+        sinks=[TextSink(text), JsonLinesSink(lines)])
+
+    with error_collector.stage("examine_system"):
+        error_collector.add_error(make_error("bad"))
+        assert text.getvalue() == "a.e@1:1-1:2: error: bad\n"
+        error_collector.add_error(make_error("bad"))
+        error_collector.add_error(make_error("bad", line=2))
+    error_collector.add_error(CompilerWarning("unused", source="b.e"))
+    error_collector.close()
+
+    assert "\033" not in text.getvalue()
+    assert text.getvalue().endswith("1 more error(s) not shown\n")
+    records = [json.loads(line) for line in lines.getvalue().splitlines()]
+    assert records == [
+        {"severity": "error", "message": "bad", "stage": "examine_system",
+         "file": "a.e", "first_line": 1, "first_column": 1,
+         "last_line": 1, "last_column": 2, "source": None},
+        {"severity": "warning", "message": "unused", "stage": None,
+         "file": None, "first_line": None, "first_column": None,
+         "last_line": None, "last_column": None, "source": "b.e"},
+        {"summary": {"error": 1, "warning": 1, "suppressed": 1}},
+    ]
@@ -0,0 +1,183 @@
+from serpent.tree import (
+    Alias,
+    ClassDecl,
+    Parent,
+    SelectedFeatures,
+    Method,
+    ClassType,
+)
+from serpent.errors import ErrorCollector
+from serpent.semantic_checker.examine_system import examine_system
+from serpent.semantic_checker.analyze_inheritance import (
+    analyze_inheritance,
+    flatten_classes,
+    FlattenStats,
+)
+
+
+def make_class(name, parents=(), features=()):
+    return ClassDecl(
+        location=None,
+        class_name=name,
+        is_deferred=False,
+        inherit=[
+            Parent(
+                location=None,
+                class_name=parent,
+                select=SelectedFeatures(
+                    class_name=parent,
+                    selected_features=[]))
+            for parent in parents
+        ],
+        features=[
+            Method(
+                location=None,
+                name=feature,
+                clients=["ANY"],
+                is_deferred=False,
+                return_type=ClassType(location=None, name="<VOID>"))
+            for feature in features
+        ],
+    )
+
+
+def test_diamond_tables_are_built_once():
+    classes = [
+        make_class("BOTTOM", ["LEFT", "RIGHT"]),
+        make_class("LEFT", ["TOP"], ["left"]),
+        make_class("RIGHT", ["TOP"], ["right"]),
+        make_class("TOP", [], ["top"]),
+    ]
+    stats = FlattenStats()
+    error_collector = ErrorCollector()
+
+    ordered = examine_system(classes, error_collector)
+    tables = analyze_inheritance(ordered, error_collector, stats)
+
+    assert error_collector.ok()
+    assert [table.class_name for table in tables] == [
+        "TOP", "LEFT", "RIGHT", "BOTTOM"]
+    assert stats.computed == 4
+    assert stats.reused == 4
+
+    bottom = tables[-1]
+    assert sorted(f.name for f in bottom.inherited) == ["left", "right", "top"]
+
+
+def test_all_inheritance_cycles_are_reported():
+    classes = [
+        make_class("A", ["B"]),
+        make_class("B", ["A"]),
+        make_class("C", ["D"]),
+        make_class("D", ["E"]),
+        make_class("E", ["C"]),
+        make_class("F", ["A"]),
+    ]
+    error_collector = ErrorCollector()
+
+    ordered = examine_system(classes, error_collector)
+
+    assert ordered == []
+    assert [error.desc for error in error_collector.errors] == [
+        "Circular inheritance detected: A -> B -> A",
+        "Circular inheritance detected: C -> D -> E -> C",
+    ]
+
+
+def test_rename_and_redefine_use_feature_index():
+    parent = make_class("PARENT", [], ["a", "b", "c"])
+    child = make_class("CHILD", ["PARENT"], ["b"])
+    child.inherit[0].rename = [
+        Alias(location=None, original_name="a", alias_name="renamed_a"),
+        Alias(location=None, original_name="missing", alias_name="x"),
+    ]
+    child.inherit[0].redefine = ["b"]
+    error_collector = ErrorCollector()
+
+    tables = analyze_inheritance([parent, child], error_collector)
+
+    assert tables == []
+    assert [error.desc for error in error_collector.errors] == [
+        "Nonexistent parent feature in rename clause: missing",
+    ]
+
+    child.inherit[0].rename.pop()
+    error_collector = ErrorCollector()
+
+    parent_table, child_table = analyze_inheritance(
+        [parent, child], error_collector)
+
+    assert error_collector.ok()
+    assert list(parent_table.explicit_index) == ["a", "b", "c"]
+    assert list(child_table.explicit_index) == ["b", "renamed_a", "c"]
+    assert child_table.explicit_index["b"].node is child.features[0]
+
+
+def test_failed_classes_skip_descendants():
+    classes = [make_class("TOP", [], ["top"])]
+    for i in range(6):
+        classes.append(make_class(f"MIDDLE{i}", ["TOP"], [f"middle{i}"]))
+        # Повторяющаяся фича - ошибка в каждом втором классе
+        features = ["leaf", "leaf"] if i % 2 else [f"leaf{i}"]
+        classes.append(make_class(f"LEAF{i}", [f"MIDDLE{i}"], features))
+        classes.append(make_class(f"BELOW{i}", [f"LEAF{i}"]))
+    classes.append(make_class("BOTTOM", ["LEAF0", "LEAF2", "LEAF4"]))
+
+    error_collector = ErrorCollector()
+    ordered = examine_system(classes, error_collector)
+    tables = flatten_classes(ordered, error_collector)
+
+    assert len(error_collector.errors) == 3
+    assert {"LEAF1", "BELOW1", "LEAF3", "BELOW3", "LEAF5", "BELOW5"}.isdisjoint(tables)
+    assert sorted(f.name for f in tables["BOTTOM"].explicit_features) == [
+        "leaf0", "leaf2", "leaf4", "middle0", "middle2", "middle4", "top"]
+
+
+def test_undefine_and_rename_share_declarations():
+    parent = make_class("PARENT", [], ["a", "b"])
+    child = make_class("CHILD", ["PARENT"])
+    child.is_deferred = True
+    child.inherit[0].rename = [
+        Alias(location=None, original_name="a", alias_name="renamed_a")]
+    child.inherit[0].undefine = ["b"]
+    grandchild = make_class("GRANDCHILD", ["CHILD"], ["c"])
+    grandchild.is_deferred = True
+    error_collector = ErrorCollector()
+
+    parent_table, child_table, grandchild_table = analyze_inheritance(
+        [parent, child, grandchild], error_collector)
+
+    assert error_collector.ok()
+    renamed_a = child_table.explicit_index["renamed_a"]
+    undefined_b = child_table.explicit_index["b"]
+    assert renamed_a.node is parent.features[0]
+    assert undefined_b.node is parent.features[1]
+    assert undefined_b.is_deferred
+    assert not parent.features[1].is_deferred
+    assert not parent_table.explicit_index["b"].is_deferred
+    # Потомок разделяет записи, не затронутые секциями наследования
+    assert grandchild_table.explicit_index["renamed_a"] is renamed_a
+    assert grandchild_table.explicit_index["b"] is undefined_b
+
+
+def test_redeclared_deferred_feature_is_effected():
+    parent = make_class("PARENT", [], ["add", "sub"])
+    parent.is_deferred = True
+    for feature in parent.features:
+        feature.is_deferred = True
+    child = make_class("CHILD", ["PARENT"], ["add", "sub"])
+    partial = make_class("PARTIAL", ["PARENT"], ["add"])
+    error_collector = ErrorCollector()
+
+    tables = flatten_classes([parent, child, partial], error_collector)
+
+    # Реализация отложенной фичи не требует секции redefine,
+    # а класс, реализовавший не все отложенные фичи, - ошибка
+    assert [error.desc for error in error_collector.errors] == [
+        "Class 'PARTIAL' is not deferred but contains deferred feature: 'sub' in None"]
+    child_table = tables["CHILD"]
+    assert child_table.inherited == []
+    assert [feature.name for feature in child_table.explicit_features] == ["add", "sub"]
+    assert not any(feature.is_deferred for feature in child_table.explicit_features)
+    assert [(feature.from_class, feature.node) for feature in child_table.undefined] == [
+        ("PARENT", child.features[0]), ("PARENT", child.features[1])]
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from serpent.parser_adapter import load_shared_parser, parse
+from serpent.tree import decode_json_ast, make_ast, make_ast_from_json
+from testlib.config import PARSER_BUILD_PATH, PARSER_LIBRARY_PATH, TEST_EXAMPLES_DIR
+
+
+def test_single_pass_ast_matches_two_pass_ast():
+    for example in sorted(TEST_EXAMPLES_DIR.glob("*.e")):
+        json_ast, stderr = parse(example.read_text(), PARSER_BUILD_PATH)
+        if stderr:
+            continue
+
+        assert make_ast_from_json(json_ast) == make_ast(json.loads(json_ast)), example.name
+
+
+@pytest.mark.parametrize("library_path", [None, PARSER_LIBRARY_PATH])
+def test_compact_locations_decode_to_same_ast(library_path):
+    if library_path is not None and load_shared_parser(library_path) is None:
+        pytest.skip("parser library is not built")
+
+    for example in sorted(TEST_EXAMPLES_DIR.glob("*.e")):
+        source = example.read_text()
+        json_ast, stderr = parse(source, PARSER_BUILD_PATH, library_path)
+        if stderr:
+            continue
+        compact_ast, _ = parse(
+            source, PARSER_BUILD_PATH, library_path, compact_locations=True)
+
+        assert len(compact_ast) < len(json_ast)
+        expected = make_ast(json.loads(json_ast))
+        assert make_ast(decode_json_ast(compact_ast)) == expected, example.name
+        assert make_ast_from_json(compact_ast) == expected, example.name
+
+
+def test_compact_locations_refer_to_file_table():
+    shared_parser = load_shared_parser(PARSER_LIBRARY_PATH)
+    if shared_parser is None:
+        pytest.skip("parser library is not built")
+
+    compact_ast, _ = shared_parser.parse(
+        "class A end\n", "a.e", compact_locations=True)
+    tree = json.loads(compact_ast)
+    assert list(tree) == ["files", "classes"]
+    assert tree["files"] == ["a.e"]
+    assert tree["classes"][0]["location"] == [1, 1, 1, 12, 0]
+
+    class_decl, = make_ast(decode_json_ast(compact_ast))
+    location = class_decl.location
+    assert (location.filename, location.first_line, location.last_column) == ("a.e", 1, 12)
@@ -0,0 +1,116 @@
+import pickle
+
+import pytest
+
+from serpent.tree.abstract_node import Location, make_location
+
+
+def components(location):
+    return (
+        location.first_line,
+        location.first_column,
+        location.last_line,
+        location.last_column,
+        location.filename)
+
+
+@pytest.mark.parametrize("args", [
+    (1, 1, 1, 1, "a.e"),
+    (3, 4, 10, 7, "b.e"),
+    (0, 0, 0, 0, None),
+    # Наибольшие значения обычной раскладки
+    (2**20, 2**18 - 1, 2**20 + 2**18 - 1, 2**18 - 1, "a.e"),
+])
+def test_components_round_trip(args):
+    location = Location(*args)
+    assert components(location) == args
+    # Обычная раскладка
+    assert not location.is_wide
+
+
+@pytest.mark.parametrize("args", [
+    (1, 1, 1, 300000, "a.e"),
+    (1, 2**18, 1, 1, "a.e"),
+    (1, 1, 2**18 + 1, 1, "a.e"),
+    (10**12, 10**9, 10**12 + 10**9, 10**9, "a.e"),
+    # Отрицательные значения и last_line < first_line
+    (-1, -5, -3, 2, "a.e"),
+    (5, 1, 2, 1, None),
+])
+def test_out_of_range_components_are_widened(args):
+    location = Location(*args)
+    assert components(location) == args
+    assert location.is_wide
+
+
+def test_many_files_are_widened(monkeypatch):
+    # Таблица имен файлов уже заполнена до предела обычной раскладки
+    filenames = [None] + [f"{i}.e" for i in range(1, 2**16)]
+    monkeypatch.setattr(Location, "_filenames", filenames)
+    monkeypatch.setattr(Location, "_file_ids", {
+        filename: file_id for file_id, filename in enumerate(filenames)})
+
+    last = Location(1, 2, 3, 4, f"{2**16 - 1}.e")
+    assert not last.is_wide
+    overflow = Location(1, 2, 3, 4, "overflow.e")
+    assert overflow.is_wide
+    assert components(overflow) == (1, 2, 3, 4, "overflow.e")
+    assert components(last) == (1, 2, 3, 4, f"{2**16 - 1}.e")
+
+
+@pytest.mark.parametrize("args", [
+    (3, 4, 10, 7, "b.e"),
+    (1, 1, 1, 300000, "a.e"),
+    (-1, -5, -3, 2, None),
+])
+def test_pickling_goes_through_components(args):
+    location = Location(*args)
+    assert location.__reduce__() == (Location, args)
+
+    restored = pickle.loads(pickle.dumps(location))
+    assert type(restored) is Location
+    assert restored == location
+    assert components(restored) == args
+
+
+def test_equality_and_hashing():
+    location = Location(3, 4, 10, 7, "b.e")
+    assert location == Location(3, 4, 10, 7, "b.e")
+    assert hash(location) == hash(Location(3, 4, 10, 7, "b.e"))
+    assert location != Location(3, 4, 10, 7, "c.e")
+    assert location != Location(3, 4, 10, 8, "b.e")
+    assert Location(1, 1, 1, 300000, "a.e") == Location(1, 1, 1, 300000, "a.e")
+    assert Location(1, 1, 1, 300000, "a.e") != Location(1, 1, 1, 300001, "a.e")
+    assert len({location, Location(3, 4, 10, 7, "b.e"), Location(1, 1, 1, 1, "b.e")}) == 2
+
+
+def test_zero_location_is_true():
+    location = Location(0, 0, 0, 0, None)
+    assert location
+    assert bool(location) is True
+
+
+def test_not_equal_to_integers():
+    location = Location(0, 0, 0, 0, None)
+    assert location != 0
+    assert location._packed == 0
+    assert Location(3, 4, 10, 7, "b.e") != Location(3, 4, 10, 7, "b.e")._packed
+    # Позиция и число с тем же значением - разные ключи
+    assert len({location: 1, 0: 2}) == 2
+
+
+def test_repr():
+    assert repr(Location(3, 4, 3, 4, "b.e")) == "b.e@3:4"
+    assert str(Location(3, 4, 10, 7, None)) == "<input>@3:4-10:7"
+
+
+def test_make_location():
+    location = Location(3, 4, 10, 7, "b.e")
+    assert make_location(location) is location
+    assert make_location({
+        "first_line": 3,
+        "first_column": 4,
+        "last_line": 10,
+        "last_column": 7,
+        "filename": "b.e",
+    }) == location
@@ -0,0 +1,152 @@
+import json
+import sys
+
+import pytest
+
+from serpent.parser_adapter import ParserPool, ParserWorker, parse
+from testlib.config import PARSER_BUILD_PATH, PARSER_LIBRARY_PATH, TEST_EXAMPLES_DIR
+
+
+# Сервер с тем же протоколом кадров, что и eiffelp -s: в ответ на запрос
+# возвращает текст программы вместо дерева и имя файла вместо ошибок,
+# а получив текст "exit", завершается, не ответив, или, получив
+# "truncate", - оборвав ответ на середине
+ECHO_SERVER = f"""#!{sys.executable}
+import struct
+import json
+import sys
+
+header = struct.Struct(">I")
+
+def read_frame():
+    data = sys.stdin.buffer.read(header.size)
+    if len(data) != header.size:
+        sys.exit(0)
+    return sys.stdin.buffer.read(header.unpack(data)[0])
+
+def write_frame(data):
+    sys.stdout.buffer.write(header.pack(len(data)))
+    sys.stdout.buffer.write(data)
+
+while True:
+    file_name, source = read_frame(), read_frame()
+    if source == b"exit":
+        sys.exit(1)
+    if source == b"truncate":
+        # Заголовок обещает больше байтов, чем будет записано
+        sys.stdout.buffer.write(header.pack(100) + b"{{}}")
+        sys.stdout.buffer.flush()
+        sys.exit(1)
+    write_frame(source)
+    write_frame(file_name)
+    sys.stdout.buffer.flush()
+"""
+
+
+@pytest.fixture
+def echo_server(tmp_path):
+    path = tmp_path / "echo_server"
+    path.write_text(ECHO_SERVER)
+    path.chmod(0o755)
+    return path
+
+
+def test_worker_round_trips_frames(echo_server):
+    worker = ParserWorker(echo_server)
+    try:
+        assert worker.parse("class A end", "a.e") == ("class A end", "a.e")
+        # Пустые кадры и многострочный текст
+        assert worker.parse("") == ("", "")
+        assert worker.parse("a\r\nb\n", "b.e") == ("a\nb", "b.e")
+    finally:
+        worker.close()
+    assert not worker.is_alive()
+
+
+def test_dead_worker_raises(echo_server):
+    worker = ParserWorker(echo_server)
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        worker.parse("exit")
+    worker.close()
+    assert not worker.is_alive()
+
+
+def test_truncated_frame_raises(echo_server):
+    worker = ParserWorker(echo_server)
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        worker.parse("truncate")
+    worker.close()
+
+
+def test_pool_replaces_worker_after_truncated_frame(echo_server):
+    with ParserPool(echo_server, size=1) as pool:
+        with pytest.raises(RuntimeError, match="exited unexpectedly"):
+            pool.parse("truncate")
+        assert pool.parse("class A end", "a.e") == ("class A end", "a.e")
+
+
+def test_missing_parser_raises(tmp_path):
+    with pytest.raises(RuntimeError, match="Couldn't find eiffel parser"):
+        ParserWorker(tmp_path / "eiffelp")
+
+
+def test_pool_maps_in_order(echo_server):
+    sources = [f"class C{i} end" for i in range(50)]
+    file_names = [f"c{i}.e" for i in range(50)]
+    with ParserPool(echo_server, size=4) as pool:
+        assert pool.map(sources, file_names) == list(zip(sources, file_names))
+
+
+def test_pool_replaces_dead_worker(echo_server):
+    with ParserPool(echo_server, size=1) as pool:
+        with pytest.raises(RuntimeError):
+            pool.parse("exit")
+        # Единственный процесс пула завершился, его место занял новый
+        assert pool.parse("class A end", "a.e") == ("class A end", "a.e")
+
+
+def test_pool_close_stops_workers(echo_server):
+    pool = ParserPool(echo_server, size=3)
+    workers = list(pool._workers)
+    pool.close()
+    assert not any(worker.is_alive() for worker in workers)
+
+
+def test_pool_does_not_leak_workers_on_failed_start(echo_server, monkeypatch):
+    started = []
+
+    class FlakyWorker(ParserWorker):
+        def __init__(self, parser_path, interface_only=False):
+            if len(started) == 2:
+                raise RuntimeError("Couldn't start worker")
+            super().__init__(parser_path, interface_only)
+            started.append(self)
+
+    monkeypatch.setattr("serpent.parser_adapter.ParserWorker", FlakyWorker)
+    with pytest.raises(RuntimeError):
+        ParserPool(echo_server, size=4)
+    assert len(started) == 2
+    assert not any(worker.is_alive() for worker in started)
+
+
+def test_pool_matches_single_parses():
+    if not PARSER_BUILD_PATH.exists():
+        pytest.skip("parser is not built")
+
+    paths = sorted(TEST_EXAMPLES_DIR.glob("*.e"))
+    sources = [path.read_text() for path in paths]
+    with ParserPool(PARSER_BUILD_PATH, size=2) as pool:
+        results = pool.map(sources)
+    assert [stdout for stdout, _ in results] == [
+        parse(source, PARSER_BUILD_PATH)[0] for source in sources]
+
+
+@pytest.mark.parametrize("library_path", [None, PARSER_LIBRARY_PATH])
+def test_parse_passes_file_name(library_path):
+    if not PARSER_BUILD_PATH.exists():
+        pytest.skip("parser is not built")
+
+    stdout, _ = parse("class A end", PARSER_BUILD_PATH, library_path, file_name="a.e")
+    assert json.loads(stdout)["classes"][0]["location"]["filename"] == "a.e"
+    stdout, _ = parse("class A end", PARSER_BUILD_PATH, library_path)
+    assert json.loads(stdout)["classes"][0]["location"]["filename"] is None
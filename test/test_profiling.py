@@ -0,0 +1,47 @@
+import json
+
+from serpent.profiling import Profiler, count_nodes
+
+from test_inheritance import make_class
+
+
+def test_stages_record_time_memory_and_counters(tmp_path):
+    profiler = Profiler()
+    with profiler.stage("outer"):
+        profiler.count("classes", 2)
+        with profiler.stage("inner"):
+            data = [bytearray(1000) for _ in range(100)]
+            profiler.count("nodes", 5)
+            profiler.count("nodes")
+        del data
+    profiler.close()
+
+    outer, inner = profiler.records
+    assert (outer.name, outer.depth, dict(outer.counters)) == ("outer", 0, {"classes": 2})
+    assert (inner.name, inner.depth, dict(inner.counters)) == ("inner", 1, {"nodes": 6})
+    assert inner.peak_memory >= 100 * 1000
+    assert outer.peak_memory >= inner.peak_memory
+    assert outer.wall_time >= inner.wall_time >= 0
+
+    profiler.dump_json(tmp_path / "profile.json")
+    stages = json.loads((tmp_path / "profile.json").read_text())["stages"]
+    assert [stage["name"] for stage in stages] == ["outer", "inner"]
+
+    profiler.dump_chrome_trace(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert [(event["name"], event["ph"]) for event in events] == [
+        ("outer", "X"), ("inner", "X")]
+    assert events[1]["args"]["nodes"] == 6
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(enabled=False)
+    with profiler.stage("stage") as record:
+        profiler.count("nodes")
+    assert record is None
+    assert profiler.records == []
+
+
+def test_count_nodes():
+    # ClassDecl и две фичи с типами результата
+    assert count_nodes([make_class("A", [], ["a", "b"])]) == 5
@@ -0,0 +1,44 @@
+import resource
+
+import pytest
+
+from serpent.parser_adapter import load_shared_parser
+from testlib.config import PARSER_LIBRARY_PATH, TEST_EXAMPLES_DIR
+
+
+@pytest.fixture
+def shared_parser():
+    shared_parser = load_shared_parser(PARSER_LIBRARY_PATH)
+    if shared_parser is None:
+        pytest.skip("parser library is not built")
+    return shared_parser
+
+
+def test_concurrent_parsing_matches_sequential(shared_parser):
+    paths = sorted(TEST_EXAMPLES_DIR.glob("*.e"))
+    # Несколько копий каждого файла, чтобы разборы разных текстов
+    # (в том числе с ошибками) гарантированно пересекались по времени
+    sources = [path.read_text() for path in paths] * 20
+    file_names = [path.name for path in paths] * 20
+
+    expected = [
+        shared_parser.parse(source, file_name)
+        for source, file_name in zip(sources, file_names)]
+    assert any(stderr for _, stderr in expected)
+
+    assert shared_parser.map(sources, file_names, threads=8) == expected
+
+
+def test_repeated_parsing_keeps_memory_flat(shared_parser):
+    # Дерево разбора освобождается целиком вместе с ареной контекста,
+    # поэтому повторные разборы не увеличивают потребление памяти
+    source = "\n".join(path.read_text() for path in sorted(TEST_EXAMPLES_DIR.glob("*.e"))
+                       if shared_parser.parse(path.read_text(), path.name)[0])
+    shared_parser.parse(source, "program.e")
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    for _ in range(300):
+        shared_parser.parse(source, "program.e")
+
+    # ru_maxrss - в килобайтах
+    assert resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - max_rss < 10 * 1024
@@ -0,0 +1,55 @@
+import shutil
+
+from serpent.stdlib import STDLIB_DIR, build_snapshot, load_snapshot
+from testlib.config import PARSER_BUILD_PATH
+
+
+def test_snapshot_is_loaded_until_sources_change(tmp_path):
+    stdlib_dir = tmp_path / "stdlib"
+    shutil.copytree(STDLIB_DIR, stdlib_dir)
+    snapshot_path = tmp_path / "stdlib.snapshot"
+
+    stdlib = build_snapshot(PARSER_BUILD_PATH, snapshot_path, stdlib_dir)
+    loaded = load_snapshot(snapshot_path, stdlib_dir)
+
+    assert loaded is not None
+    assert loaded.classes == stdlib.classes
+    assert [table.class_name for table in loaded.tables] == [
+        table.class_name for table in stdlib.tables]
+    assert "ANY" in [table.class_name for table in loaded.tables]
+    assert [str(error) for error in loaded.errors] == [
+        str(error) for error in stdlib.errors]
+
+    with open(stdlib_dir / "any.e", "a") as file:
+        file.write("\n")
+    assert load_snapshot(snapshot_path, stdlib_dir) is None
+
+
+def test_flattening_errors_are_kept_in_snapshot(tmp_path):
+    stdlib_dir = tmp_path / "stdlib"
+    stdlib_dir.mkdir()
+    shutil.copy(STDLIB_DIR / "any.e", stdlib_dir)
+    (stdlib_dir / "broken.e").write_text(
+        "class BROKEN\n"
+        "feature\n"
+        "    f\n"
+        "        deferred\n"
+        "    end\n"
+        "end\n"
+        "\n"
+        "class CHILD\n"
+        "inherit\n"
+        "    BROKEN\n"
+        "end\n")
+    snapshot_path = tmp_path / "stdlib.snapshot"
+
+    stdlib = build_snapshot(PARSER_BUILD_PATH, snapshot_path, stdlib_dir)
+    loaded = load_snapshot(snapshot_path, stdlib_dir)
+
+    assert [table.class_name for table in loaded.tables] == ["ANY"]
+    assert len(loaded.errors) == 1
+    assert "Class 'BROKEN' is not deferred" in loaded.errors[0].desc
+    assert loaded.errors[0].location == stdlib.errors[0].location
+    # Позиции указывают на файл библиотеки, а не на <input>
+    assert loaded.errors[0].location.filename == "stdlib/broken.e"
+    assert "<input>" not in str(loaded.errors[0])
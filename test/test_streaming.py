@@ -0,0 +1,34 @@
+import json
+import subprocess
+
+import pytest
+
+from serpent.parser_adapter import iter_classes
+from serpent.tree import make_ast
+from testlib.config import PARSER_BUILD_PATH, TEST_EXAMPLES_DIR
+
+
+def parse_files(paths):
+    output = subprocess.run(
+        [PARSER_BUILD_PATH, *paths], capture_output=True, text=True)
+    return make_ast(json.loads(output.stdout)) if output.returncode == 0 else None
+
+
+def test_streamed_classes_match_json_ast(tmp_path):
+    paths = [path for path in sorted(TEST_EXAMPLES_DIR.glob("*.e")) if parse_files([path])]
+    # Несколько классов в одном файле выводятся по отдельности
+    combined = tmp_path / "combined.e"
+    combined.write_text("\n".join(path.read_text() for path in paths))
+
+    for files in (paths, [combined]):
+        assert list(iter_classes(files, PARSER_BUILD_PATH)) == parse_files(files)
+
+
+def test_classes_before_syntax_error_are_yielded(tmp_path):
+    (tmp_path / "a.e").write_text("class A\nend\n")
+    (tmp_path / "b.e").write_text("class B\nfeature\n    f do x := end\nend\n")
+
+    classes = iter_classes([tmp_path / "a.e", tmp_path / "b.e"], PARSER_BUILD_PATH)
+    assert next(classes).class_name == "A"
+    with pytest.raises(RuntimeError, match="syntax error"):
+        next(classes)
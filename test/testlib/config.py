@@ -2,4 +2,5 @@ from pathlib import Path
 
 
 PARSER_BUILD_PATH = Path("build") / "eiffelp"
+PARSER_LIBRARY_PATH = Path("build") / "libeiffelp.so"
 TEST_EXAMPLES_DIR = Path("test") / "examples"
@@ -8,6 +8,7 @@ from testlib.utils import (
     )
 from testlib.config import (
     PARSER_BUILD_PATH,
+    PARSER_LIBRARY_PATH,
     TEST_EXAMPLES_DIR,
 )
 
@@ -37,7 +38,8 @@ def run_eiffel(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         program_text = func(*args, **kwargs)
-        return run_eiffel_parser(program_text, PARSER_BUILD_PATH)
+        return run_eiffel_parser(
+            program_text, PARSER_BUILD_PATH, PARSER_LIBRARY_PATH)
 
     return wrapper
 
@@ -2,6 +2,8 @@ from pathlib import Path
 import subprocess
 import re
 
+from serpent.parser_adapter import load_shared_parser
+
 
 def replace_rn_with_n(string: str) -> str:
     return "\n".join(string.splitlines())
@@ -10,14 +12,23 @@ def replace_rn_with_n(string: str) -> str:
 def run_eiffel_parser(
         program: str,
         parser_path: str | Path,
+        library_path: str | Path | None = None,
         ) -> tuple[str, str]:
-    """Возвращает результат работы парсера Eiffel по заданному файлу
+    """Возвращает результат работы парсера Eiffel по заданному файлу.
+    Если разделяемая библиотека парсера доступна, разбор выполняется
+    без запуска отдельного процесса.
 
     :param program: текст программы на Eiffel
     :param parser_path: путь к парсеру, включая имя файла парсера
+    :param library_path: путь к разделяемой библиотеке парсера
 
     :return: кортеж из двух строк: stdout и stderr
     """
+    if library_path is not None:
+        shared_parser = load_shared_parser(library_path)
+        if shared_parser is not None:
+            return shared_parser.parse(program)
+
     try:
         output = subprocess.run(
             [parser_path],